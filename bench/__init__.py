@@ -0,0 +1 @@
+"""Performance checks, run from the repository root with python -m bench.<name>."""
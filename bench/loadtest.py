@@ -0,0 +1,191 @@
+"""Load test for the JSON API server (core.server).
+
+    python -m bench.loadtest                                # 10k tasks, 64 clients, 10 s
+    python -m bench.loadtest --clients 256 --duration 30 --writes 0.2
+    python -m bench.loadtest --url http://127.0.0.1:8765   # a server that's already up
+
+Without --url a server is started in a subprocess on a synthetic schedule
+(bench.suite.synthetic) in a temp directory, on a free port. Every client
+keeps one connection open and loops: with probability --writes it toggles
+a random task (one write in ten adds one instead), otherwise it polls
+GET /tasks?filter=Active&limit=50 with the last ETag it got, so an
+unchanged list comes back as a 304.
+
+Prints requests per second, latency percentiles per request kind, the
+status codes seen and the server's writer stats: `groups` is how many
+commits the writes took, so writes / groups is the batching achieved.
+--out writes the same numbers as JSON.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from core import open_backend
+
+from .suite import synthetic
+
+ROOT = Path(__file__).resolve().parent.parent
+POLL = "/tasks?filter=Active&limit=50"
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection speaking just enough to talk to core.server"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    async def request(self, method, path, payload=None, headers=None):
+        """(status, headers, body bytes)"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        got = {}
+        for line in head[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                got[name.strip().lower()] = value.strip()
+        length = int(got.get("content-length", 0))
+        data = await self.reader.readexactly(length) if length else b""
+        return status, got, data
+
+
+async def client(host, port, ids, deadline, writes, seed, latencies, statuses):
+    rnd = random.Random(seed)
+    conn = await Connection(host, port).open()
+    etag = None
+    try:
+        while time.perf_counter() < deadline:
+            if rnd.random() < writes:
+                if rnd.random() < 0.1:
+                    kind, args = "add", ("POST", "/tasks", {"text": f"load test {rnd.randrange(10**6)}"})
+                else:
+                    kind, args = "toggle", ("POST", f"/tasks/{rnd.choice(ids)}/toggle")
+                headers = None
+            else:
+                kind, args = "poll", ("GET", POLL)
+                headers = {"If-None-Match": etag} if etag else None
+            start = time.perf_counter()
+            status, got, _ = await conn.request(*args, headers=headers)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            statuses[status] += 1
+            if kind == "poll" and status == 200:
+                etag = got.get("etag")
+    finally:
+        conn.close()
+
+
+async def run(host, port, clients, duration, writes):
+    conn = await Connection(host, port).open()
+    _, _, body = await conn.request("GET", "/tasks")
+    ids = [t["id"] for t in json.loads(body)["tasks"]] or [0]
+    latencies = {}
+    statuses = Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, ids, start + duration, writes, seed, latencies, statuses)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    _, _, body = await conn.request("GET", "/stats")
+    conn.close()
+    server = json.loads(body)
+    total = sum(statuses.values())
+    return {
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 1),
+        "latency_ms": {kind: _summary(times) for kind, times in sorted(latencies.items())},
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "writer": server["writer"],
+    }
+
+
+def start_server(tmp, n, backend):
+    path = Path(tmp) / f"schedule.{backend}"
+    target = open_backend(path)
+    target.write_snapshot(synthetic(n), target.begin_snapshot())
+    target.close()
+    proc = subprocess.Popen([sys.executable, "-m", "core.server", "--file", str(path), "--port", "0"],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        raise SystemExit(f"server didn't start: {line!r}")
+    url = urlsplit(line.split()[-1])
+    return proc, url.hostname, url.port
+
+
+def _summary(times) -> dict:
+    times = sorted(times)
+
+    def pct(q):
+        return round(times[min(len(times) - 1, int(q * len(times)))] * 1000, 3)
+
+    return {"count": len(times), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+            "max": round(times[-1] * 1000, 3)}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.loadtest")
+    p.add_argument("--url", help="test this server instead of starting one")
+    p.add_argument("--tasks", type=int, default=10_000, help="size of the synthetic schedule")
+    p.add_argument("--backend", choices=("json", "db"), default="json")
+    p.add_argument("--clients", type=int, default=64, help="concurrent connections")
+    p.add_argument("--duration", type=float, default=10.0, help="seconds")
+    p.add_argument("--writes", type=float, default=0.1, help="share of requests that write")
+    p.add_argument("--out", help="also write the results here as JSON")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port
+        else:
+            proc, host, port = start_server(tmp, args.tasks, args.backend)
+        try:
+            results = asyncio.run(run(host, port, args.clients, args.duration, args.writes))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    print(f"{results['requests']} requests in {results['duration_s']} s from {args.clients} clients: "
+          f"{results['requests_per_s']:,.0f}/s")
+    for kind, t in results["latency_ms"].items():
+        print(f"  {kind:<8} {t['count']:>8}  p50 {t['p50']:>8.3f}  p95 {t['p95']:>8.3f}  "
+              f"p99 {t['p99']:>8.3f}  max {t['max']:>8.3f} ms")
+    print("  status  " + ", ".join(f"{k}: {v}" for k, v in results["statuses"].items()))
+    w = results["writer"]
+    per = w["writes"] / w["groups"] if w["groups"] else 0
+    print(f"  writer  {w['writes']} writes in {w['groups']} commits ({per:.1f} per commit, "
+          f"largest {w['max_group']})")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
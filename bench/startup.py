@@ -0,0 +1,80 @@
+"""Startup budget for the console and headless paths.
+
+    python -m bench.startup [--runs 7] [--json]
+
+Each case runs in a fresh interpreter inside an empty temp directory and
+its median wall time is checked against BUDGET_MS. It also fails if any
+GUI toolkit got imported on the way, which is the regression this is
+meant to catch: the console menu and core.cli must not pay for PySide6
+or tkinter. Exits 1 on any failure.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+#modules that only a GUI launch may import
+GUI_MODULES = ("PySide6", "tkinter", "qtgui", "tkgui", "tklist")
+
+#name -> (python -c code, budget in ms); generous enough for a slow laptop
+CASES = {
+    "python": ("pass", None),
+    "import core": ("import core", 150),
+    "import task": ("import task", 200),
+    "import taskmanager": ("import taskmanager", 200),
+    "cli list": ("from core import cli; cli.main(['list', '--limit', '0'])", 300),
+}
+
+_CHECK = "\nimport sys; print('LOADED=' + ','.join(m for m in {mods!r} if m in sys.modules))"
+
+
+def run_case(code, cwd, runs):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    times = []
+    loaded = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code + _CHECK.format(mods=GUI_MODULES)],
+                             cwd=cwd, env=env, capture_output=True, text=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+        for line in out.stdout.splitlines():
+            if line.startswith("LOADED="):
+                loaded = [m for m in line[7:].split(",") if m]
+    return statistics.median(times), loaded
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.startup")
+    p.add_argument("--runs", type=int, default=7)
+    p.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = p.parse_args(argv)
+
+    results = {}
+    failed = False
+    with tempfile.TemporaryDirectory() as cwd:
+        for name, (code, budget) in CASES.items():
+            ms, loaded = run_case(code, cwd, args.runs)
+            ok = (budget is None or ms <= budget) and not loaded
+            failed |= not ok
+            results[name] = {"median_ms": round(ms, 1), "budget_ms": budget,
+                             "gui_modules": loaded, "ok": ok}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, r in results.items():
+            budget = f"/ {r['budget_ms']} ms" if r["budget_ms"] else ""
+            extra = f"  imported {', '.join(r['gui_modules'])}!" if r["gui_modules"] else ""
+            print(f"{name:<20} {r['median_ms']:>7.1f} ms {budget:<10} {'ok' if r['ok'] else 'FAIL'}{extra}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+"""Benchmarks for storage, filtering and list rendering at scale.
+
+    python -m bench.suite                          # 1k, 10k, 100k tasks
+    python -m bench.suite --sizes 1000,1000000 --out new.json
+    python -m bench.suite --baseline old.json      # exit 1 on regressions
+
+Every size gets a synthetic schedule (fixed seed, ~30% done, ~10% with a
+time in the text) in a temp directory, in both the JSON and SQLite
+backends. Timings are the median of --repeat runs, in milliseconds.
+
+Cases, per backend and size:
+    load / save            TaskStore.load() and save() (load_tasks/save_tasks)
+    decode_legacy          decode_tasks() on old "[x] text" strings (the
+                           one-time upgrade that replaced normalize_tasks)
+    filter_switch          store.visible() + count + first screen, per filter
+    search                 first query (builds the index) and a warm one
+    toggle                 one toggle, written through to disk
+    sort_build             store.visible() in each of SORTS, grouped by day
+    sorted_toggle          one toggle with a Status-sorted view listening,
+                           repositioned by bisect and reported as one move
+    bulk_toggle / bulk_remove  toggle_many / remove_many on BULK random tasks
+    clear_done             remove every done task (one pass, one write)
+    archive                archive_done(0): every done task to gzip segments,
+                           on a second copy of the schedule
+    archive_page           first PAGE_SIZE archived tasks matching a word,
+                           read from cold (segment cache dropped)
+    qt_refresh             TaskListModel.set_view() with a QListView on the
+                           offscreen platform (skipped without PySide6)
+    tk_refresh             TaskListbox.set_view() on a real Tk, using Xvfb
+                           when there is no $DISPLAY (skipped without both)
+
+Results go to --out as JSON. With --baseline, any case that got slower
+than --threshold times its old median (and by more than --noise-ms) is
+reported as a regression.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+from core import DUE_FILTERS, FILTERS, SORTS, TaskStore, open_backend
+from core.archive import PAGE_SIZE
+from core.records import decode_tasks
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+BACKENDS = ("json", "db")
+#toggles timed per size; each is one journal line / one SQLite UPDATE
+TOGGLES = 200
+#rows a window shows, what a filter switch has to produce right away
+SCREEN = 50
+#tasks picked for the bulk toggle / remove cases
+BULK = 500
+
+_WORDS = ("buy", "milk", "call", "mom", "gym", "report", "email", "bank", "car",
+          "dentist", "plan", "trip", "book", "review", "pay", "rent", "clean", "fix")
+_TIMES = ("3pm", "9:30", "tomorrow 9am", "noon", "friday 5pm")
+#done_at of the synthetic finished tasks; the stores are opened with archiving off
+_DONE_AT = 1_700_000_000.0
+
+
+def synthetic(n: int, seed: int = 1) -> list:
+    """Task dicts for a schedule of n tasks, the same every run"""
+    rnd = random.Random(seed)
+    items = []
+    for i in range(1, n + 1):
+        words = " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(2, 5)))
+        if rnd.random() < 0.1:
+            words += " " + rnd.choice(_TIMES)
+        d = {"id": i, "text": f"{words} #{i}"}
+        if rnd.random() < 0.3:
+            d["done"] = True
+            d["done_at"] = _DONE_AT
+        items.append(d)
+    return items
+
+
+def write_schedule(path, items: list):
+    target = open_backend(path)
+    target.write_snapshot(items, target.begin_snapshot())
+    target.close()
+
+
+def measure(fn, repeat: int, setup=None) -> float:
+    """Median wall time of fn() in ms; setup() runs untimed before each call"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        if setup is not None:
+            fn(arg)
+        else:
+            fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+class Suite:
+    def __init__(self, sizes, repeat, gui):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.gui = gui
+        self.results = {}
+        self.skipped = {}
+
+    def record(self, name, ms):
+        self.results[name] = round(ms, 3)
+        print(f"  {name:<36} {ms:>10.3f} ms", flush=True)
+
+    def run(self):
+        for n in self.sizes:
+            items = synthetic(n)
+            print(f"{n} tasks", flush=True)
+            self.record(f"decode_legacy/{n}", measure(
+                lambda legacy: decode_tasks(legacy), self.repeat,
+                lambda: [("[x] " if d.get("done") else "[ ] ") + d["text"] for d in items]))
+            for backend in BACKENDS:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = Path(tmp) / f"schedule.{backend}"
+                    write_schedule(path, items)
+                    self.run_store(path, backend, n)
+                    #on a schedule of its own, so the bulk cases above still
+                    #find every done task in place
+                    path = Path(tmp) / f"archive.{backend}"
+                    write_schedule(path, items)
+                    self.run_archive(path, backend, n)
+        return self.results
+
+    def run_store(self, path, backend, n):
+        tag = f"{backend}/{n}"
+
+        def fresh():
+            return TaskStore(path, write_behind=False, archive_after=None)
+
+        def load(store):
+            store.load()
+            store.close()
+
+        self.record(f"load/{tag}", measure(load, self.repeat, fresh))
+
+        store = fresh()
+        store.load()
+        assert store.status.check(store.tasks), "status index out of step after load"
+        self.record(f"save/{tag}", measure(store.save, self.repeat))
+
+        def switch():
+            for mode in FILTERS + DUE_FILTERS:
+                view = store.visible(mode)
+                len(view)
+                list(islice(view.iter_from(0), SCREEN))
+
+        self.record(f"filter_switch/{tag}",
+                    measure(switch, self.repeat) / len(FILTERS + DUE_FILTERS))
+
+        start = time.perf_counter()
+        len(store.visible("All", "milk"))
+        self.record(f"search_first/{tag}", (time.perf_counter() - start) * 1000)
+        self.record(f"search/{tag}", measure(lambda: len(store.visible("All", "dent tr")), self.repeat))
+
+        rnd = random.Random(2)
+        positions = [rnd.randrange(len(store.tasks)) for _ in range(TOGGLES)]
+
+        def toggles():
+            for pos in positions:
+                store.toggle(pos)
+
+        self.record(f"toggle/{tag}", measure(toggles, self.repeat) / TOGGLES)
+        assert store.status.check(store.tasks), "status index out of step after toggles"
+
+        def sort_all():
+            for sort in SORTS:
+                len(store.visible("All", "", sort, "Day"))
+
+        self.record(f"sort_build/{tag}", measure(sort_all, self.repeat) / len(SORTS))
+        view = store.visible("All", "", "Status")
+
+        def reposition(kind, pos, task, before):
+            view.row_changes(kind, pos, task, before)
+
+        store.subscribe(reposition)
+        self.record(f"sorted_toggle/{tag}", measure(toggles, self.repeat) / TOGGLES)
+        store.unsubscribe(reposition)
+        assert [store.tasks[pos].id for pos in view] == [store.tasks[pos].id for pos in
+                                                          store.visible("All", "", "Status")], \
+            "sorted view out of step after toggles"
+
+        if backend == "json":
+            if "qt" in self.gui:
+                self.run_qt(store, n)
+            if "tk" in self.gui:
+                self.run_tk(store, n)
+
+        #these change the list for good, so they run last and once
+        picks = rnd.sample(range(len(store.tasks)), min(BULK, len(store.tasks)))
+        start = time.perf_counter()
+        store.toggle_many(picks)
+        self.record(f"bulk_toggle/{tag}", (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        store.remove_many(picks)
+        self.record(f"bulk_remove/{tag}", (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        store.clear_done()
+        self.record(f"clear_done/{tag}", (time.perf_counter() - start) * 1000)
+        assert store.status.check(store.tasks), "status index out of step after bulk changes"
+        store.close()
+
+    def run_archive(self, path, backend, n):
+        tag = f"{backend}/{n}"
+        store = TaskStore(path, write_behind=False, archive_after=None)
+        store.load()
+        start = time.perf_counter()
+        store.archive_done(0)
+        self.record(f"archive/{tag}", (time.perf_counter() - start) * 1000)
+
+        def cold():
+            store.archive._cached = None
+
+        self.record(f"archive_page/{tag}", measure(
+            lambda _: store.archive.page(0, PAGE_SIZE, "milk"), self.repeat, cold))
+        store.close()
+
+    #front ends
+    def run_qt(self, store, n):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            from PySide6.QtWidgets import QApplication, QListView
+            from qtgui import TaskListModel
+        except ImportError as e:
+            self.skipped["qt"] = str(e)
+            return
+        app = QApplication.instance() or QApplication([])
+        model = TaskListModel(store)
+        view = QListView()
+        view.setUniformItemSizes(True)
+        view.setModel(model)
+        view.resize(600, 500)
+        view.show()
+        modes = FILTERS + DUE_FILTERS
+
+        def refresh():
+            for mode in modes:
+                model.set_view(store.visible(mode))
+                app.processEvents()
+
+        self.record(f"qt_refresh/{n}", measure(refresh, self.repeat) / len(modes))
+        model.set_view(store.visible("All"))
+
+        def toggle():
+            for pos in range(0, TOGGLES):
+                store.toggle(pos)
+                app.processEvents()
+
+        self.record(f"qt_toggle/{n}", measure(toggle, self.repeat) / TOGGLES)
+        view.close()
+        store.unsubscribe(model.on_store_change)
+
+    def run_tk(self, store, n):
+        try:
+            import tkinter as tk
+            from tklist import TaskListbox
+        except ImportError as e:
+            self.skipped["tk"] = str(e)
+            return
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            self.skipped["tk"] = f"no display ({e})"
+            return
+        listbox = tk.Listbox(root, height=20)
+        scrollbar = tk.Scrollbar(root)
+        listbox.pack(side="left")
+        scrollbar.pack(side="right", fill="y")
+        box = TaskListbox(listbox, scrollbar, store, store.visible())
+        modes = FILTERS + DUE_FILTERS
+
+        def refresh():
+            for mode in modes:
+                box.set_view(store.visible(mode))
+                root.update()
+
+        self.record(f"tk_refresh/{n}", measure(refresh, self.repeat) / len(modes))
+        box.set_view(store.visible("All"))
+
+        def toggle():
+            for pos in range(0, TOGGLES):
+                store.toggle(pos)
+            root.update()
+
+        self.record(f"tk_toggle/{n}", measure(toggle, self.repeat) / TOGGLES)
+        store.unsubscribe(box.on_store_change)
+        root.destroy()
+
+
+def start_virtual_display():
+    """Start Xvfb when Tk has no display to use; returns the process or None"""
+    if os.environ.get("DISPLAY") or shutil.which("Xvfb") is None:
+        return None
+    display = ":97"
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1024x768x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+def compare(results, baseline, threshold, noise_ms):
+    """Cases slower than threshold x their baseline median: [(name, old, new)]"""
+    worse = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new > old * threshold and new - old > noise_ms:
+            worse.append((name, old, new))
+    return worse
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.suite")
+    p.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                   help="comma separated task counts, e.g. 1000,1000000")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--gui", default="qt,tk", help="front ends to time: qt, tk, both or none")
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--baseline", help="earlier --out file to compare against")
+    p.add_argument("--threshold", type=float, default=1.3,
+                   help="slowdown ratio that counts as a regression")
+    p.add_argument("--noise-ms", type=float, default=1.0,
+                   help="ignore slowdowns smaller than this")
+    args = p.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    gui = {g for g in args.gui.split(",") if g in ("qt", "tk")}
+    xvfb = start_virtual_display() if "tk" in gui else None
+    try:
+        suite = Suite(sizes, args.repeat, gui)
+        results = suite.run()
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "skipped": suite.skipped,
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {args.out}")
+    for name, reason in suite.skipped.items():
+        print(f"Skipped {name}: {reason}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+        worse = compare(results, baseline, args.threshold, args.noise_ms)
+        for name, old, new in worse:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ms ({new / old:.2f}x)")
+        if worse:
+            return 1
+        print(f"No regressions against {args.baseline} (threshold {args.threshold}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
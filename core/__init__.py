@@ -0,0 +1,20 @@
+"""Shared task model and storage used by both front ends."""
+
+from .archive import Archive
+from .backends import open_backend
+from .due import DUE_FILTERS, DueIndex, DueView, format_due, parse_due
+from .index import FILTERS, FilterView, RankIndex, StatusIndex
+from .journal import Journal
+from .records import Task
+from .recurring import Recurring, Rule, describe_rule, parse_rule
+from .schedules import Schedules
+from .sorting import GROUPS, SORTS, SortedView
+from .store import TaskStore
+from .writer import BackgroundWriter
+
+__all__ = [
+    "Archive", "BackgroundWriter", "DUE_FILTERS", "DueIndex", "DueView", "FILTERS",
+    "FilterView", "GROUPS", "Journal", "RankIndex", "Recurring", "Rule", "SORTS",
+    "Schedules", "SortedView", "StatusIndex", "Task", "TaskStore", "describe_rule",
+    "format_due", "open_backend", "parse_due", "parse_rule",
+]
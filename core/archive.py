@@ -0,0 +1,142 @@
+import gzip
+import io
+import json
+import os
+from itertools import islice
+from pathlib import Path
+
+from .locking import signature
+from .records import Task
+from .search import matches, tokenize
+
+#done tasks finished longer ago than this (seconds) move to the archive
+ARCHIVE_AFTER = 30 * 24 * 3600
+#tasks per segment file before a new one is started
+SEGMENT_SIZE = 10_000
+#archived tasks handed out per page by the front ends
+PAGE_SIZE = 200
+
+
+class Archive:
+    """Finished tasks moved out of the schedule, in gzip'd JSON-lines segments.
+
+    Lives next to the schedule in schedule.json.archive/. Each archiving
+    run appends gzip members to the newest segment file, starting a new
+    one every SEGMENT_SIZE tasks, so nothing is ever rewritten. index.json
+    keeps the task count, id range and committed byte size of every
+    segment: count() and paging past whole segments never decompress
+    anything, and bytes a crash left after the committed size are ignored
+    and cut off by the next append.
+
+    Reading is lazy and newest first: iter_tasks() decompresses one segment
+    at a time, only when the caller gets that far. Writers hold the
+    schedule's FileLock (TaskStore does that), readers need no lock.
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        self.dir = path.with_name(path.name + ".archive")
+        self.index_path = self.dir / "index.json"
+        self._segments = []
+        self._sig = False
+        #(name, size, lines) of the segment read last, for paging through it
+        self._cached = None
+
+    #reading
+    def segments(self) -> list:
+        """[{"file", "count", "first", "last", "size"}], oldest first"""
+        sig = signature(self.index_path)
+        if sig != self._sig:
+            self._sig = sig
+            try:
+                self._segments = json.loads(self.index_path.read_text(encoding="utf-8"))["segments"]
+            except (OSError, ValueError, KeyError):
+                self._segments = []
+        return self._segments
+
+    def count(self) -> int:
+        return sum(seg["count"] for seg in self.segments())
+
+    def __len__(self):
+        return self.count()
+
+    def iter_tasks(self, query: str = "", skip: int = 0):
+        """Archived tasks, most recently archived first, optionally searched.
+
+        Without a query the first `skip` tasks are passed over using the
+        index counts, so only the segments that are actually shown get read.
+        """
+        words = tokenize(query)
+        for seg in reversed(self.segments()):
+            if not words and skip >= seg["count"]:
+                skip -= seg["count"]
+                continue
+            lines = self._read(seg)
+            if words:
+                for line in reversed(lines):
+                    d = json.loads(line)
+                    if matches(words, d["text"]):
+                        yield Task.from_dict(d)
+            else:
+                #only the lines that get shown are parsed
+                for line in islice(reversed(lines), skip, None):
+                    yield Task.from_dict(json.loads(line))
+                skip = 0
+
+    def page(self, offset: int = 0, limit: int = PAGE_SIZE, query: str = "") -> list:
+        if query:
+            return list(islice(self.iter_tasks(query), offset, offset + limit))
+        return list(islice(self.iter_tasks(skip=offset), limit))
+
+    def _read(self, seg) -> list:
+        #the JSON lines of one segment, up to its committed size
+        key = (seg["file"], seg["size"])
+        if self._cached is not None and self._cached[:2] == key:
+            return self._cached[2]
+        with open(self.dir / seg["file"], "rb") as f:
+            data = f.read(seg["size"])
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as gz:
+            lines = [line for line in gz.read().splitlines() if line.strip()]
+        self._cached = key + (lines,)
+        return lines
+
+    #writing (caller holds the schedule's lock)
+    def append(self, tasks: list) -> int:
+        """Add tasks at the newest end; returns how many were written"""
+        if not tasks:
+            return 0
+        self.dir.mkdir(exist_ok=True)
+        self._sig = False
+        segments = [dict(seg) for seg in self.segments()]
+        start = 0
+        while start < len(tasks):
+            if not segments or segments[-1]["count"] >= SEGMENT_SIZE:
+                segments.append({"file": f"seg-{len(segments) + 1:06d}.jsonl.gz", "count": 0,
+                                 "first": None, "last": None, "size": 0})
+            seg = segments[-1]
+            chunk = tasks[start:start + SEGMENT_SIZE - seg["count"]]
+            self._write_member(seg, chunk)
+            start += len(chunk)
+        #the segments are safely on disk before the index points at them
+        tmp = self.index_path.with_name("index.json.tmp")
+        tmp.write_text(json.dumps({"segments": segments}, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+        return len(tasks)
+
+    def _write_member(self, seg: dict, tasks: list):
+        lines = "".join(json.dumps(t.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for t in tasks)
+        member = gzip.compress(lines.encode("utf-8"), compresslevel=6)
+        path = self.dir / seg["file"]
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            #drop anything past the committed size (a run that crashed mid-write)
+            f.truncate(seg["size"])
+            f.seek(seg["size"])
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+        ids = [t.id for t in tasks]
+        seg["count"] += len(tasks)
+        seg["size"] += len(member)
+        seg["first"] = min(ids) if seg["first"] is None else min(seg["first"], min(ids))
+        seg["last"] = max(ids) if seg["last"] is None else max(seg["last"], max(ids))
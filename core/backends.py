@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from .journal import Journal
+
+#file suffixes that select the SQLite backend
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def open_backend(path):
+    """Pick a storage engine for a schedule file by its suffix.
+
+    Every backend offers the same small interface TaskStore relies on:
+    load(), apply(ops), needs_compaction(), begin_snapshot(),
+    write_snapshot(items, token) and close(), plus lock(), reserve_ids(),
+    poll() and caught_up() for sharing the file with other processes.
+    Backends that can query without loading everything (SQLite) also
+    offer count(mode), page(mode, offset, limit) for the status filters
+    and count_due(start, end), due_page(start, end, offset, limit) for
+    pending tasks by due time; TaskStore.count() and page() use them
+    when present.
+    """
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        #imported here so the JSON path never pays for sqlite3
+        from .sqlite_backend import SqliteBackend
+        return SqliteBackend(path)
+    return Journal(path)
@@ -0,0 +1,403 @@
+"""Non-interactive commands for scripting the schedule.
+
+    python -m core.cli add "gym 3pm" "call mom" "send weekly report 4pm"
+    python -m core.cli add --repeat "stretch daily 7am"
+    python -m core.cli upcoming --days 7
+    python -m core.cli rules --remove 3
+    python -m core.cli list --filter Active --format jsonl
+    python -m core.cli toggle 12 15
+    python -m core.cli remove - < ids.txt
+    python -m core.cli clear-done
+    python -m core.cli archive --days 7
+    python -m core.cli list --filter Done --archived --search dentist
+    python -m core.cli import tasks.csv --dedupe
+    python -m core.cli merge-duplicates
+    python -m core.cli export - --format csv > backup.csv
+    python -m core.cli --schedule work add "send report 4pm"
+    python -m core.cli schedules
+
+Tasks are addressed by id (the first column of `list`). Whatever a
+command changes is written as one batch: one journal append, or one
+SQLite transaction. add --repeat adds repeating rules instead of tasks;
+each text must say how often ("daily", "every mon, thu"). Without it
+every text is a task, whatever it says. Input is read and output written a line at a time,
+and mutating commands print a throughput line on stderr. --schedule
+picks a named schedule kept beside --file (schedule.work.json); the
+`schedules` command counts them all without loading any.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import chain, islice
+
+from . import stats
+from .due import DUE_FILTERS, format_due
+from .index import FILTERS
+from .recurring import HORIZON
+from .schedules import Schedules, format_counts
+
+FORMATS = ("csv", "jsonl", "text")
+#columns written by export and understood by import
+CSV_FIELDS = ("id", "text", "done", "due", "done_at")
+
+_TRUE = {"1", "true", "yes", "y", "x", "done"}
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    stats.setup_from_env()
+    if args.stats:
+        stats.enable()
+    schedules = Schedules(args.file, write_behind=False)
+    if args.run is cmd_schedules:
+        return cmd_schedules(schedules, args)
+    try:
+        store = schedules.open(args.schedule or schedules.main)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    try:
+        code = args.run(store, args)
+        if not store.flush():
+            print(f"Couldn't save {store.path.name}: {store.write_error}", file=sys.stderr)
+            return 1
+        return code
+    except BrokenPipeError:
+        #e.g. piped into head
+        return 0
+    finally:
+        schedules.close()
+        if args.stats:
+            stats.dump(sys.stderr)
+
+
+def _parser():
+    p = argparse.ArgumentParser(prog="python -m core.cli", description=__doc__.split("\n")[0])
+    p.add_argument("--file", default="schedule.json",
+                   help="schedule to work on (.json, or .db for SQLite)")
+    p.add_argument("--schedule", help="work on this named schedule next to --file instead")
+    p.add_argument("--stats", action="store_true", help="print timings and counters as JSON on stderr")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("add", help="add tasks, one per argument or per line of stdin with -")
+    c.add_argument("text", nargs="+")
+    c.add_argument("--repeat", action="store_true",
+                   help="add repeating tasks; each text says how often (\"gym daily 7am\")")
+    c.set_defaults(run=cmd_add)
+
+    for name, fn in (("remove", cmd_remove), ("toggle", cmd_toggle)):
+        c = sub.add_parser(name, help=f"{name} tasks by id (- reads ids from stdin)")
+        c.add_argument("ids", nargs="+")
+        c.set_defaults(run=fn)
+
+    c = sub.add_parser("clear-done", help="remove every finished task")
+    c.set_defaults(run=cmd_clear_done)
+
+    c = sub.add_parser("merge-duplicates", help="fold tasks with the same text into the oldest copy")
+    c.set_defaults(run=cmd_merge_duplicates)
+
+    c = sub.add_parser("archive", help="move finished tasks to the archive now")
+    c.add_argument("--days", type=float, default=None,
+                   help="finished at least this many days ago (default: the store's archive age)")
+    c.set_defaults(run=cmd_archive)
+
+    c = sub.add_parser("list", help="print tasks")
+    c.add_argument("--filter", default="All", choices=FILTERS + DUE_FILTERS)
+    c.add_argument("--search", default="")
+    c.add_argument("--limit", type=int, default=None)
+    c.add_argument("--archived", action="store_true",
+                   help="with All/Done, continue into archived tasks (newest first)")
+    c.add_argument("--format", default="text", choices=FORMATS)
+    c.set_defaults(run=cmd_list)
+
+    c = sub.add_parser("upcoming", help="print occurrences of repeating tasks, soonest first")
+    c.add_argument("--days", type=int, default=HORIZON, help=f"days from today to cover (default {HORIZON})")
+    c.add_argument("--limit", type=int, default=None)
+    c.set_defaults(run=cmd_upcoming)
+
+    c = sub.add_parser("rules", help="print the repeating tasks")
+    c.add_argument("--remove", type=int, nargs="+", default=(), metavar="ID",
+                   help="stop these repeating first")
+    c.set_defaults(run=cmd_rules)
+
+    c = sub.add_parser("import", help="add tasks from a CSV / JSON-lines / text file or -")
+    c.add_argument("source")
+    c.add_argument("--format", choices=FORMATS, help="default: from the file extension, jsonl for -")
+    c.add_argument("--dedupe", action="store_true",
+                   help="skip rows whose text is already on the schedule or earlier in the file")
+    c.set_defaults(run=cmd_import)
+
+    c = sub.add_parser("schedules", help="list every schedule with its counts, loading none")
+    c.set_defaults(run=cmd_schedules)
+
+    c = sub.add_parser("export", help="write every task to a file or - (stdout)")
+    c.add_argument("dest", nargs="?", default="-")
+    c.add_argument("--format", choices=FORMATS, help="default: from the file extension, jsonl for -")
+    c.set_defaults(run=cmd_export)
+    return p
+
+
+#commands
+def cmd_add(store, args):
+    start = time.perf_counter()
+    texts = (text.strip() for text in _args_or_stdin(args.text) if text.strip())
+    if not args.repeat:
+        new, _ = store.add_texts(texts)
+        _report("Added", len(new), start)
+        return 0
+    try:
+        _, rules = store.add_texts(texts, repeat=True)
+    except ValueError as e:
+        raise SystemExit(f"{e}; nothing was added")
+    for rule in rules:
+        print(f"Added repeating task {rule.id}: '{rule.text}' repeats {rule.describe()}", file=sys.stderr)
+    return 0
+
+
+def cmd_remove(store, args):
+    return _by_id(store, args.ids, store.remove_many, "Removed")
+
+
+def cmd_toggle(store, args):
+    #each task flips on its own, unlike the GUIs' "mark all done"
+    return _by_id(store, args.ids, lambda positions: [store.toggle(p) for p in positions], "Toggled")
+
+
+def cmd_clear_done(store, args):
+    start = time.perf_counter()
+    removed = store.clear_done()
+    _report("Removed", len(removed), start)
+    return 0
+
+
+def cmd_merge_duplicates(store, args):
+    start = time.perf_counter()
+    n = store.merge_duplicates()
+    _report("Merged away", n, start)
+    return 0
+
+
+def cmd_archive(store, args):
+    start = time.perf_counter()
+    n = store.archive_done(None if args.days is None else args.days * 86400)
+    _report("Archived", n, start)
+    return 0
+
+
+def cmd_list(store, args):
+    view = store.visible(args.filter, args.search)
+    tasks = store.tasks
+    rows = (tasks[pos] for pos in view.iter_from(0))
+    if args.archived and args.filter in ("All", "Done"):
+        rows = chain(rows, store.archive.iter_tasks(args.search))
+    _write_tasks(islice(rows, args.limit), sys.stdout, args.format)
+    return 0
+
+
+def cmd_upcoming(store, args):
+    for o in islice(store.recurring.upcoming(days=args.days), args.limit):
+        print(f"{o.rule.id}\t{format_due(o.due)}\t{o}")
+    return 0
+
+
+def cmd_rules(store, args):
+    missing = [id for id in args.remove if store.recurring.remove(id) is None]
+    if missing:
+        print(f"No repeating task with id: {', '.join(map(str, missing))}", file=sys.stderr)
+    for rule in store.recurring.rules():
+        print(f"{rule.id}\t{rule.describe()}\t{rule.text}")
+    return 1 if missing else 0
+
+
+def cmd_import(store, args):
+    fmt = args.format or _format_for(args.source)
+    start = time.perf_counter()
+    read = [0]
+
+    def counted(rows):
+        for row in rows:
+            read[0] += 1
+            yield row
+
+    with _open_in(args.source) as f:
+        new = store.add_records(counted(_read_rows(f, fmt)), dedupe=args.dedupe)
+    _report("Imported", len(new), start)
+    if args.dedupe and read[0] > len(new):
+        print(f"Skipped {read[0] - len(new)} duplicates", file=sys.stderr)
+    return 0
+
+
+def cmd_schedules(schedules, args):
+    for name, counts in schedules.summary():
+        print(f"{name}\t{format_counts(counts)}")
+    return 0
+
+
+def cmd_export(store, args):
+    fmt = args.format or _format_for(args.dest)
+    start = time.perf_counter()
+    with _open_out(args.dest) as f:
+        _write_tasks(iter(store.tasks), f, fmt)
+    if args.dest != "-":
+        _report("Exported", len(store.tasks), start)
+    return 0
+
+
+def _by_id(store, ids, action, verb):
+    start = time.perf_counter()
+    positions = set()
+    missing = []
+    for raw in _args_or_stdin(ids):
+        raw = raw.strip()
+        if not raw:
+            continue
+        pos = store.find(int(raw)) if raw.isdigit() else -1
+        if pos < 0:
+            missing.append(raw)
+            continue
+        positions.add(pos)
+    with store.batch():
+        action(sorted(positions))
+    if missing:
+        print(f"No task with id: {', '.join(missing)}", file=sys.stderr)
+    _report(verb, len(positions), start)
+    return 1 if missing else 0
+
+
+#input
+def _args_or_stdin(values):
+    for value in values:
+        if value == "-":
+            yield from sys.stdin
+        else:
+            yield value
+
+
+def _read_rows(f, fmt):
+    #a bad row stops the import with its line number, before anything is added
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row.get("text"):
+                yield _checked(reader.line_num, row)
+    elif fmt == "jsonl":
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"line {n}: {e}")
+            yield _checked(n, {"text": row} if isinstance(row, str) else row)
+    else:
+        for line in f:
+            if line.strip():
+                yield {"text": line.strip()}
+
+
+def _checked(n, raw) -> dict:
+    try:
+        return _row(raw)
+    except ValueError as e:
+        raise SystemExit(f"line {n}: {e}")
+
+
+def _row(raw) -> dict:
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected an object with \"text\", got {json.dumps(raw)}")
+    text = raw.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("missing \"text\"")
+    row = {"text": text}
+    done = raw.get("done")
+    if isinstance(done, str):
+        done = done.strip().lower() in _TRUE
+    if done:
+        row["done"] = True
+        #when it was finished, so a re-import doesn't restart its archive age
+        done_at = _timestamp(raw, "done_at")
+        if done_at is not None:
+            row["done_at"] = done_at
+    due = _timestamp(raw, "due")
+    if due is not None:
+        row["due"] = due
+    return row
+
+
+def _timestamp(raw, key):
+    #a unix time or an ISO date string; empty means none
+    value = raw.get(key)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return float(value) if value else None
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                raise ValueError(f"{key} {value!r} is neither a timestamp nor an ISO date") from None
+    if isinstance(value, bool) or not isinstance(value, (int, float, type(None))):
+        raise ValueError(f"{key} {json.dumps(value)} is neither a timestamp nor an ISO date")
+    return value
+
+
+#output
+def _write_tasks(tasks, f, fmt):
+    if fmt == "csv":
+        w = csv.writer(f)
+        w.writerow(CSV_FIELDS)
+        for t in tasks:
+            w.writerow((t.id, t.text, 1 if t.done else 0, _iso(t.due), _iso(t.done_at if t.done else None)))
+    elif fmt == "jsonl":
+        for t in tasks:
+            f.write(json.dumps(t.to_dict(), ensure_ascii=False) + "\n")
+    else:
+        for t in tasks:
+            f.write(f"{t.id}\t{t}\n")
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat(" ", "minutes") if ts is not None else ""
+
+
+def _report(verb, n, start):
+    elapsed = time.perf_counter() - start
+    rate = f" ({n / elapsed:,.0f}/s)" if elapsed > 0 and n else ""
+    print(f"{verb} {n} tasks in {elapsed:.2f}s{rate}", file=sys.stderr)
+
+
+def _format_for(path):
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith(".txt"):
+        return "text"
+    return "jsonl"
+
+
+class _Std:
+    #lets stdin/stdout go through the same `with` as a real file
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        if self.f is sys.stdout:
+            self.f.flush()
+
+
+def _open_in(path):
+    return _Std(sys.stdin) if path == "-" else open(path, newline="", encoding="utf-8")
+
+
+def _open_out(path):
+    return _Std(sys.stdout) if path == "-" else open(path, "w", newline="", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
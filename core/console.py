@@ -0,0 +1,435 @@
+"""The interactive console menu, shared by task.py and taskmanager.py.
+
+Only the standard library and core are imported here, so the console path
+starts without loading tkinter or PySide6.
+
+The schedule is shown a page at a time, and each page goes to the
+terminal as one write. After adding or removing tasks only a one-line
+summary is printed instead of the whole list.
+"""
+import shutil
+import sys
+import time
+from itertools import islice
+
+from . import stats
+from .due import DUE_FILTERS, day_bounds, format_due
+from .dupes import normalize
+from .index import FILTERS
+from .recurring import HORIZON, describe_rule, parse_rule
+from .schedules import format_counts
+
+#filters the schedule pager cycles through; "Archived" pages into the archive
+MODES = FILTERS + DUE_FILTERS + ("Archived",)
+HELP = ("Enter: next page, p: previous, g N: go to page N, f [name]: filter "
+        f"({'/'.join(MODES)}), s [words]: search, q: back to the menu")
+
+
+def get_setup_option():
+    while True:
+        try:
+            setup = int(input("Hello user, enter 1 if you need to set up your schedule, "
+                              "enter 2 if your schedule is already created: "))
+            if setup in (1, 2):
+                return setup
+            else:
+                print("Invalid input. Please enter 1 or 2.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+
+def setup_schedule(store):
+    try:
+        num_inputs = int(input("Enter the number of tasks you would like in your schedule: "))
+        new_tasks = []
+        repeating = []
+        for i in range(num_inputs):
+            task = input(f"Enter task {i + 1} and the time you want to complete it: ")
+            (repeating if _ask_repeat(task) else new_tasks).append(task)
+        store.add_texts(new_tasks)  #one journal record for the whole batch
+        _add_repeating(store, repeating)
+    except ValueError:
+        print("Invalid input. Please enter a number.")
+
+
+def get_user_choice():
+    while True:
+        try:
+            choice = int(input(
+                "Welcome back user. Enter 1 to view your current schedule, "
+                "2 to input new tasks, 3 to remove tasks, 4 to exit, "
+                "5 to see what's due, 6 to merge duplicate tasks, or 7 to switch schedules: "
+            ))
+            if 1 <= choice <= 7 or choice == 0:  #0: hidden stats dump
+                return choice
+            else:
+                print("Invalid choice. Please enter a number from 1 to 7.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+
+class SchedulePager:
+    """One filter and search of the schedule, shown a page at a time.
+
+    Rows are pulled from the store's lazy views, so showing page 2,000 of a
+    big schedule costs the same as page 1; without a search they come from
+    store.page(), which a .db schedule answers with one indexed query per
+    page. The numbers printed are rows of the current filter, and
+    remove_tasks() takes those same numbers.
+    """
+
+    def __init__(self, store, mode: str = "All", query: str = ""):
+        self.store = store
+        self.mode = mode
+        self.query = query
+        self.page = 0
+        self.rows = page_rows()
+        self._view = None
+        #number printed -> task id, for the page on screen
+        self.shown = {}
+
+    def total(self):
+        """Rows in the current filter, or None for a searched archive (unknown until read)"""
+        if self.mode == "Archived":
+            return None if self.query.strip() else self.store.archive.count()
+        if not self.query.strip():
+            return self.store.count(self.mode)
+        return len(self.view())
+
+    def pages(self):
+        total = self.total()
+        return None if total is None else max(1, -(-total // self.rows))
+
+    def view(self):
+        #search views only stay current while something listens, so rebuild per page
+        if self._view is None:
+            self._view = self.store.visible(self.mode, self.query)
+        return self._view
+
+    def set_filter(self, mode=None, query=None):
+        if mode is not None:
+            self.mode = mode
+        if query is not None:
+            self.query = query
+        self.page = 0
+
+    def render(self) -> str:
+        """The current page as one block of text"""
+        self._view = None
+        pages = self.pages()
+        if pages is not None:
+            self.page = max(0, min(self.page, pages - 1))
+        start = self.page * self.rows
+        tasks = self._tasks(start, self.rows)
+        if not tasks and self.page and pages is None:
+            #walked past the end of a searched archive
+            self.page -= 1
+            start -= self.rows
+            tasks = self._tasks(start, self.rows)
+        total = self.total()
+        title = f"{self.mode}" + (f", search '{self.query}'" if self.query.strip() else "")
+        if tasks:
+            where = f"{start + 1}-{start + len(tasks)}" + (f" of {total:,}" if total is not None else "")
+            page = f"page {self.page + 1}" + (f"/{pages}" if pages is not None else "")
+            lines = [f"\nSchedule ({title}): {where}, {page}"]
+        else:
+            lines = [f"\nSchedule ({title}): nothing to show."]
+        self.shown = {}
+        for number, task in enumerate(tasks, start=start + 1):
+            self.shown[number] = task.id
+            due = f"  (due {format_due(task.due)})" if task.due is not None and not task.done else ""
+            lines.append(f"{number}. {task}{due}")
+        return "\n".join(lines)
+
+    def show(self):
+        _write(self.render())
+
+    def browse(self):
+        """Page through the schedule until the user goes back to the menu"""
+        self.show()
+        while True:
+            cmd = input("[Enter] next, p prev, g N page, f filter, s search, ? help, q back: ").strip()
+            word, _, arg = cmd.partition(" ")
+            word = word.lower()
+            if word in ("q", "quit", "b", "back"):
+                return
+            if word in ("", "n", "next"):
+                self.page += 1
+            elif word in ("p", "prev"):
+                self.page = max(0, self.page - 1)
+            elif word in ("g", "go") or word.isdigit():
+                target = arg if word in ("g", "go") else word
+                if not target.strip().isdigit():
+                    print("Usage: g N (a page number)")
+                    continue
+                self.page = max(0, int(target) - 1)
+            elif word in ("f", "filter"):
+                mode = self._match_mode(arg)
+                if mode is None:
+                    print(f"Unknown filter '{arg}'. Choose from {', '.join(MODES)}.")
+                    continue
+                self.set_filter(mode=mode)
+            elif word in ("s", "search"):
+                self.set_filter(query=arg)
+            else:
+                print(HELP)
+                continue
+            self.show()
+
+    def position(self, number: int):
+        """Index in store.tasks of the task shown as `number`, or None"""
+        if self.mode == "Archived":
+            return None
+        id = self.shown.get(number)
+        if id is None:
+            #not on screen; go by the current filter
+            view = self.view()
+            if not 1 <= number <= len(view):
+                return None
+            return view[number - 1]
+        pos = self.store.find(id)
+        return pos if pos >= 0 else None
+
+    def _tasks(self, start, count) -> list:
+        if self.mode == "Archived":
+            return self.store.archive.page(start, count, self.query)
+        if not self.query.strip():
+            return self.store.page(self.mode, start, count)
+        tasks = self.store.tasks
+        return [tasks[pos] for pos in islice(self.view().iter_from(start), count)]
+
+    def _match_mode(self, arg):
+        arg = arg.strip().lower()
+        if not arg:
+            #no name: the next filter in the list
+            return MODES[(MODES.index(self.mode) + 1) % len(MODES)]
+        for mode in MODES:
+            if mode.lower().startswith(arg):
+                return mode
+        return None
+
+
+def page_rows() -> int:
+    #what fits in the terminal under the header and the prompt
+    return max(5, shutil.get_terminal_size((80, 24)).lines - 4)
+
+
+def summary(store) -> str:
+    """One line of counts for the whole schedule, read off the indexes"""
+    now = time.time()
+    start, end = day_bounds(now)
+    parts = [f"{len(store.tasks):,} tasks", f"{len(store.status.active):,} active",
+             f"{len(store.status.done):,} done"]
+    overdue = len(store.due.overdue(now))
+    today = len(store.due.between(max(start, now), end))
+    if overdue:
+        parts.append(f"{overdue:,} overdue")
+    if today:
+        parts.append(f"{today:,} due later today")
+    archived = store.archive.count()
+    if archived:
+        parts.append(f"{archived:,} archived")
+    rules = len(store.recurring)
+    if rules:
+        parts.append(f"{rules:,} repeating")
+    return ", ".join(parts)
+
+
+def view_schedule(store, pager=None):
+    if not store.tasks and not store.archive.count():
+        print("No schedule available.")
+        return
+    (pager or SchedulePager(store)).browse()
+
+
+def view_due(store):
+    #straight from the due index: overdue, rest of today, then what's coming up
+    sections = (("Overdue", "Overdue"), ("Due today", "Today"), ("Coming up", "Upcoming"))
+    shown = set()
+    lines = []
+    for title, mode in sections:
+        rows = [t for t in store.page(mode, 0, 10) if t.id not in shown]
+        if rows:
+            lines.append(f"\n{title}:")
+            for task in rows:
+                shown.add(task.id)
+                lines.append(f"  {format_due(task.due)}  {task}")
+    #repeating tasks, generated for the next few days only
+    coming = list(islice(store.recurring.upcoming(days=HORIZON), 10))
+    if coming:
+        lines.append("\nRepeating:")
+        for o in coming:
+            lines.append(f"  {format_due(o.due)}  {o}  ({o.rule.describe()})")
+    if not shown and not coming:
+        lines.append("Nothing with a due time. Add one like 'dentist tomorrow 9am' or 'gym daily 7am'.")
+    _write("\n".join(lines))
+
+
+def add_tasks(store):
+    try:
+        num_tasks = int(input("Enter the number of tasks you want to add: "))
+        new_tasks = []
+        repeating = []
+        entered = set()
+        for _ in range(num_tasks):
+            task = input(f"Enter task {len(store.tasks) + len(new_tasks) + 1} and the time you want to complete it: ")
+            if _ask_repeat(task):
+                repeating.append(task)
+                continue
+            if not _confirm_new(store, task, entered):
+                continue
+            entered.add(normalize(task))
+            new_tasks.append(task)
+        store.add_texts(new_tasks)
+        _add_repeating(store, repeating)
+    except ValueError:
+        print("Invalid input. Please enter a number.")
+
+
+def _ask_repeat(text: str) -> bool:
+    #only text that says how often it repeats is offered as a repeating task
+    how = parse_rule(text)
+    if how is None:
+        return False
+    answer = input(f"'{text}' reads like it repeats {describe_rule(how)}. Make it a repeating task? (y/n): ")
+    return answer.strip().lower().startswith("y")
+
+
+def _add_repeating(store, texts):
+    if not texts:
+        return
+    _, rules = store.add_texts(texts, repeat=True)
+    for rule in rules:
+        print(f"Added a repeating task: '{rule.text}' repeats {rule.describe()}.")
+
+
+def _confirm_new(store, text: str, entered: set) -> bool:
+    #True unless the task is already on the schedule and the user says to skip it
+    if normalize(text) in entered:
+        found = "you just entered it"
+    else:
+        dupes = store.duplicates(text)
+        if not dupes:
+            return True
+        first = dupes[0]
+        found = f"'{first.text}' is {'done' if first.done else 'on the schedule'}"
+    answer = input(f"Looks like a duplicate ({found}). Add it anyway? (y/n): ")
+    return answer.strip().lower().startswith("y")
+
+
+def merge_duplicates(store):
+    removed = store.merge_duplicates()
+    if removed:
+        print(f"Merged away {removed} duplicate task{'s' if removed != 1 else ''}.")
+    else:
+        print("No duplicate tasks.")
+
+
+def remove_tasks(store, pager=None):
+    if not store.tasks:
+        print("No tasks to remove.")
+        return
+    pager = pager or SchedulePager(store)
+    if pager.mode == "Archived":
+        pager.set_filter(mode="All")
+    pager.show()
+    raw = input("Enter the task number(s) to remove, as numbered above (e.g. 3, 3 5 8 or 3-7): ")
+    try:
+        numbers = _parse_numbers(raw)
+    except ValueError:
+        print("Please enter a valid number.")
+        return
+    positions = []
+    for number in numbers:
+        pos = pager.position(number)
+        if pos is None:
+            print(f"Invalid task number: {number}.")
+            return
+        positions.append(pos)
+    if not positions:
+        return
+    removed = store.remove_many(positions)
+    if len(removed) == 1:
+        print(f"Task '{removed[0].text}' removed successfully.")
+    else:
+        print(f"Removed {len(removed)} tasks.")
+
+
+def choose_schedule(schedules, current: str = None):
+    """List every schedule with its counts and open the one picked (loading it if new).
+
+    Returns (name, store).
+    """
+    current = current or schedules.main
+    while True:
+        rows = schedules.summary()
+        lines = [f"{'*' if name == current else ' '}{i:>3}. {name}: {format_counts(counts)}"
+                 for i, (name, counts) in enumerate(rows, 1)]
+        _write("\n".join(lines))
+        raw = input(f"Enter a number, or a new name to start a schedule (Enter keeps '{current}'): ").strip()
+        if not raw:
+            name = current
+        elif raw.isdigit() and 1 <= int(raw) <= len(rows):
+            name = rows[int(raw) - 1][0]
+        else:
+            name = raw
+        try:
+            return name, schedules.open(name)
+        except ValueError as e:
+            print(e)
+
+
+def _parse_numbers(raw: str) -> list:
+    numbers = []
+    for part in raw.replace(",", " ").split():
+        first, dash, last = part.partition("-")
+        if dash:
+            numbers.extend(range(int(first), int(last) + 1))
+        else:
+            numbers.append(int(part))
+    return numbers
+
+
+def _write(text: str):
+    #one write per screen instead of a print() per row
+    sys.stdout.write(text + "\n")
+    sys.stdout.flush()
+
+
+def main(schedules):
+    #opening loads it: snapshot + journal replay; old plain-list files load as-is
+    if len(schedules.names()) > 1:
+        name, store = choose_schedule(schedules)
+    else:
+        name, store = schedules.main, schedules.open(schedules.main)
+    setup = get_setup_option()
+    if setup == 1 and not store.tasks:
+        setup_schedule(store)
+
+    #keeps its filter, search and page between visits
+    pager = SchedulePager(store)
+    while True:
+        choice = get_user_choice()
+        store.sync()  #pick up anything a GUI saved meanwhile
+        if choice == 1:
+            view_schedule(store, pager)
+        elif choice == 2:
+            add_tasks(store)
+            print(summary(store))
+        elif choice == 3:
+            remove_tasks(store, pager)
+            print(summary(store))
+        elif choice == 4:
+            print("Goodbye!")
+            break
+        elif choice == 5:
+            view_due(store)
+        elif choice == 6:
+            merge_duplicates(store)
+            print(summary(store))
+        elif choice == 7:
+            name, store = choose_schedule(schedules, name)
+            pager = SchedulePager(store)
+            print(summary(store))
+        elif choice == 0:
+            stats.dump(extra={"writer": store.write_stats()})
@@ -0,0 +1,333 @@
+import re
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+#views backed by the due index, offered next to All/Active/Done
+DUE_FILTERS = ("Overdue", "Today", "Upcoming")
+#how many tasks the "Upcoming" view shows
+UPCOMING_LIMIT = 50
+#a due view change needing more row ops than this is shown as a reset
+DIFF_LIMIT = 64
+
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_US_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})\b")
+_AMPM = re.compile(r"\b(\d{1,2})(?::([0-5]\d))?\s*([ap])\.?m\.?\b")
+_CLOCK = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+#a time of day, as _AMPM/_CLOCK read it, for telling "fri 5pm" from "sat the exam"
+_TIME = r"(?:\d{1,2}(?::[0-5]\d)?\s*[ap]\.?m\.?|(?:[01]?\d|2[0-3]):[0-5]\d|noon|midnight)"
+_ABBR = r"(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)"
+#day words and full weekday names count anywhere; "sun" or "wed" alone is a
+#word, so an abbreviation needs "on"/"next" before it or a time beside it
+_DAY_WORD = re.compile(r"\b(today|tonight|tomorrow|tmrw|(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b"
+                       rf"|\b(?:on|next)\s+({_ABBR})\b"
+                       rf"|\b({_ABBR})\s+(?:at\s+)?{_TIME}"
+                       rf"|{_TIME}\s+(?:on\s+)?({_ABBR})\b")
+#a bare 3/14 is as likely a fraction; read it as a date next to "on"/"due"/"by" or with a time
+_DATE_WORD = re.compile(r"\b(?:on|due|by)\s+\d{1,2}/\d{1,2}\b")
+#something every pattern above needs; text without it (most of it) skips them all
+_HINT = re.compile(r"\d\s*[-:/ap]|noon|midnight|to(?:day|night|morrow)|tmrw|mon|tue|wed|thu|fri|sat|sun")
+
+
+def parse_due(text: str, now: float = None):
+    """Pull a due time out of free text like "gym 3pm" or "dentist tomorrow 9:30".
+
+    Understands 3pm / 3:30 pm / 15:30 / noon / midnight, today / tonight /
+    tomorrow / weekday names, and 2025-03-14 or 3/14 dates. Short day names
+    ("fri") only count after "on"/"next" or beside a time, and 3/14 only
+    with a time or after "on"/"due"/"by", so "buy sun cream" and "1/2 cup
+    sugar" stay undated. A time with no day means today; a day with no
+    time means the end of that day. Returns a unix timestamp, or None when
+    the text has no time in it.
+    """
+    s = text.lower()
+    if not _HINT.search(s):
+        return None
+    base = datetime.fromtimestamp(time.time() if now is None else now)
+    day = None
+
+    m = _ISO_DATE.search(s)
+    if m:
+        try:
+            day = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            day = None
+    clock = _clock(s)
+
+    if day is None:
+        m = _US_DATE.search(s)
+        if m and (clock is not None or _DATE_WORD.search(s)):
+            try:
+                day = datetime(base.year, int(m.group(1)), int(m.group(2)))
+                if day.date() < base.date() - timedelta(days=180):
+                    day = day.replace(year=base.year + 1)
+            except ValueError:
+                day = None
+
+    if day is None:
+        m = _DAY_WORD.search(s)
+        if m:
+            word = next(g for g in m.groups() if g)
+            today = base.replace(hour=0, minute=0, second=0, microsecond=0)
+            if word in ("today", "tonight"):
+                day = today
+                if word == "tonight" and clock is None:
+                    clock = (20, 0)
+            elif word in ("tomorrow", "tmrw"):
+                day = today + timedelta(days=1)
+            else:
+                target = _WEEKDAYS.index(word[:3])
+                day = today + timedelta(days=(target - today.weekday()) % 7)
+
+    if day is None and clock is None:
+        return None
+    if day is None:
+        day = base
+    hour, minute = clock if clock is not None else (23, 59)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+
+
+def parse_clock(text: str):
+    """(hour, minute) of a time of day in the text ("7am", "18:30", "noon"), or None"""
+    return _clock(text.lower())
+
+
+def _clock(s: str):
+    #s is lowercased
+    if "noon" in s:
+        return 12, 0
+    if "midnight" in s:
+        return 23, 59
+    m = _AMPM.search(s)
+    if m and 1 <= int(m.group(1)) <= 12:
+        return int(m.group(1)) % 12 + (12 if m.group(3) == "p" else 0), int(m.group(2) or 0)
+    m = _CLOCK.search(s)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    return None
+
+
+def day_bounds(now: float = None):
+    """Start and end timestamps of the local day containing `now`"""
+    base = datetime.fromtimestamp(time.time() if now is None else now)
+    start = base.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def due_window(mode: str, now: float = None) -> tuple:
+    """(start, end, limit) of the due times one of DUE_FILTERS shows; limit is None or a row cap"""
+    now = time.time() if now is None else now
+    if mode == "Overdue":
+        return float("-inf"), now, None
+    if mode == "Today":
+        return day_bounds(now) + (None,)
+    return now, float("inf"), UPCOMING_LIMIT
+
+
+def format_due(due: float) -> str:
+    return datetime.fromtimestamp(due).strftime("%a %d %b %H:%M")
+
+
+class DueIndex:
+    """Active tasks with a due time, sorted by (due, id).
+
+    Lookups are a bisect plus a slice, so "overdue", "due today" and
+    "what's next" cost O(log n + k) for k results.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def rebuild(self, tasks):
+        self.entries = sorted((t.due, t.id) for t in tasks if t.due is not None and not t.done)
+
+    def add(self, task):
+        if task.due is not None and not task.done:
+            insort(self.entries, (task.due, task.id))
+
+    def remove(self, task):
+        self._discard(task.due, task.done, task.id)
+
+    def changed(self, task, before: dict):
+        if "due" not in before and "done" not in before:
+            return
+        old_due = before.get("due", task.due)
+        old_done = before.get("done", task.done)
+        if old_due == task.due and old_done == task.done:
+            return
+        self._discard(old_due, old_done, task.id)
+        self.add(task)
+
+    def add_many(self, tasks):
+        new = [(t.due, t.id) for t in tasks if t.due is not None and not t.done]
+        if new:
+            #timsort merges the two sorted runs in about linear time
+            self.entries += new
+            self.entries.sort()
+
+    def remove_many(self, tasks):
+        gone = {t.id for t in tasks if t.due is not None and not t.done}
+        if gone:
+            self.entries = [e for e in self.entries if e[1] not in gone]
+
+    def changed_many(self, changes):
+        """changed() for a list of (task, before) pairs in one pass over the entries"""
+        gone = set()
+        new = []
+        for task, before in changes:
+            old_due = before.get("due", task.due)
+            old_done = before.get("done", task.done)
+            if old_due == task.due and old_done == task.done:
+                continue
+            if old_due is not None and not old_done:
+                gone.add(task.id)
+            if task.due is not None and not task.done:
+                new.append((task.due, task.id))
+        if gone:
+            self.entries = [e for e in self.entries if e[1] not in gone]
+        if new:
+            self.entries += new
+            self.entries.sort()
+
+    def between(self, start: float, end: float) -> list:
+        """Ids due in [start, end), soonest first"""
+        i = bisect_left(self.entries, (start,))
+        j = bisect_left(self.entries, (end,))
+        return [id for _, id in self.entries[i:j]]
+
+    def overdue(self, now: float = None) -> list:
+        now = time.time() if now is None else now
+        return [id for _, id in self.entries[:bisect_left(self.entries, (now,))]]
+
+    def upcoming(self, now: float = None, limit: int = UPCOMING_LIMIT) -> list:
+        now = time.time() if now is None else now
+        i = bisect_left(self.entries, (now,))
+        return [id for _, id in self.entries[i:i + limit]]
+
+    def window(self, mode: str, now: float = None) -> list:
+        """The (due, id) entries one of DUE_FILTERS shows, soonest first"""
+        start, end, limit = due_window(mode, now)
+        entries = self.entries
+        i = bisect_left(entries, (start,))
+        j = bisect_left(entries, (end,))
+        return entries[i:j if limit is None else min(j, i + limit)]
+
+    def next_due(self):
+        """(due, id) of the earliest pending task, or None"""
+        return self.entries[0] if self.entries else None
+
+    def _discard(self, due, done, id):
+        if due is None or done:
+            return
+        i = bisect_left(self.entries, (due, id))
+        if i < len(self.entries) and self.entries[i] == (due, id):
+            del self.entries[i]
+
+
+class DueView:
+    """A due-time filter ("Overdue", "Today", "Upcoming") shaped like FilterView.
+
+    Rows are ordered by due time. These views are short, so on a change
+    the window is taken again from the due index and compared with the old
+    one; both are sorted by (due, id), so one merge pass turns the
+    difference into single-row inserts and removes (an update for the task
+    that changed in place) and the list redraws just those rows.
+    """
+
+    grouped = False
+
+    def __init__(self, store, mode: str, query: str = ""):
+        from .search import matches, tokenize
+        self.store = store
+        self.mode = mode
+        self.words = tokenize(query)
+        self._matches = matches
+        self._seen = None
+        self._ops = []
+        self.entries = self._compute()
+        self.ids = [id for _, id in self.entries]
+
+    def _compute(self):
+        entries = self.store.due.window(self.mode)
+        if self.words:
+            tasks = self.store.tasks
+            find = self.store.find
+            entries = [e for e in entries if self._matches(self.words, tasks[find(e[1])].text)]
+        return entries
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> int:
+        return self.store.find(self.ids[row])
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, row: int):
+        find = self.store.find
+        for id in self.ids[row:]:
+            yield find(id)
+
+    def row_of(self, pos: int):
+        task = self.store.tasks[pos]
+        if task.due is not None:
+            row = bisect_left(self.entries, (task.due, task.id))
+            if row < len(self.entries) and self.entries[row][1] == task.id:
+                return row
+        #not yet re-read after a change to its due time
+        try:
+            return self.ids.index(task.id)
+        except ValueError:
+            return None
+
+    def row_changes(self, kind, pos, task, before):
+        if self._seen != self.store.change_seq:
+            self._seen = self.store.change_seq
+            old = self.entries
+            self.entries = self._compute()
+            self.ids = [id for _, id in self.entries]
+            if kind == "reset":
+                self._ops = [("reset", 0, 0)]
+            else:
+                changed = task.id if kind == "update" else None
+                self._ops = _diff(old, self.entries, changed)
+        return self._ops
+
+
+def _diff(old: list, new: list, changed=None) -> list:
+    """Row ops turning sorted `old` into sorted `new`, applied in order.
+
+    Runs of inserts or removes at one spot are merged into one op; past
+    DIFF_LIMIT ops a reset is cheaper for the list than replaying them.
+    """
+    ops = []
+    i = j = row = 0
+    while i < len(old) or j < len(new):
+        if j == len(new) or (i < len(old) and old[i] < new[j]):
+            if ops and ops[-1][0] == "remove" and ops[-1][1] == row:
+                ops[-1] = ("remove", row, ops[-1][2] + 1)
+            else:
+                ops.append(("remove", row, 1))
+            i += 1
+        elif i == len(old) or new[j] < old[i]:
+            if ops and ops[-1][0] == "insert" and ops[-1][1] + ops[-1][2] == row:
+                ops[-1] = ("insert", ops[-1][1], ops[-1][2] + 1)
+            else:
+                ops.append(("insert", row, 1))
+            j += 1
+            row += 1
+        else:
+            if new[j][1] == changed:
+                ops.append(("update", row, 1))
+            i += 1
+            j += 1
+            row += 1
+        if len(ops) > DIFF_LIMIT:
+            return [("reset", 0, 0)]
+    return ops
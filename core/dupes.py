@@ -0,0 +1,91 @@
+import re
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """The part of a task's text two tasks must share to count as the same.
+
+    Case, Unicode width forms, spacing and punctuation are ignored, so
+    "Buy  milk!" and "buy milk" are one task.
+    """
+    return " ".join(_WORD.findall(unicodedata.normalize("NFKC", text).casefold()))
+
+
+class DuplicateIndex:
+    """Task ids bucketed by the hash of their normalized text.
+
+    Looking up whether a text is already on the schedule is one dict
+    probe plus a check of the few tasks in that bucket, instead of a scan.
+    Only hashes are kept, not the normalized strings, so the index costs a
+    dict entry per distinct text. TaskStore builds it on first use and
+    keeps it current on add, edit and remove from then on.
+    """
+
+    def __init__(self):
+        #hash -> id, or a set of ids once a second task lands in the bucket
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def rebuild(self, tasks):
+        self.buckets = {}
+        for t in tasks:
+            self._add(hash(normalize(t.text)), t.id)
+
+    def add(self, task):
+        self._add(hash(normalize(task.text)), task.id)
+
+    def remove(self, task):
+        self._remove(hash(normalize(task.text)), task.id)
+
+    def changed(self, task, before: dict):
+        old_text = before.get("text", task.text)
+        if old_text != task.text:
+            self._remove(hash(normalize(old_text)), task.id)
+            self.add(task)
+
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    def remove_many(self, tasks):
+        for task in tasks:
+            self.remove(task)
+
+    def changed_many(self, changes):
+        for task, before in changes:
+            self.changed(task, before)
+
+    def candidates(self, key: str) -> set:
+        """Ids whose normalized text hashes like `key` (callers compare the texts)"""
+        ids = self.buckets.get(hash(key))
+        if ids is None:
+            return set()
+        return ids if isinstance(ids, set) else {ids}
+
+    def crowded(self):
+        """Every bucket holding more than one task, as sets of ids"""
+        return (ids for ids in self.buckets.values() if isinstance(ids, set))
+
+    def _add(self, h, id):
+        ids = self.buckets.get(h)
+        if ids is None:
+            self.buckets[h] = id
+        elif isinstance(ids, set):
+            ids.add(id)
+        elif ids != id:
+            self.buckets[h] = {ids, id}
+
+    def _remove(self, h, id):
+        ids = self.buckets.get(h)
+        if ids is None:
+            return
+        if isinstance(ids, set):
+            ids.discard(id)
+            if len(ids) == 1:
+                self.buckets[h] = next(iter(ids))
+        elif ids == id:
+            del self.buckets[h]
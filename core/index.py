@@ -0,0 +1,372 @@
+from bisect import bisect_left, insort
+
+from .search import matches, tokenize
+
+#filter modes offered by both front ends
+FILTERS = ("All", "Active", "Done")
+
+
+class RankIndex:
+    """Ordered set of task ids backed by a Fenwick tree.
+
+    add/discard/rank/select are all O(log n), so a filter row can be turned
+    into a task id (select) and back (rank) without scanning the list.
+    Iteration walks a flag array with bytearray.find, which stays fast even
+    when the set is sparse.
+    """
+
+    def __init__(self):
+        self._cap = 0
+        self._tree = [0]
+        self._present = bytearray()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, id: int):
+        return 0 <= id < self._cap and self._present[id] == 1
+
+    def clear(self):
+        self.__init__()
+
+    def build(self, ids):
+        """Replace the contents in O(n + max id)"""
+        ids = list(ids)
+        self._cap = 0
+        self._present = bytearray()
+        self._count = 0
+        self._resize(max(ids) + 1 if ids else 0)
+        for id in ids:
+            if not self._present[id]:
+                self._present[id] = 1
+                self._count += 1
+        self._rebuild_tree()
+
+    def add(self, id: int):
+        if id >= self._cap:
+            self._resize(id + 1)
+        if self._present[id]:
+            return
+        self._present[id] = 1
+        self._count += 1
+        self._bump(id, 1)
+
+    def discard(self, id: int):
+        if id in self:
+            self._present[id] = 0
+            self._count -= 1
+            self._bump(id, -1)
+
+    def discard_many(self, ids):
+        ids = {id for id in ids if id in self}
+        if len(ids) * 8 < self._cap:
+            for id in ids:
+                self.discard(id)
+            return
+        #past ~1/8 of the range one O(cap) rebuild beats a tree walk per id
+        for id in ids:
+            self._present[id] = 0
+        self._count -= len(ids)
+        self._rebuild_tree()
+
+    def rank(self, id: int) -> int:
+        """How many members are smaller than id"""
+        i = min(id, self._cap)
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def select(self, k: int) -> int:
+        """The k-th smallest member (0-based)"""
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError("rank index out of range")
+        pos = 0
+        step = 1 << (self._cap.bit_length() - 1) if self._cap else 0
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt <= self._cap and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos
+
+    def iter_from(self, k: int = 0):
+        """Members in order, starting at the k-th"""
+        if k >= self._count:
+            return
+        present = self._present
+        id = self.select(k)
+        while id >= 0:
+            yield id
+            id = present.find(1, id + 1)
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def _bump(self, id: int, delta: int):
+        i = id + 1
+        tree = self._tree
+        while i <= self._cap:
+            tree[i] += delta
+            i += i & -i
+
+    def _resize(self, need: int):
+        cap = max(16, self._cap)
+        while cap < need:
+            cap *= 2
+        self._present.extend(bytes(cap - self._cap))
+        self._cap = cap
+        self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        #O(cap) bottom-up build
+        cap = self._cap
+        tree = [0] * (cap + 1)
+        present = self._present
+        for i in range(1, cap + 1):
+            tree[i] += present[i - 1]
+            parent = i + (i & -i)
+            if parent <= cap:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class StatusIndex:
+    """Active and done task ids, kept up to date by TaskStore."""
+
+    def __init__(self):
+        self.active = RankIndex()
+        self.done = RankIndex()
+
+    def rebuild(self, tasks):
+        self.active.build(t.id for t in tasks if not t.done)
+        self.done.build(t.id for t in tasks if t.done)
+
+    def add(self, task):
+        (self.done if task.done else self.active).add(task.id)
+
+    def remove(self, task):
+        (self.done if task.done else self.active).discard(task.id)
+
+    def changed(self, task, before: dict):
+        if "done" in before and before["done"] != task.done:
+            self.set_done(task.id, task.done)
+
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    def remove_many(self, tasks):
+        self.active.discard_many(t.id for t in tasks if not t.done)
+        self.done.discard_many(t.id for t in tasks if t.done)
+
+    def changed_many(self, changes):
+        for task, before in changes:
+            self.changed(task, before)
+
+    def set_done(self, task_id: int, done: bool):
+        if done:
+            self.active.discard(task_id)
+            self.done.add(task_id)
+        else:
+            self.done.discard(task_id)
+            self.active.add(task_id)
+
+    def members(self, mode: str):
+        """The RankIndex behind a filter mode, or None for "All" """
+        if mode == "Active":
+            return self.active
+        if mode == "Done":
+            return self.done
+        return None
+
+    def check(self, tasks) -> bool:
+        """Compare against a full scan of tasks; for debugging and benchmarks"""
+        want_active = [t.id for t in tasks if not t.done]
+        want_done = [t.id for t in tasks if t.done]
+        return (list(self.active) == want_active and list(self.done) == want_done
+                and len(self.active) == len(want_active) and len(self.done) == len(want_done))
+
+
+class IdList:
+    """Sorted ids with the RankIndex interface, for small result sets"""
+
+    def __init__(self, ids=()):
+        self._ids = sorted(ids)
+        self._set = set(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id):
+        return id in self._set
+
+    def add(self, id):
+        if id not in self._set:
+            self._set.add(id)
+            insort(self._ids, id)
+
+    def discard(self, id):
+        if id in self._set:
+            self._set.discard(id)
+            del self._ids[bisect_left(self._ids, id)]
+
+    def rank(self, id):
+        return bisect_left(self._ids, id)
+
+    def select(self, k):
+        return self._ids[k]
+
+    def iter_from(self, k=0):
+        return iter(self._ids[k:])
+
+    def __iter__(self):
+        return iter(self._ids)
+
+
+class FilterView:
+    """Rows of one filter mode, mapped lazily onto positions in store.tasks.
+
+    Stands in for the old `visible_indices` list: len(), view[row] and
+    row_of(pos) cost O(log n) instead of a rescan of every task.
+
+    With a search `query` the rows are the matching ids from the store's
+    SearchIndex, narrowed to the status filter. The view then keeps its own
+    membership current as tasks change.
+    """
+
+    #rows are in id order; a SortedView groups them
+    grouped = False
+
+    def __init__(self, store, mode: str = "All", query: str = ""):
+        self.store = store
+        self.mode = mode
+        self.words = tokenize(query)
+        self._seen = None
+        self._ops = []
+        if self.words:
+            self.members = IdList(self._search())
+        else:
+            self.members = store.status.members(mode)
+
+    def _search(self):
+        ids = self.store.search_index().query(" ".join(self.words))
+        status = self.store.status.members(self.mode)
+        if status is None:
+            return ids
+        return [id for id in ids if id in status]
+
+    def __len__(self):
+        if self.members is None:
+            return len(self.store.tasks)
+        return len(self.members)
+
+    def __getitem__(self, row: int) -> int:
+        """Position in store.tasks of the task shown on this row"""
+        if self.members is None:
+            if not -len(self.store.tasks) <= row < len(self.store.tasks):
+                raise IndexError("row out of range")
+            return row % len(self.store.tasks)
+        return self.store.find(self.members.select(row))
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, row: int):
+        """Task positions from `row` onwards"""
+        if self.members is None:
+            yield from range(row, len(self.store.tasks))
+            return
+        find = self.store.find
+        for id in self.members.iter_from(row):
+            yield find(id)
+
+    def shows(self, done: bool) -> bool:
+        """Would a task with this status be in the view"""
+        return self.mode not in ("Active", "Done") or (self.mode == "Done") == done
+
+    def accepts(self, task) -> bool:
+        """Would this task be in the view"""
+        return self.shows(task.done) and (not self.words or matches(self.words, task.text))
+
+    def row_changes(self, kind, pos, task, before):
+        """Turn a TaskStore notification into row operations on this view.
+
+        Returns a list of (op, row, count) with op "insert", "remove",
+        "update" or "reset", already in this view's row numbers, so list
+        widgets can apply just that change. Several widgets may share one
+        view, so the answer is computed once per store change.
+        """
+        if self._seen != self.store.change_seq:
+            self._seen = self.store.change_seq
+            if self.words:
+                self._ops = self._search_changes(kind, pos, task, before)
+            else:
+                self._ops = self._status_changes(kind, pos, task, before)
+        return self._ops
+
+    def _search_changes(self, kind, pos, task, before):
+        #search views own their membership, so update it here
+        members = self.members
+        if kind == "reset":
+            self.members = IdList(self._search())
+            return [("reset", 0, 0)]
+        if kind == "extend":
+            new = [t.id for t in task if self.accepts(t)]
+            for id in new:
+                members.add(id)
+            return [("insert", len(members) - len(new), len(new))] if new else []
+        was = task.id in members
+        now = kind != "remove" and self.accepts(task)
+        if was and not now:
+            row = members.rank(task.id)
+            members.discard(task.id)
+            return [("remove", row, 1)]
+        if now and not was:
+            members.add(task.id)
+            return [("insert", members.rank(task.id), 1)]
+        if was and now:
+            return [("update", members.rank(task.id), 1)]
+        return []
+
+    def _status_changes(self, kind, pos, task, before):
+        if kind == "reset":
+            return [("reset", 0, 0)]
+        if kind == "extend":
+            #new tasks have the biggest ids, so they land at the end of any filter
+            count = sum(1 for t in task if self.shows(t.done))
+            return [("insert", len(self) - count, count)] if count else []
+        if kind == "insert":
+            row = self.row_of(pos)
+            return [] if row is None else [("insert", row, 1)]
+        if kind == "remove":
+            if not self.shows(task.done):
+                return []
+            row = pos if self.members is None else self.members.rank(task.id)
+            return [("remove", row, 1)]
+        if kind == "update":
+            was_shown = self.shows(before.get("done", task.done))
+            row = self.row_of(pos)
+            if was_shown and row is None:
+                return [("remove", self.members.rank(task.id), 1)]
+            if not was_shown and row is not None:
+                return [("insert", row, 1)]
+            if row is not None:
+                return [("update", row, 1)]
+        return []
+
+    def row_of(self, pos: int):
+        """Row a task position is shown on, or None if it's filtered out"""
+        task = self.store.tasks[pos]
+        if self.members is None:
+            return pos
+        if task.id not in self.members:
+            return None
+        return self.members.rank(task.id)
@@ -0,0 +1,328 @@
+import json
+import logging
+import os
+from bisect import bisect_left
+from pathlib import Path
+
+from . import stats
+from .locking import FileLock, signature
+
+log = logging.getLogger(__name__)
+
+#bump when the snapshot layout changes
+SNAPSHOT_VERSION = 2
+
+#journal size (bytes) after which it gets folded back into the snapshot
+COMPACT_THRESHOLD = 256 * 1024
+
+
+class Journal:
+    """Snapshot file plus an append-only log of changes made since it.
+
+    The snapshot is the usual schedule.json. Every mutation after it is one
+    JSON line in schedule.json.journal, so saving a change costs one small
+    write instead of re-serializing the whole list. Loading replays the
+    journal on top of the snapshot. Once the journal passes `threshold`
+    bytes it is compacted into a fresh snapshot on a background thread.
+
+    Several processes can share one schedule. Writes, compaction and
+    loading happen under the FileLock in schedule.json.lock. Before
+    appending, a process reads whatever the others appended since it last
+    looked and keeps those records for poll(). If the snapshot or journal
+    was replaced under it (another process compacted), poll() hands back a
+    full reload for the store to diff instead.
+    """
+
+    def __init__(self, path, threshold: int = COMPACT_THRESHOLD):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + ".journal")
+        self.old_path = self.path.with_name(self.path.name + ".journal.old")
+        self.threshold = threshold
+        self.gen = 0
+        self._size = 0
+        self._lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        #how far we've read the journal, and which files we read it from
+        self._read_pos = 0
+        self._read_sig = None
+        self._snap_sig = None
+        #records other processes wrote that poll() hasn't handed out yet
+        self._inbox = []
+        #the files changed in a way tailing can't follow; reload on poll()
+        self._stale = False
+
+    def lock(self) -> FileLock:
+        """Backend interface: the cross-process lock for this schedule"""
+        return self._lock
+
+    def reserve_ids(self, n: int, floor: int) -> int:
+        return self._lock.take_ids(n, floor)
+
+    #loading
+    def load(self) -> list:
+        with self._lock:
+            items = []
+            self.gen = 0
+            if self.path.exists():
+                try:
+                    data = json.loads(self.path.read_text(encoding="utf-8"))
+                    if isinstance(data, list):
+                        #pre-journal schedule.json: a bare list of tasks
+                        items = data
+                    elif isinstance(data, dict) and isinstance(data.get("tasks"), list):
+                        items = data["tasks"]
+                        self.gen = int(data.get("gen", 0))
+                except Exception:
+                    print(f"Warning: Couldn't read {self.path.name}; starting with an empty schedule.")
+                    items = []
+            self._snap_sig = signature(self.path)
+            self._inbox = []
+            self._stale = False
+
+            #a leftover .old journal means a process stopped mid-compaction
+            self._replay(self.old_path, items)
+            self._read_pos = self._replay(self.log_path, items)
+            if self.log_path.exists() and self.log_path.stat().st_size > self._read_pos:
+                #a write cut short by a crash; drop it, or the next record
+                #would be appended onto the end of it and be lost too
+                os.truncate(self.log_path, self._read_pos)
+            self._read_sig = signature(self.log_path)
+            self._size = self._read_pos
+            if self.old_path.exists():
+                #finish the interrupted compaction before anything else rotates
+                self.snapshot(items)
+            return items
+
+    def _replay(self, log: Path, items: list) -> int:
+        #returns the offset after the last complete line
+        if not log.exists():
+            return 0
+        lines, end = _read_lines(log, 0)
+        if not lines:
+            return end
+        try:
+            gen = int(json.loads(lines[0]).get("gen", 0))
+        except Exception:
+            return end
+        if gen < self.gen:
+            #already folded into the snapshot
+            return end
+        self.gen = gen
+        for line in lines[1:]:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                #damaged line; everything before it is good
+                break
+            apply_record(items, rec)
+        return end
+
+    def poll(self):
+        """Backend interface: what other processes saved since we last looked.
+
+        Returns None, ("records", [journal records]) or ("reload", items).
+        """
+        with self._lock:
+            self._catch_up()
+            if self._stale:
+                return "reload", self.load()
+            if self._inbox:
+                recs, self._inbox = self._inbox, []
+                return "records", recs
+        return None
+
+    def caught_up(self) -> bool:
+        """True when memory matches disk, so a snapshot of it loses nothing"""
+        return not self._stale and not self._inbox
+
+    def _catch_up(self):
+        #caller holds the lock
+        if self._stale:
+            return
+        if signature(self.path) != self._snap_sig:
+            self._stale = True
+            return
+        sig = signature(self.log_path)
+        if sig == self._read_sig:
+            return
+        if sig is None or self._read_sig is None or sig[0] != self._read_sig[0] or sig[1] < self._read_pos:
+            #journal rotated or replaced
+            self._stale = True
+            return
+        lines, self._read_pos = _read_lines(self.log_path, self._read_pos)
+        self._read_sig = signature(self.log_path)
+        for line in lines:
+            try:
+                self._inbox.append(json.loads(line))
+            except ValueError:
+                break
+
+    #writing
+    def append(self, op: str, **fields):
+        rec = {"op": op}
+        rec.update(fields)
+        self.write_lines([json.dumps(rec, ensure_ascii=False, separators=(",", ":"))])
+
+    def write_lines(self, lines):
+        """Append already-encoded records in a single write"""
+        if not lines:
+            return 0
+        data = "\n".join(lines) + "\n"
+        with self._lock:
+            self._catch_up()
+            with self.log_path.open("a", encoding="utf-8", newline="\n") as f:
+                if f.tell() == 0:
+                    f.write(json.dumps({"gen": self.gen}) + "\n")
+                f.write(data)
+                f.flush()
+                self._size = f.tell()
+            if not self._stale:
+                #we were at the end before writing, so we still are
+                self._read_pos = self._size
+                self._read_sig = signature(self.log_path)
+        if stats.enabled:
+            stats.count("journal_records", len(lines))
+            stats.count("bytes_written", len(data.encode("utf-8")))
+        return len(data)
+
+    def apply(self, ops: list):
+        """Backend interface: append a batch of records in one write"""
+        if not ops:
+            return 0
+        with self._lock:
+            self._catch_up()
+            self._shadow(ops)
+            return self.write_lines([json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+                                     for rec in ops])
+
+    def _shadow(self, ops: list):
+        #records still in the inbox come before `ops` in the journal, so
+        #where both set a field ours wins on replay; drop theirs to match
+        if not self._inbox:
+            return
+        written = {}
+        for rec in ops:
+            if rec.get("op") == "upd":
+                written.setdefault(rec["id"], set()).update(rec["f"])
+        for rec in self._inbox:
+            fields = written.get(rec.get("id")) if rec.get("op") == "upd" else None
+            if fields:
+                rec["f"] = {k: v for k, v in rec["f"].items() if k not in fields}
+
+    def needs_compaction(self) -> bool:
+        return self._size >= self.threshold
+
+    def rotate(self) -> int:
+        """Start a new journal generation and return its number.
+
+        The current journal is kept as .journal.old until a snapshot for the
+        new generation has been written, so a crash in between loses nothing.
+        """
+        with self._lock:
+            if self.log_path.exists():
+                os.replace(self.log_path, self.old_path)
+            self.gen += 1
+            header = json.dumps({"gen": self.gen}) + "\n"
+            with self.log_path.open("w", encoding="utf-8", newline="\n") as f:
+                f.write(header)
+            self._size = 0
+            if not self._stale:
+                self._read_pos = len(header)
+                self._read_sig = signature(self.log_path)
+            return self.gen
+
+    def begin_snapshot(self) -> int:
+        """Backend interface: called with the store locked, before copying"""
+        return self.rotate()
+
+    def snapshot(self, items: list):
+        """Write a full snapshot now and start an empty journal"""
+        with self._lock:
+            gen = self.rotate()
+            self.write_snapshot(list(items), gen)
+
+    def write_snapshot(self, items: list, gen: int):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        data = {"version": SNAPSHOT_VERSION, "gen": gen, "tasks": items}
+        with self._lock:
+            try:
+                text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+                tmp.write_text(text, encoding="utf-8")
+                os.replace(tmp, self.path)
+                if not self._stale:
+                    self._snap_sig = signature(self.path)
+                if self.old_path.exists():
+                    self.old_path.unlink()
+                if stats.enabled:
+                    stats.count("snapshots")
+                    stats.count("bytes_written", len(text.encode("utf-8")))
+            except Exception as e:
+                log.error("Error saving tasks: %s", e)
+
+    def close(self):
+        self._lock.close()
+
+
+def _read_lines(path: Path, start: int):
+    #complete lines from byte offset `start`, and the offset after them
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    return data[:end].decode("utf-8").splitlines(), start + end
+
+
+def _find(items: list, id: int) -> int:
+    #items are kept sorted by id
+    i = bisect_left(items, id, key=lambda d: d["id"])
+    if i < len(items) and items[i]["id"] == id:
+        return i
+    return -1
+
+
+def apply_record(items: list, rec: dict):
+    """Replay one journal record against the loaded list of task dicts"""
+    op = rec.get("op")
+    if "v" in rec or "i" in rec:
+        _apply_legacy(items, op, rec)
+    elif op == "add":
+        t = rec["t"]
+        if not items or items[-1]["id"] < t["id"]:
+            items.append(t)
+        else:
+            items.insert(bisect_left(items, t["id"], key=lambda d: d["id"]), t)
+    elif op == "ext":
+        new = rec["t"]
+        if not new:
+            return
+        if not items or items[-1]["id"] < new[0]["id"]:
+            items.extend(new)
+        else:
+            #another process's tasks got higher ids first; the run still goes in as a block
+            i = bisect_left(items, new[0]["id"], key=lambda d: d["id"])
+            items[i:i] = new
+    elif op == "upd":
+        i = _find(items, rec["id"])
+        if i >= 0:
+            items[i].update(rec["f"])
+    elif op == "del":
+        i = _find(items, rec["id"])
+        if i >= 0:
+            del items[i]
+    elif op == "dels":
+        #a bulk remove: one pass over the list instead of a search per id
+        gone = set(rec["ids"])
+        items[:] = [d for d in items if d["id"] not in gone]
+
+
+def _apply_legacy(items: list, op: str, rec: dict):
+    #index-based records written before tasks had ids
+    if op == "add":
+        items.append(rec["v"])
+    elif op == "ext":
+        items.extend(rec["v"])
+    elif op == "set":
+        items[rec["i"]] = rec["v"]
+    elif op == "ins":
+        items.insert(rec["i"], rec["v"])
+    elif op == "del":
+        del items[rec["i"]]
@@ -0,0 +1,81 @@
+import threading
+
+from . import stats
+from .records import decode_tasks
+
+#tasks handed to the views per step()
+BATCH_SIZE = 2000
+
+
+class Loader:
+    """Loads a store in the background so a window can show up first.
+
+    Reading and decoding the file happens on a worker thread. Once that is
+    done the GUI calls step() from its event loop (root.after / QTimer);
+    each call installs one batch of tasks into the store, which the list
+    views pick up as an "extend" notification.
+    """
+
+    def __init__(self, store, batch_size: int = BATCH_SIZE):
+        self.store = store
+        self.batch_size = batch_size
+        self.items = None
+        self.migrated = False
+        self.installed = 0
+        self.finished = False
+        self._prepared = False
+        self._thread = threading.Thread(target=self._parse, name="task-loader", daemon=True)
+        self._thread.start()
+
+    @property
+    def total(self):
+        return len(self.items) if self.items is not None else 0
+
+    def ready(self) -> bool:
+        """True once parsing is done and batches can be installed"""
+        return not self._thread.is_alive()
+
+    def wait(self):
+        """Block until parsing is done (the store calls this before adding)"""
+        self._thread.join()
+        self._prepare()
+
+    @stats.timed("load_batch")
+    def step(self) -> bool:
+        """Install the next batch; returns True when everything is in"""
+        if self.finished:
+            return True
+        if not self.ready():
+            return False
+        self._prepare()
+        batch = self.items[self.installed:self.installed + self.batch_size]
+        self.store._install(batch)
+        self.installed += len(batch)
+        if self.installed >= len(self.items):
+            self.finished = True
+            self.items = None
+            self.store._load_finished(self)
+        return self.finished
+
+    def finish(self):
+        """Install whatever is left in one go"""
+        self.wait()
+        while not self.step():
+            pass
+
+    def progress(self):
+        return self.installed, self.total
+
+    def _parse(self):
+        try:
+            raw = self.store.backend.load()
+            self.items, self.migrated = decode_tasks(raw)
+        except Exception as e:
+            print(f"Warning: Couldn't read {self.store.path.name}: {e}")
+            self.items, self.migrated = [], False
+
+    def _prepare(self):
+        if not self._prepared:
+            self._prepared = True
+            if self.items:
+                self.store._reserve_ids(self.items[-1].id)
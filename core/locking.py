@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    #Windows
+    fcntl = None
+    import msvcrt
+
+#how often a blocking acquire retries on Windows, where there's no waiting lock call
+_RETRY = 0.02
+
+
+class FileLock:
+    """Advisory lock shared by every process that opens the same schedule.
+
+    It lives in a small sidecar file (schedule.json.lock), which also holds
+    the next free task id so two processes never hand out the same one.
+    The lock is re-entrant within a process, and threads of one process
+    exclude each other like with an RLock.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._rlock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                locked = self._lock_file(blocking)
+            except BaseException:
+                self._rlock.release()
+                raise
+            if not locked:
+                self._rlock.release()
+                return False
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._rlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def take_ids(self, n: int, floor: int) -> int:
+        """Reserve n consecutive ids, none below `floor`; returns the first"""
+        with self:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            raw = os.read(self._fd, 64).strip()
+            try:
+                next_id = int(raw)
+            except ValueError:
+                next_id = 0
+            start = max(next_id, floor)
+            data = str(start + n).encode()
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, data)
+            os.ftruncate(self._fd, len(data))
+            return start
+
+    def close(self):
+        with self._rlock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
+
+    def _lock_file(self, blocking):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(self._fd, flags)
+            except BlockingIOError:
+                return False
+            return True
+        while True:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            try:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(_RETRY)
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+
+def signature(path: Path):
+    """(inode, size, mtime) of a file, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
@@ -0,0 +1,38 @@
+"""Copy a schedule between storage backends.
+
+    python -m core.migrate schedule.json schedule.db
+
+Reads the source with its own backend (snapshot + journal for .json),
+upgrades legacy "[x] text" entries on the way, and writes everything to
+the destination in one transaction.
+"""
+import sys
+import time
+
+from .backends import open_backend
+from .records import decode_tasks, encode_tasks
+
+
+def migrate(src, dst) -> int:
+    source = open_backend(src)
+    tasks, _ = decode_tasks(source.load())
+    source.close()
+    target = open_backend(dst)
+    target.write_snapshot(encode_tasks(tasks), target.begin_snapshot())
+    target.close()
+    return len(tasks)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python -m core.migrate SOURCE DEST  (e.g. schedule.json schedule.db)")
+        return 2
+    start = time.perf_counter()
+    n = migrate(argv[0], argv[1])
+    print(f"Migrated {n} tasks from {argv[0]} to {argv[1]} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
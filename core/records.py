@@ -0,0 +1,87 @@
+import time
+
+from .due import parse_due
+
+DONE_PREFIX = "[x] "
+TODO_PREFIX = "[ ] "
+
+
+class Task:
+    """One task. Status lives in its own field instead of a text prefix."""
+
+    __slots__ = ("id", "done", "text", "due", "done_at")
+
+    def __init__(self, id: int, text: str, done: bool = False, due=None, done_at=None):
+        self.id = id
+        self.text = text
+        self.done = done
+        #due time as a unix timestamp, or None when the text has no time in it
+        self.due = due
+        #when it was marked done (unix time); the archive goes by this
+        self.done_at = done_at
+
+    def __str__(self):
+        #the "[x] text" form users are used to seeing
+        return (DONE_PREFIX if self.done else TODO_PREFIX) + self.text
+
+    def __repr__(self):
+        return (f"Task({self.id!r}, {self.text!r}, done={self.done!r}, due={self.due!r}, "
+                f"done_at={self.done_at!r})")
+
+    def to_dict(self) -> dict:
+        #defaults are left out to keep schedule.json small
+        d = {"id": self.id, "text": self.text}
+        if self.done:
+            d["done"] = True
+        if self.due is not None:
+            d["due"] = self.due
+        if self.done_at is not None:
+            d["done_at"] = self.done_at
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Task":
+        return cls(d["id"], d["text"], d.get("done", False), d.get("due"), d.get("done_at"))
+
+
+def parse_legacy(s: str, id: int) -> Task:
+    """Build a Task from an old "[x] text" / "[ ] text" / bare string entry,
+    with the due time its text gives, as if it had just been typed"""
+    done = False
+    if s.startswith(DONE_PREFIX):
+        s, done = s[len(DONE_PREFIX):], True
+    elif s.startswith(TODO_PREFIX):
+        s = s[len(TODO_PREFIX):]
+    return Task(id, s, done, parse_due(s))
+
+
+def decode_tasks(items: list):
+    """Turn loaded JSON into Task records.
+
+    Returns (tasks, migrated); migrated is True when any legacy string entry
+    had to be converted, or a done task had no done_at yet (it gets the
+    current time, so the archive only takes it once it has aged), so the
+    caller can write the new format back once.
+    """
+    tasks = []
+    legacy = stamped = False
+    now = time.time()
+    for i, item in enumerate(items, start=1):
+        if isinstance(item, dict):
+            task = Task.from_dict(item)
+        else:
+            task = parse_legacy(str(item), i)
+            legacy = True
+        if task.done and task.done_at is None:
+            task.done_at = now
+            stamped = True
+        tasks.append(task)
+    if legacy:
+        #ids follow list order, so renumber in case dicts and strings were mixed
+        for i, t in enumerate(tasks, start=1):
+            t.id = i
+    return tasks, legacy or stamped
+
+
+def encode_tasks(tasks) -> list:
+    return [t.to_dict() for t in tasks]
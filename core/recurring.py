@@ -0,0 +1,287 @@
+import json
+import os
+import re
+import time
+from datetime import date, datetime
+from heapq import merge
+from itertools import count, takewhile
+from pathlib import Path
+
+from .due import day_bounds, parse_clock
+from .locking import signature
+from .records import DONE_PREFIX, TODO_PREFIX
+
+#days of occurrences a "what's coming up" list covers
+HORIZON = 14
+#occurrences handed out per page by the front ends
+PAGE_SIZE = 100
+
+_DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_DAILY = re.compile(r"\b(?:daily|every\s*day|each\s+day)\b")
+_EVERY_N = re.compile(r"\bevery\s+(\d+)\s+days?\b")
+_EVERY_OTHER = re.compile(r"\bevery\s+other\s+day\b")
+_WEEKDAYS = re.compile(r"\b(?:weekdays|every\s+weekday)\b")
+_WEEKLY = re.compile(r"\b(?:weekly|every\s+week)\b")
+_DAY = r"(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|sday|nesday|rsday|urday)?s?\b"
+_EVERY_DAYS = re.compile(rf"\b(?:every|each)\s+({_DAY}(?:\s*(?:,|and|&)?\s*{_DAY})*)")
+_DAY_ABBR = re.compile(r"mon|tue|wed|thu|fri|sat|sun")
+
+
+def parse_rule(text: str, now: float = None):
+    """How often free text says a task repeats, or None for a one-off task.
+
+    Understands daily / every day, every 3 days, every other day, weekdays,
+    weekly (on today's weekday) and every mon, thu. Returns {"every": days}
+    for interval rules or {"days": (weekday, ...)} with 0 = Monday.
+    """
+    s = text.lower()
+    m = _EVERY_N.search(s)
+    if m and int(m.group(1)) > 0:
+        return {"every": int(m.group(1))}
+    if _EVERY_OTHER.search(s):
+        return {"every": 2}
+    if _DAILY.search(s):
+        return {"every": 1}
+    if _WEEKDAYS.search(s):
+        return {"days": (0, 1, 2, 3, 4)}
+    m = _EVERY_DAYS.search(s)
+    if m:
+        return {"days": tuple(sorted({_DAY_NAMES.index(d.title()) for d in _DAY_ABBR.findall(m.group(1))}))}
+    if _WEEKLY.search(s):
+        return {"days": (date.fromtimestamp(time.time() if now is None else now).weekday(),)}
+    return None
+
+
+def describe_rule(how: dict) -> str:
+    """How often a parse_rule() result repeats, in words ("weekdays", "every 3 days")"""
+    days = how.get("days")
+    if days:
+        if tuple(days) == (0, 1, 2, 3, 4):
+            return "weekdays"
+        return "every " + ", ".join(_DAY_NAMES[d] for d in days)
+    if how.get("every") == 1:
+        return "daily"
+    return f"every {how.get('every')} days"
+
+
+class Rule:
+    """A repeating task, stored once however many times it comes round.
+
+    Interval rules step `every` days from `start`; weekly ones fall on the
+    weekdays in `days` (0 = Monday). Days are date ordinals. `done` holds
+    only the occurrences that were ticked off, so a rule that has run for
+    years costs no more than its completions.
+    """
+
+    __slots__ = ("id", "text", "every", "days", "start", "at", "done")
+
+    def __init__(self, id: int, text: str, start: int, every: int = None, days=None,
+                 at=None, done=()):
+        self.id = id
+        self.text = text
+        self.start = start
+        self.every = every
+        self.days = tuple(days) if days else None
+        #(hour, minute) each occurrence is due, or None for the end of the day
+        self.at = tuple(at) if at else None
+        self.done = set(done)
+
+    def __str__(self):
+        return f"{self.text} ({self.describe()})"
+
+    def __repr__(self):
+        return (f"Rule({self.id!r}, {self.text!r}, start={self.start!r}, every={self.every!r}, "
+                f"days={self.days!r}, at={self.at!r}, done={len(self.done)} days)")
+
+    def describe(self) -> str:
+        return describe_rule({"every": self.every, "days": self.days})
+
+    def day_ordinals(self, first: int):
+        """Ordinals of the days it falls on, from `first` on, without end"""
+        first = max(first, self.start)
+        if self.days:
+            for day in count(first):
+                #ordinal 1 (1 Jan of year 1) was a Monday
+                if (day - 1) % 7 in self.days:
+                    yield day
+        else:
+            behind = (first - self.start) % self.every
+            yield from count(first + (self.every - behind if behind else 0), self.every)
+
+    def occurrences(self, start: float, end: float = None):
+        """Occurrences due in [start, end), soonest first; without `end` they never stop"""
+        first = date.fromtimestamp(start).toordinal()
+        found = (Occurrence(self, day) for day in self.day_ordinals(first))
+        found = (o for o in found if o.due >= start)
+        if end is None:
+            return found
+        return takewhile(lambda o: o.due < end, found)
+
+    def due_on(self, day: int) -> float:
+        hour, minute = self.at if self.at else (23, 59)
+        return datetime.fromordinal(day).replace(hour=hour, minute=minute).timestamp()
+
+    def to_dict(self) -> dict:
+        d = {"id": self.id, "text": self.text, "start": date.fromordinal(self.start).isoformat()}
+        if self.days:
+            d["days"] = list(self.days)
+        else:
+            d["every"] = self.every
+        if self.at:
+            d["at"] = list(self.at)
+        if self.done:
+            d["done"] = [date.fromordinal(day).isoformat() for day in sorted(self.done)]
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Rule":
+        return cls(d["id"], d["text"], date.fromisoformat(d["start"]).toordinal(),
+                   every=d.get("every"), days=d.get("days"), at=d.get("at"),
+                   done=(date.fromisoformat(s).toordinal() for s in d.get("done", ())))
+
+
+class Occurrence:
+    """One day of a Rule, made when something asks for it and never stored"""
+
+    __slots__ = ("rule", "day", "due")
+
+    def __init__(self, rule: Rule, day: int):
+        self.rule = rule
+        self.day = day
+        self.due = rule.due_on(day)
+
+    @property
+    def done(self) -> bool:
+        return self.day in self.rule.done
+
+    @property
+    def text(self) -> str:
+        return self.rule.text
+
+    def __str__(self):
+        return (DONE_PREFIX if self.done else TODO_PREFIX) + self.rule.text
+
+    def __repr__(self):
+        return f"Occurrence(rule={self.rule.id!r}, day={date.fromordinal(self.day)}, done={self.done!r})"
+
+
+class Recurring:
+    """The repeating tasks of one schedule, in schedule.json.recurring.
+
+    The rules sit next to the schedule rather than in it, so the task list,
+    its indexes and its journal only ever hold one-off tasks. Occurrences
+    are generated per rule and merged by due time, only as far as the
+    caller reads: a 14-day window costs 14 days per rule whatever the rule
+    spans, and upcoming() can be read page by page without end.
+
+    Changes are written whole (tmp file + rename) under the schedule's
+    FileLock after re-reading the file, so windows sharing the schedule
+    don't drop each other's edits; readers pick up a changed file on their
+    next call. Like archiving, editing rules is not an undo step.
+    """
+
+    def __init__(self, path, lock):
+        path = Path(path)
+        self.path = path.with_name(path.name + ".recurring")
+        self._lock = lock
+        self._rules = []
+        self._sig = False
+
+    def rules(self) -> list:
+        """Every rule, oldest first"""
+        sig = signature(self.path)
+        if sig != self._sig:
+            self._sig = sig
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._rules = [Rule.from_dict(d) for d in data["rules"]]
+            except (OSError, ValueError, KeyError):
+                self._rules = []
+        return self._rules
+
+    def __len__(self):
+        return len(self.rules())
+
+    def get(self, rule_id: int):
+        for rule in self.rules():
+            if rule.id == rule_id:
+                return rule
+        return None
+
+    def occurrences(self, start: float, end: float = None):
+        """Occurrences of every rule due in [start, end), soonest first (lazy)"""
+        return merge(*(rule.occurrences(start, end) for rule in self.rules()),
+                     key=lambda o: (o.due, o.rule.id))
+
+    def upcoming(self, now: float = None, days: int = None):
+        """Occurrences from the start of today on; `days` bounds the window, None reads on forever"""
+        start, _ = day_bounds(now)
+        end = None if days is None else start + days * 86400
+        return self.occurrences(start, end)
+
+    #writing
+    def add(self, text: str, now: float = None) -> Rule:
+        """Add a rule read from text like "gym daily 7am"; ValueError if it doesn't repeat"""
+        return self.add_many([text], now)[0]
+
+    def add_many(self, texts, now: float = None) -> list:
+        """add() for several texts, written once"""
+        now = time.time() if now is None else now
+        today = date.fromtimestamp(now).toordinal()
+        parsed = []
+        for text in texts:
+            how = parse_rule(text, now)
+            if how is None:
+                raise ValueError(f"'{text}' doesn't say how often it repeats")
+            parsed.append((text, how))
+
+        def change(rules):
+            next_id = max((r.id for r in rules), default=0) + 1
+            new = [Rule(next_id + i, text, today, at=parse_clock(text), **how)
+                   for i, (text, how) in enumerate(parsed)]
+            rules.extend(new)
+            return new
+
+        return self._change(change)
+
+    def remove(self, rule_id: int):
+        """Stop a rule repeating; returns it, or None if it was already gone"""
+        def change(rules):
+            for i, rule in enumerate(rules):
+                if rule.id == rule_id:
+                    return rules.pop(i)
+            return None
+
+        return self._change(change)
+
+    def set_done(self, rule_id: int, day: int, done: bool = True) -> bool:
+        """Tick off (or reopen) the occurrence of a rule on one day"""
+        def change(rules):
+            for rule in rules:
+                if rule.id == rule_id:
+                    (rule.done.add if done else rule.done.discard)(day)
+                    return True
+            return False
+
+        return self._change(change)
+
+    def toggle(self, occurrence: Occurrence) -> bool:
+        """Flip one occurrence; False if its rule was removed meanwhile"""
+        done = not occurrence.done
+        if not self.set_done(occurrence.rule.id, occurrence.day, done):
+            return False
+        #the rules may have been re-read since it was made; keep it showing the new state
+        (occurrence.rule.done.add if done else occurrence.rule.done.discard)(occurrence.day)
+        return True
+
+    def _change(self, fn):
+        with self._lock:
+            #re-reads the file if another window changed it since
+            rules = self.rules()
+            result = fn(rules)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps({"rules": [r.to_dict() for r in rules]}, ensure_ascii=False),
+                           encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._sig = signature(self.path)
+        return result
@@ -0,0 +1,118 @@
+import heapq
+import time
+from bisect import bisect_right
+
+from . import stats
+
+#a timer that wakes this much early still fires what it came for
+EARLY = 0.5
+#longest single wait handed to a GUI timer (Qt and Tk take int milliseconds)
+MAX_WAIT = 24 * 3600
+
+
+class Reminders:
+    """Tells a front end when pending tasks come due, with one timer armed.
+
+    Future due times sit in a min-heap of (due, id), seeded from the
+    store's DueIndex. Edits, toggles and removals leave the heap alone: an
+    entry is checked against its task when it reaches the top, and dropped
+    if the task is gone, done or due at another time by then. A change
+    that sets a due time pushes a new entry. The front end's timer is only
+    re-armed when the soonest valid entry actually changes, so while
+    nothing is due nothing runs, however many tasks are scheduled.
+
+    `arm(delay)` is the front end's: start its single timer `delay` seconds
+    from now, replacing any armed one, or cancel it for None. When the
+    timer goes off it calls fire(), which returns the tasks that came due
+    and arms the next one. Tasks already overdue at start() don't fire.
+    """
+
+    def __init__(self, store, arm):
+        self.store = store
+        self.arm = arm
+        self.heap = []
+        #due time the front end's timer is set for, or None
+        self.armed = None
+
+    def start(self):
+        self.store.subscribe(self.on_change)
+        self.rebuild()
+
+    def stop(self):
+        self.store.unsubscribe(self.on_change)
+        self.heap = []
+        self._arm(None)
+
+    def rebuild(self, now: float = None):
+        now = time.time() if now is None else now
+        entries = self.store.due.entries
+        #a sorted list is already a valid heap
+        self.heap = entries[bisect_right(entries, (now, float("inf"))):]
+        self._rearm()
+
+    def on_change(self, kind, pos, task, before):
+        if kind == "reset":
+            self.rebuild()
+        elif kind == "extend":
+            for t in task:
+                self._push(t)
+            self._rearm()
+        elif kind == "insert" or (kind == "update" and ("due" in before or "done" in before)):
+            self._push(task)
+            self._rearm()
+        elif kind == "remove" and task.due is not None and task.due == self.armed:
+            #the timer was set for it; others just go stale and are dropped when they surface
+            self._rearm()
+
+    def fire(self, now: float = None) -> list:
+        """Tasks that have come due since the last call; arms the next one"""
+        now = time.time() if now is None else now
+        self.armed = None
+        due = []
+        seen = set()
+        while self.heap and self.heap[0][0] <= now + EARLY:
+            entry = heapq.heappop(self.heap)
+            task = self._live(entry)
+            #a task toggled back and forth can have its entry in twice
+            if task is not None and task.id not in seen:
+                seen.add(task.id)
+                due.append(task)
+        if due and stats.enabled:
+            stats.count("reminders.fired", len(due))
+        self._rearm()
+        return due
+
+    def next_due(self):
+        """(due, task) of the next reminder, or None"""
+        self._drop_stale()
+        return (self.heap[0][0], self._live(self.heap[0])) if self.heap else None
+
+    def _push(self, task):
+        if task.due is not None and not task.done and task.due > time.time():
+            heapq.heappush(self.heap, (task.due, task.id))
+            if len(self.heap) > 2 * len(self.store.due) + 64:
+                #mostly stale entries by now; start again from the index
+                self.rebuild()
+
+    def _live(self, entry):
+        #the task an entry stands for, if it is still pending at that time
+        due, id = entry
+        pos = self.store.find(id)
+        if pos < 0:
+            return None
+        task = self.store.tasks[pos]
+        return task if task.due == due and not task.done else None
+
+    def _drop_stale(self):
+        while self.heap and self._live(self.heap[0]) is None:
+            heapq.heappop(self.heap)
+
+    def _rearm(self):
+        self._drop_stale()
+        self._arm(self.heap[0][0] if self.heap else None)
+
+    def _arm(self, due):
+        if due == self.armed:
+            return
+        self.armed = due
+        self.arm(None if due is None else min(MAX_WAIT, max(0.0, due - time.time())))
@@ -0,0 +1,112 @@
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .due import format_due
+from .store import META_SUFFIX, TaskStore, read_meta
+
+#stores kept open at once; opening another closes the least recently used
+CAPACITY = 3
+#what a schedule may be called: it becomes part of a file name
+_NAME = re.compile(r"[\w-]+")
+
+
+class Schedules:
+    """The named schedules kept next to one base file, opened as they're used.
+
+    The base file (schedule.json) is the schedule named after its stem,
+    "schedule"; one called "work" lives beside it in schedule.work.json
+    (schedule.work.db when the base is a .db), with its own journal, lock,
+    archive and repeating tasks. Nothing is read until a schedule is
+    opened. At most `capacity` stores stay open, most recently used last;
+    opening one more flushes and closes the one used longest ago, so
+    memory grows with the schedules in use, not the schedules on disk.
+
+    summary() counts every schedule from the .meta sidecars the stores
+    keep current with each write, so listing fifty schedules parses none
+    of them. Open schedules are counted live.
+    """
+
+    def __init__(self, base, capacity: int = CAPACITY, **store_options):
+        self.base = Path(base)
+        self.capacity = max(1, capacity)
+        self.store_options = store_options
+        self._stores = OrderedDict()
+
+    @property
+    def main(self) -> str:
+        return self.base.stem
+
+    def path(self, name: str) -> Path:
+        if name == self.main:
+            return self.base
+        if not _NAME.fullmatch(name):
+            raise ValueError(f"'{name}' can't name a schedule; use letters, digits, _ and -")
+        return self.base.with_name(f"{self.base.stem}.{name}{self.base.suffix}")
+
+    def names(self) -> list:
+        """The main schedule first, then every other one on disk or open, by name"""
+        prefix = self.base.stem + "."
+        found = set()
+        #a journal schedule may have no snapshot yet, but it has counts once written
+        for end in (self.base.suffix, self.base.suffix + META_SUFFIX):
+            found.update(p.name[len(prefix):-len(end)] for p in self.base.parent.glob(f"{prefix}*{end}"))
+        found.update(self._stores)
+        found.discard(self.main)
+        return [self.main] + sorted(n for n in found if _NAME.fullmatch(n))
+
+    def __contains__(self, name) -> bool:
+        """Whether `name` is open (and so already loaded or loading)"""
+        return name in self._stores
+
+    def open(self, name: str, load: bool = True) -> TaskStore:
+        """The store for `name`, opening it on first use.
+
+        A newly opened store is loaded here, or left empty for the caller
+        to begin_load() with `load=False`. A new name gets its file on the
+        first write.
+        """
+        store = self._stores.get(name)
+        if store is not None:
+            self._stores.move_to_end(name)
+            return store
+        store = TaskStore(self.path(name), **self.store_options)
+        self._stores[name] = store
+        while len(self._stores) > self.capacity:
+            _, old = self._stores.popitem(last=False)
+            old.close()
+        if load:
+            store.load()
+        return store
+
+    def summary(self) -> list:
+        """(name, counts) for every schedule; counts are TaskStore.meta(), or
+        None for a file no store has written since counts were kept"""
+        rows = []
+        for name in self.names():
+            store = self._stores.get(name)
+            rows.append((name, store.meta() if store is not None and not store.loading
+                         else read_meta(self.path(name))))
+        return rows
+
+    def flush(self):
+        for store in self._stores.values():
+            store.flush()
+
+    def close(self):
+        while self._stores:
+            _, store = self._stores.popitem()
+            store.close()
+
+
+def format_counts(counts, now: float = None) -> str:
+    """One line for a summary() row"""
+    if counts is None:
+        return "not counted yet"
+    parts = [f"{counts['tasks']:,} tasks", f"{counts['active']:,} active", f"{counts['done']:,} done"]
+    due = counts.get("next_due")
+    if due is not None:
+        now = time.time() if now is None else now
+        parts.append(f"overdue since {format_due(due)}" if due < now else f"next due {format_due(due)}")
+    return ", ".join(parts)
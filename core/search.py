@@ -0,0 +1,120 @@
+import re
+from bisect import bisect_left, insort
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index from lower-cased word to the ids of tasks using it.
+
+    Tokens are also kept in a sorted list so a query word can match every
+    token it is a prefix of ("mil" finds "milk"), which is what
+    as-you-type search needs. TaskStore keeps it current on add, edit and
+    remove once it has been built.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.tokens = []
+
+    def rebuild(self, tasks):
+        self.postings = {}
+        for t in tasks:
+            for tok in set(tokenize(t.text)):
+                ids = self.postings.get(tok)
+                if ids is None:
+                    self.postings[tok] = {t.id}
+                else:
+                    ids.add(t.id)
+        self.tokens = sorted(self.postings)
+
+    def add(self, task):
+        self._add_text(task.id, task.text)
+
+    def remove(self, task):
+        self._remove_text(task.id, task.text)
+
+    def changed(self, task, before: dict):
+        old_text = before.get("text", task.text)
+        if old_text != task.text:
+            self._remove_text(task.id, old_text)
+            self._add_text(task.id, task.text)
+
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    def remove_many(self, tasks):
+        emptied = set()
+        for task in tasks:
+            for tok in set(tokenize(task.text)):
+                ids = self.postings.get(tok)
+                if ids is None:
+                    continue
+                ids.discard(task.id)
+                if not ids:
+                    del self.postings[tok]
+                    emptied.add(tok)
+        if emptied:
+            #one pass over the sorted tokens instead of a delete per word
+            self.tokens = [tok for tok in self.tokens if tok not in emptied]
+
+    def changed_many(self, changes):
+        for task, before in changes:
+            self.changed(task, before)
+
+    def query(self, text: str) -> set:
+        """Ids of tasks containing a word starting with every query word"""
+        result = None
+        #rarest-looking (longest) words first keeps the intersections small
+        for word in sorted(set(tokenize(text)), key=len, reverse=True):
+            ids = self._prefix(word)
+            result = set(ids) if result is None else result & ids
+            if not result:
+                return set()
+        return result if result is not None else set()
+
+    def _prefix(self, word: str) -> set:
+        exact = self.postings.get(word)
+        tokens = self.tokens
+        i = bisect_left(tokens, word)
+        if exact is not None:
+            i += 1
+        matches = [exact] if exact is not None else []
+        while i < len(tokens) and tokens[i].startswith(word):
+            matches.append(self.postings[tokens[i]])
+            i += 1
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+    def _add_text(self, id, text):
+        for tok in set(tokenize(text)):
+            ids = self.postings.get(tok)
+            if ids is None:
+                self.postings[tok] = {id}
+                insort(self.tokens, tok)
+            else:
+                ids.add(id)
+
+    def _remove_text(self, id, text):
+        for tok in set(tokenize(text)):
+            ids = self.postings.get(tok)
+            if ids is None:
+                continue
+            ids.discard(id)
+            if not ids:
+                del self.postings[tok]
+                i = bisect_left(self.tokens, tok)
+                if i < len(self.tokens) and self.tokens[i] == tok:
+                    del self.tokens[i]
+
+
+def matches(words: list, text: str) -> bool:
+    """Same rule as SearchIndex.query, checked against one task's text"""
+    toks = tokenize(text)
+    return all(any(t.startswith(w) for t in toks) for w in words)
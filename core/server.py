@@ -0,0 +1,448 @@
+"""Headless JSON API over a schedule, for scripts and other tools.
+
+    python -m core.server --file schedule.json --port 8765
+
+    GET    /tasks?filter=Active&search=milk&offset=0&limit=50
+    GET    /tasks/12
+    POST   /tasks              {"text": "gym 3pm", "done": false}
+    PATCH  /tasks/12           {"text": "...", "done": true, "due": null}
+    POST   /tasks/12/toggle
+    DELETE /tasks/12
+    POST   /batch              {"ops": [{"op": "add", "text": "..."},
+                                        {"op": "edit", "id": 3, "done": true},
+                                        {"op": "toggle", "id": 4},
+                                        {"op": "remove", "id": 5}]}
+    GET    /stats
+
+Standard library only (asyncio streams and a small HTTP/1.1 reader), and
+only ever bound to a loopback address. Every GET but /stats carries an
+ETag built from the store's change counter and the path and query; send
+it back in If-None-Match and an unchanged schedule answers 304 with no
+body. Encoded list responses are
+cached until the next change, so many clients polling the same view cost
+one encode.
+
+Reads are answered straight from memory. Writes are queued to a single
+writer task, which applies whatever has queued up in one store.batch()
+- one journal append or one SQLite transaction for the group - before
+answering any of them. A /batch request is one job, so its operations
+land together or (when one names a missing task) not at all. The writer
+also merges what other processes saved, every SYNC_INTERVAL seconds.
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import sys
+import time
+import zlib
+from http import HTTPStatus
+from itertools import islice
+from urllib.parse import parse_qsl, urlsplit
+
+from . import stats
+from .due import DUE_FILTERS
+from .index import FILTERS
+from .store import TaskStore
+
+DEFAULT_PORT = 8765
+#largest request head / body accepted, in bytes
+MAX_HEAD = 64 * 1024
+MAX_BODY = 16 * 1024 * 1024
+#most queued writes applied as one commit
+GROUP_MAX = 512
+#seconds between merges of other processes' changes
+SYNC_INTERVAL = 1.0
+#encoded GET responses kept for the current version
+CACHE_SIZE = 64
+#fields PATCH and batch "edit" may set
+EDITABLE = ("text", "done", "due")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class TaskServer:
+    """Serves one TaskStore over HTTP on localhost; see the module docstring"""
+
+    def __init__(self, store, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        if not _is_loopback(host):
+            raise ValueError(f"{host} is not a loopback address; the API has no authentication")
+        self.store = store
+        self.host = host
+        self.port = port
+        #ETags from one run must not match the next run's counter
+        self.boot = f"{int(time.time()):x}"
+        self.queue = None
+        self.server = None
+        self._tasks = []
+        self._cache = {}
+        self._cache_seq = None
+        #writer stats for /stats
+        self.groups = 0
+        self.writes = 0
+        self.max_group = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.server = await asyncio.start_server(self._connection, self.host, self.port, limit=MAX_HEAD)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._tasks = [asyncio.create_task(self._writer()), asyncio.create_task(self._syncer())]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+
+    #the single writer
+    async def submit(self, fn, batched: bool = True):
+        """Run fn() on the writer inside the next group commit (after it,
+        for `batched` False); returns its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, future, batched))
+        return await future
+
+    async def _writer(self):
+        while True:
+            group = [await self.queue.get()]
+            while len(group) < GROUP_MAX and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+            results = []
+            with stats.timer("server.commit"), self.store.batch():
+                for fn, future, batched in group:
+                    if batched:
+                        results.append(_call(fn, future))
+            #sync() merges nothing while a batch is open
+            results += [_call(fn, future) for fn, future, batched in group if not batched]
+            #answered only once the batch is written
+            for future, result, error in results:
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            writes = sum(1 for _, _, batched in group if batched)
+            if writes:
+                self.groups += 1
+                self.writes += writes
+                self.max_group = max(self.max_group, writes)
+
+    async def _syncer(self):
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            await self.submit(self.store.sync, batched=False)
+
+    #HTTP
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, {"error": "request head too large"}, close=True)
+                    return
+                try:
+                    method, target, version, headers, length = _parse_head(head)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "malformed request"}, close=True)
+                    return
+                if length > MAX_BODY:
+                    await self._send(writer, 413, {"error": "body too large"}, close=True)
+                    return
+                body = await reader.readexactly(length) if length else b""
+                close = version != "HTTP/1.1" or headers.get("connection", "").lower() == "close"
+                start = time.perf_counter()
+                try:
+                    status, payload, etag = await self.handle(method, target, headers, body)
+                except ApiError as e:
+                    status, payload, etag = e.status, {"error": str(e)}, None
+                except Exception as e:
+                    status, payload, etag = 500, {"error": f"{type(e).__name__}: {e}"}, None
+                if stats.enabled:
+                    stats.record(f"server.{method}", time.perf_counter() - start)
+                await self._send(writer, status, payload, etag=etag, close=close)
+                if close:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, etag=None, close=False):
+        if isinstance(payload, bytes) or payload is None:
+            body = payload or b""
+        else:
+            body = _encode(payload)
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {len(body)}"]
+        if etag:
+            lines.append(f"ETag: {etag}")
+            lines.append("Cache-Control: no-cache")
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def handle(self, method, target, headers, body):
+        """(status, payload, etag) for one request; payload is a dict or encoded bytes"""
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = dict(parse_qsl(url.query))
+        if method == "GET":
+            #answer first, so unknown paths, bad filters and missing ids get their error, never a 304
+            payload = self._get(parts, url, query)
+            if parts == ["stats"]:
+                #changes with every request, not with the schedule
+                return 200, payload, None
+            etag = self.etag(query.get("filter", "All"), url.path + "?" + url.query)
+            if etag in _etags(headers.get("if-none-match", "")):
+                return 304, None, etag
+            return 200, payload, etag
+        if method == "POST" and parts == ["tasks"]:
+            fields = _fields(_json(body), required=("text",))
+            task = await self.submit(lambda: self.store.add(fields["text"], bool(fields.get("done")),
+                                                            fields.get("due")))
+            return 201, task.to_dict(), None
+        if method == "POST" and parts == ["batch"]:
+            ops = _json(body).get("ops")
+            if not isinstance(ops, list):
+                raise ApiError(400, "expected {\"ops\": [...]}")
+            ops = [_batch_op(op) for op in ops]
+            results = await self.submit(lambda: self._apply_batch(ops))
+            return 200, {"results": results}, None
+        if len(parts) >= 2 and parts[0] == "tasks":
+            id = _id(parts[1])
+            if method == "POST" and parts[2:] == ["toggle"]:
+                return 200, await self.submit(lambda: self._toggle(id)), None
+            if parts[2:]:
+                raise ApiError(404, "no such endpoint")
+            if method == "PATCH":
+                fields = _fields(_json(body))
+                return 200, await self.submit(lambda: self._edit(id, fields)), None
+            if method == "DELETE":
+                return 200, await self.submit(lambda: self._remove(id)), None
+            raise ApiError(405, f"{method} not allowed here")
+        raise ApiError(404 if method in ("POST", "PATCH", "DELETE") else 405, "no such endpoint")
+
+    def etag(self, mode: str = "All", key: str = "") -> str:
+        """Tag of the current version of the resource at `key` (path and query)"""
+        tag = f"{self.boot}.{self.store.change_seq}.{zlib.crc32(key.encode()):08x}"
+        if mode in DUE_FILTERS:
+            #what counts as overdue moves with the clock, not only with edits
+            tag += f".{int(time.time() // 60)}"
+        return f'"{tag}"'
+
+    #reads (event loop thread, from memory)
+    def _get(self, parts, url, query):
+        if parts in ([], ["tasks"]):
+            key = url.path + "?" + url.query
+            if self._cache_seq != self.store.change_seq:
+                self._cache.clear()
+                self._cache_seq = self.store.change_seq
+            body = self._cache.get(key)
+            if body is None:
+                with stats.timer("server.encode_list"):
+                    body = _encode(self._list(query))
+                if len(self._cache) >= CACHE_SIZE:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = body
+            return body
+        if len(parts) == 2 and parts[0] == "tasks":
+            pos = self._find(_id(parts[1]))
+            return self.store.tasks[pos].to_dict()
+        if parts == ["stats"]:
+            return {"tasks": len(self.store.tasks), "version": self.store.change_seq,
+                    "writer": {"groups": self.groups, "writes": self.writes, "max_group": self.max_group,
+                               "queued": self.queue.qsize()},
+                    "stats": stats.snapshot()}
+        raise ApiError(404, "no such endpoint")
+
+    def _list(self, query) -> dict:
+        mode = query.get("filter", "All")
+        if mode not in FILTERS + DUE_FILTERS:
+            raise ApiError(400, f"filter must be one of {', '.join(FILTERS + DUE_FILTERS)}")
+        try:
+            offset = max(0, int(query.get("offset", 0)))
+            limit = int(query["limit"]) if "limit" in query else None
+        except ValueError:
+            raise ApiError(400, "offset and limit must be numbers")
+        view = self.store.visible(mode, query.get("search", ""))
+        tasks = self.store.tasks
+        rows = islice(view.iter_from(offset), None if limit is None else max(0, limit))
+        return {"version": self.store.change_seq, "total": len(view), "offset": offset,
+                "tasks": [tasks[pos].to_dict() for pos in rows]}
+
+    #writes (writer task only)
+    def _find(self, id: int) -> int:
+        pos = self.store.find(id)
+        if pos < 0:
+            raise ApiError(404, f"no task with id {id}")
+        return pos
+
+    def _toggle(self, id):
+        return self.store.toggle(self._find(id)).to_dict()
+
+    def _edit(self, id, fields):
+        return self.store.update(self._find(id), **fields).to_dict()
+
+    def _remove(self, id):
+        return self.store.remove(self._find(id)).to_dict()
+
+    def _apply_batch(self, ops) -> list:
+        #check every id first so a bad batch changes nothing
+        gone = set()
+        for op in ops:
+            if op["op"] == "add":
+                continue
+            if op["id"] in gone:
+                raise ApiError(404, f"task {op['id']} is removed earlier in the batch")
+            self._find(op["id"])
+            if op["op"] == "remove":
+                gone.add(op["id"])
+        results = []
+        with self.store.batch():
+            for op in ops:
+                kind = op["op"]
+                if kind == "add":
+                    task = self.store.add(op["text"], bool(op.get("done")), op.get("due"))
+                elif kind == "toggle":
+                    task = self.store.toggle(self._find(op["id"]))
+                elif kind == "edit":
+                    task = self.store.update(self._find(op["id"]), **op["fields"])
+                else:
+                    task = self.store.remove(self._find(op["id"]))
+                results.append(task.to_dict())
+        return results
+
+
+def _call(fn, future):
+    try:
+        return future, fn(), None
+    except Exception as e:
+        return future, None, e
+
+
+def _parse_head(head: bytes):
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length < 0:
+        raise ValueError("negative Content-Length")
+    return method.upper(), target, version, headers, length
+
+
+def _etags(header: str) -> set:
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json(body: bytes) -> dict:
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError as e:
+        raise ApiError(400, f"bad JSON: {e}")
+    if not isinstance(data, dict):
+        raise ApiError(400, "expected a JSON object")
+    return data
+
+
+def _id(raw) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"bad task id: {raw!r}")
+
+
+def _fields(data: dict, required=()) -> dict:
+    for name in required:
+        if not isinstance(data.get(name), str) or not data[name].strip():
+            raise ApiError(400, f"'{name}' is required")
+    fields = {k: v for k, v in data.items() if k in EDITABLE}
+    if "text" in fields:
+        if not isinstance(fields["text"], str) or not fields["text"].strip():
+            raise ApiError(400, "'text' must be a non-empty string")
+        fields["text"] = fields["text"].strip()
+    if "done" in fields and not isinstance(fields["done"], bool):
+        raise ApiError(400, "'done' must be true or false")
+    due = fields.get("due")
+    #bool is an int, but true is no timestamp
+    if due is not None and (isinstance(due, bool) or not isinstance(due, (int, float))):
+        raise ApiError(400, "'due' must be a unix timestamp or null")
+    return fields
+
+
+def _batch_op(op) -> dict:
+    if not isinstance(op, dict) or op.get("op") not in ("add", "edit", "toggle", "remove"):
+        raise ApiError(400, "each op needs \"op\": add, edit, toggle or remove")
+    if op["op"] == "add":
+        return dict(_fields(op, required=("text",)), op="add")
+    checked = {"op": op["op"], "id": _id(op.get("id"))}
+    if op["op"] == "edit":
+        checked["fields"] = _fields(op)
+    return checked
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m core.server", description=__doc__.split("\n")[0])
+    p.add_argument("--file", default="schedule.json", help="schedule to serve (.json, or .db for SQLite)")
+    p.add_argument("--host", default="127.0.0.1", help="loopback address to bind (default 127.0.0.1)")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    p.add_argument("--stats", action="store_true", help="collect timings for GET /stats")
+    args = p.parse_args(argv)
+    stats.setup_from_env()
+    if args.stats:
+        stats.enable()
+    #the writer task commits each group itself, so no write-behind thread
+    store = TaskStore(args.file, write_behind=False)
+    store.load()
+    try:
+        server = TaskServer(store, args.host, args.port)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    async def run():
+        await server.start()
+        print(f"Serving {args.file} on http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
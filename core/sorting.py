@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from datetime import date
+from itertools import islice
+
+#orders the front ends offer; "Added" is the plain id order every other view has
+SORTS = ("Added", "Status", "Text", "Due")
+#groupings; "Day" gathers tasks by the day they're due
+GROUPS = ("None", "Day")
+#an "extend" adding more rows than this re-sorts once instead of placing each
+MAX_INSERTS = 64
+#day key of tasks without a due time, after every real day
+_NO_DAY = float("inf")
+
+
+def sort_key(task, sort: str = "Added", group: str = "None") -> tuple:
+    """Where a task goes in a sorted view; always ends with its id, so keys are unique"""
+    if sort == "Status":
+        key = (task.done, task.id)
+    elif sort == "Text":
+        key = (task.text.casefold(), task.id)
+    elif sort == "Due":
+        key = (task.due is None, task.due or 0.0, task.id)
+    else:
+        key = (task.id,)
+    if group == "Day":
+        key = (_NO_DAY if task.due is None else date.fromtimestamp(task.due).toordinal(),) + key
+    return key
+
+
+def day_label(day, today: int = None) -> str:
+    if day == _NO_DAY:
+        return "No due date"
+    today = date.today().toordinal() if today is None else today
+    if day == today:
+        return "Today"
+    if day == today + 1:
+        return "Tomorrow"
+    if day == today - 1:
+        return "Yesterday"
+    return date.fromordinal(day).strftime("%a %d %b")
+
+
+class SortedView:
+    """The rows of another view (a filter, a search, a due filter) in a chosen order.
+
+    Each shown task's sort key is computed once and cached in `keys`
+    (id -> key), and `order` is those keys sorted. A row is order[row];
+    a task's row is a bisect for its cached key. When one task changes,
+    the cached key finds where it was and the new key where it goes, and
+    the view reports ("move", row, dest) instead of a reset, so a toggle
+    in a sorted list repaints only the rows between. Grouping by day puts
+    the due day in front of the key, so each group is a run of rows that
+    group_label() names.
+
+    Batches the Loader installs are skipped while the store is loading
+    (sorting everything again per batch would be quadratic); the front
+    ends build a fresh view once loading is done.
+    """
+
+    def __init__(self, store, base, sort: str = "Added", group: str = "None"):
+        self.store = store
+        self.base = base
+        self.mode = base.mode
+        self.sort = sort
+        self.group = group
+        self.grouped = group != "None"
+        self._seen = None
+        self._ops = []
+        self._rebuild()
+
+    def _rebuild(self):
+        tasks = self.store.tasks
+        self.keys = {}
+        for pos in self.base:
+            task = tasks[pos]
+            self.keys[task.id] = sort_key(task, self.sort, self.group)
+        self.order = sorted(self.keys.values())
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, row: int) -> int:
+        """Position in store.tasks of the task shown on this row"""
+        return self.store.find(self.order[row][-1])
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, row: int):
+        find = self.store.find
+        for key in islice(self.order, row, None):
+            yield find(key[-1])
+
+    def row_of(self, pos: int):
+        key = self.keys.get(self.store.tasks[pos].id)
+        return None if key is None else bisect_left(self.order, key)
+
+    def group_label(self, row: int):
+        """Name of the group a row is in, or None when not grouping"""
+        return day_label(self.order[row][0]) if self.grouped else None
+
+    def row_changes(self, kind, pos, task, before):
+        """Like FilterView.row_changes, plus ("move", row, dest) when a task changes place"""
+        if self._seen != self.store.change_seq:
+            self._seen = self.store.change_seq
+            #the base view keeps its own membership (searches, due filters) current
+            base_ops = self.base.row_changes(kind, pos, task, before)
+            self._ops = self._changes(kind, task, base_ops)
+        return self._ops
+
+    def _changes(self, kind, task, base_ops):
+        accepts = getattr(self.base, "accepts", None)
+        if kind == "reset" or accepts is None:
+            #due filters are short and time-bound; sort them again when they change
+            if kind != "reset" and not base_ops:
+                return []
+            self._rebuild()
+            return [("reset", 0, 0)]
+        if kind == "extend":
+            new = [t for t in task if accepts(t)]
+            if len(new) <= MAX_INSERTS:
+                return [self._insert(t) for t in new]
+            if self.store.loading:
+                return []
+            for t in new:
+                self.keys[t.id] = sort_key(t, self.sort, self.group)
+            self.order = sorted(self.keys.values())
+            return [("reset", 0, 0)]
+        was = task.id in self.keys
+        now = kind != "remove" and accepts(task)
+        if was and not now:
+            return [self._remove(task.id)]
+        if now and not was:
+            return [self._insert(task)]
+        if was and now:
+            return [self._move(task)]
+        return []
+
+    def _insert(self, task):
+        key = self.keys[task.id] = sort_key(task, self.sort, self.group)
+        row = bisect_left(self.order, key)
+        self.order.insert(row, key)
+        return ("insert", row, 1)
+
+    def _remove(self, id):
+        row = bisect_left(self.order, self.keys.pop(id))
+        del self.order[row]
+        return ("remove", row, 1)
+
+    def _move(self, task):
+        old = self.keys[task.id]
+        new = sort_key(task, self.sort, self.group)
+        row = bisect_left(self.order, old)
+        if new == old:
+            return ("update", row, 1)
+        del self.order[row]
+        dest = bisect_left(self.order, new)
+        self.order.insert(dest, new)
+        self.keys[task.id] = new
+        return ("update", row, 1) if dest == row else ("move", row, dest)
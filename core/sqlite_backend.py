@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from . import stats
+from .locking import FileLock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id   INTEGER PRIMARY KEY,
+    text TEXT    NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    due  REAL,
+    done_at REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (done, id);
+CREATE INDEX IF NOT EXISTS tasks_pending_due ON tasks (due, id) WHERE due IS NOT NULL AND done = 0;
+"""
+
+#columns an "upd" record may touch
+COLUMNS = ("text", "done", "due", "done_at")
+
+#WHERE clause per filter mode
+_FILTER_SQL = {"All": "", "Active": "WHERE done = 0", "Done": "WHERE done = 1"}
+#pending tasks due in [start, end); matches the partial index above
+_DUE_SQL = "FROM tasks WHERE due IS NOT NULL AND done = 0 AND due >= ? AND due < ?"
+
+
+class SqliteBackend:
+    """Task storage in a local SQLite file.
+
+    Every change is a single-row INSERT/UPDATE/DELETE, and a batch of
+    changes is one transaction. Status and pending due times are indexed,
+    and count()/page()/count_due()/due_page() let callers fetch just the
+    rows they show; TaskStore.page() and count() go through them.
+
+    SQLite already keeps concurrent writers apart; the sidecar FileLock is
+    only used for the shared id counter. Commits made by other processes
+    show up in PRAGMA data_version, and poll() then reloads for a diff.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        #the store's writer thread writes, the GUI thread reads; TaskStore
+        #serializes access so one shared connection is fine
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "done_at" not in columns:
+            #files made before tasks remembered when they were finished
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN done_at REAL")
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._data_version = None
+
+    #Backend interface
+    def load(self) -> list:
+        with self._lock:
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            rows = self._conn.execute("SELECT id, text, done, due, done_at FROM tasks ORDER BY id").fetchall()
+        return [_row_dict(r) for r in rows]
+
+    def lock(self) -> FileLock:
+        return self._file_lock
+
+    def reserve_ids(self, n: int, floor: int) -> int:
+        return self._file_lock.take_ids(n, floor)
+
+    def poll(self):
+        """("reload", items) once another connection has committed, else None"""
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return None
+        return "reload", self.load()
+
+    def caught_up(self) -> bool:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0] == self._data_version
+
+    def apply(self, ops: list):
+        """Apply journal-style records in one transaction"""
+        if not ops:
+            return
+        with self._lock, self._conn:
+            cur = self._conn.cursor()
+            for rec in ops:
+                op = rec["op"]
+                if op == "add":
+                    cur.execute(_INSERT, _row_params(rec["t"]))
+                elif op == "ext":
+                    cur.executemany(_INSERT, [_row_params(t) for t in rec["t"]])
+                elif op == "upd":
+                    fields = {k: v for k, v in rec["f"].items() if k in COLUMNS}
+                    if fields:
+                        sets = ", ".join(f"{k} = ?" for k in fields)
+                        cur.execute(f"UPDATE tasks SET {sets} WHERE id = ?",
+                                    [_to_sql(k, v) for k, v in fields.items()] + [rec["id"]])
+                elif op == "del":
+                    cur.execute("DELETE FROM tasks WHERE id = ?", (rec["id"],))
+                elif op == "dels":
+                    cur.executemany("DELETE FROM tasks WHERE id = ?", [(id,) for id in rec["ids"]])
+        if stats.enabled:
+            stats.count("sqlite_records", len(ops))
+
+    def needs_compaction(self) -> bool:
+        #rows are updated in place, there is no log to fold
+        return False
+
+    def begin_snapshot(self):
+        return None
+
+    def write_snapshot(self, items: list, token=None):
+        """Replace the whole table (used by save_tasks and migration)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.executemany(_INSERT, [_row_params(t) for t in items])
+        if stats.enabled:
+            stats.count("snapshots")
+            stats.count("sqlite_rows_written", len(items))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self._file_lock.close()
+
+    #paged queries
+    def count(self, mode: str = "All") -> int:
+        sql = f"SELECT COUNT(*) FROM tasks {_FILTER_SQL[mode]}"
+        with self._lock:
+            return self._conn.execute(sql).fetchone()[0]
+
+    def page(self, mode: str = "All", offset: int = 0, limit: int = 50) -> list:
+        """One page of task dicts for a filter, in id order"""
+        sql = (f"SELECT id, text, done, due, done_at FROM tasks {_FILTER_SQL[mode]} "
+               "ORDER BY id LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, (limit, offset)).fetchall()
+        return [_row_dict(r) for r in rows]
+
+    def count_due(self, start: float, end: float) -> int:
+        """Pending tasks due in [start, end)"""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) {_DUE_SQL}", (start, end)).fetchone()[0]
+
+    def due_page(self, start: float, end: float, offset: int = 0, limit: int = 50) -> list:
+        """Pending tasks due in [start, end), soonest first"""
+        sql = f"SELECT id, text, done, due, done_at {_DUE_SQL} ORDER BY due, id LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (start, end, limit, offset)).fetchall()
+        return [_row_dict(r) for r in rows]
+
+
+_INSERT = "INSERT OR REPLACE INTO tasks (id, text, done, due, done_at) VALUES (?, ?, ?, ?, ?)"
+
+
+def _row_params(t: dict):
+    return (t["id"], t["text"], 1 if t.get("done") else 0, t.get("due"), t.get("done_at"))
+
+
+def _to_sql(name, value):
+    if name == "done":
+        return 1 if value else 0
+    return value
+
+
+def _row_dict(row) -> dict:
+    d = {"id": row[0], "text": row[1]}
+    if row[2]:
+        d["done"] = True
+    if row[3] is not None:
+        d["due"] = row[3]
+    if row[4] is not None:
+        d["done_at"] = row[4]
+    return d
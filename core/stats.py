@@ -0,0 +1,175 @@
+"""Timers and counters for the hot paths, off unless asked for.
+
+    TASKS_STATS=1            collect while running
+    TASKS_STATS_FILE=x.json  collect, and write the numbers there on exit
+    TASKS_PROFILE=x.prof     record a cProfile trace of the whole session
+
+While disabled, a @timed function costs one global lookup and a branch on
+top of the call, and count() returns straight away. The Qt window shows
+the numbers with Ctrl+Shift+D, the console menu prints them as JSON with
+the hidden choice 0, and core.cli has --stats.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+from collections import deque
+from time import perf_counter
+
+#samples kept per timer for the percentiles; count/total/max cover everything
+SAMPLES = 1000
+
+enabled = False
+
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_profiler = None
+
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+
+def enable(on: bool = True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            t = _timers[name] = _Timer()
+        t.count += 1
+        t.total += seconds
+        if seconds > t.max:
+            t.max = seconds
+        t.samples.append(seconds)
+
+
+def count(name: str, n: int = 1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def timed(name: str):
+    """Decorator: time every call under `name` while stats are enabled"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+        return inner
+    return wrap
+
+
+class timer:
+    """`with stats.timer("action.toggle"):` for a block instead of a function"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter() if enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, perf_counter() - self.start)
+
+
+def snapshot() -> dict:
+    """{"timers": {name: {count, p50_ms, p95_ms, max_ms, total_ms}}, "counters": {...}}"""
+    with _lock:
+        timers = {name: (t.count, t.total, t.max, sorted(t.samples))
+                  for name, t in _timers.items()}
+        counters = dict(_counters)
+    out = {}
+    for name, (n, total, mx, samples) in sorted(timers.items()):
+        out[name] = {
+            "count": n,
+            "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+            "max_ms": round(mx * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+        }
+    return {"enabled": enabled, "timers": out, "counters": dict(sorted(counters.items()))}
+
+
+def dump(f=None, extra: dict = None):
+    """Write snapshot() as JSON to f (stdout by default)"""
+    data = snapshot()
+    if extra:
+        data.update(extra)
+    f = sys.stdout if f is None else f
+    f.write(json.dumps(data, indent=2) + "\n")
+
+
+def format_table(data: dict = None) -> str:
+    """snapshot() as plain text columns, for the debug dialog"""
+    data = snapshot() if data is None else data
+    lines = [f"{'timer':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+    for name, t in data["timers"].items():
+        lines.append(f"{name:<24}{t['count']:>8}{t['p50_ms']:>10.3f}{t['p95_ms']:>10.3f}{t['max_ms']:>10.3f}")
+    if data["counters"]:
+        lines.append("")
+        for name, n in data["counters"].items():
+            lines.append(f"{name:<24}{n:>8}")
+    return "\n".join(lines)
+
+
+def setup_from_env():
+    """Apply TASKS_STATS / TASKS_STATS_FILE / TASKS_PROFILE (front ends call this once)"""
+    global _profiler
+    path = os.environ.get("TASKS_STATS_FILE")
+    if os.environ.get("TASKS_STATS") or path:
+        enable()
+    if path:
+        atexit.register(_dump_to, path)
+    profile = os.environ.get("TASKS_PROFILE")
+    if profile and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(_stop_profile, profile)
+
+
+def _dump_to(path):
+    with open(path, "w", encoding="utf-8") as f:
+        dump(f)
+
+
+def _stop_profile(path):
+    _profiler.disable()
+    _profiler.dump_stats(path)
+    print(f"Profile written to {path} (python -m pstats {path})", file=sys.stderr)
+
+
+def _percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
@@ -0,0 +1,963 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from bisect import bisect_left
+from heapq import merge
+from itertools import islice
+from pathlib import Path
+
+from . import stats
+from .archive import ARCHIVE_AFTER, Archive
+from .index import FilterView, StatusIndex
+from .backends import open_backend
+from .due import DUE_FILTERS, DueIndex, DueView, due_window, parse_due
+from .dupes import DuplicateIndex, normalize
+from .loader import BATCH_SIZE, Loader
+from .recurring import Recurring
+from .search import SearchIndex
+from .sorting import SortedView
+from .undo import UndoLog
+from .records import Task, decode_tasks, encode_tasks
+from .writer import BackgroundWriter, DEBOUNCE
+
+log = logging.getLogger(__name__)
+
+#external changes bigger than this are shown with one reset instead of row by row
+MERGE_RESET = 200
+#fields a journal "upd" record may set
+FIELDS = ("text", "done", "due", "done_at")
+#sidecar with the counts other windows summarize this schedule by
+META_SUFFIX = ".meta"
+
+
+class TaskStore:
+    """The task list plus the backend that persists changes to it.
+
+    `store.tasks` is a list of Task records kept in id order. Front ends
+    read it directly but go through the mutation methods below so each
+    change becomes one journal record (or one SQLite row write) instead of
+    a full rewrite of schedule.json.
+
+    With `write_behind` on (the default) a mutation only queues its record
+    and marks the store dirty; a BackgroundWriter thread writes each burst
+    of changes in one go after `debounce` seconds, and folds the journal
+    into a new snapshot when it gets too big. Call flush() before exiting;
+    it is also registered with atexit.
+
+    Other processes may have the same schedule open. Ids come from a
+    counter in the backend's lock file, writes happen under that lock, and
+    sync() merges what the others saved, one task at a time.
+
+    Tasks finished more than `archive_after` seconds ago are moved to
+    `store.archive` when the store loads, so the list, its indexes and
+    every save only carry the working set. Repeating tasks live in
+    `store.recurring` as one rule each and never enter `tasks`;
+    add_text(text, repeat=True) puts one there.
+
+    Each write also refreshes schedule.json.meta, a few counts (see
+    meta()) that let Schedules summarize a schedule without loading it.
+    """
+
+    def __init__(self, path, write_behind: bool = True, debounce: float = DEBOUNCE,
+                 archive_after=ARCHIVE_AFTER):
+        self.path = Path(path)
+        self.tasks = []
+        #journal for .json, SQLite for .db, chosen by open_backend()
+        self.backend = open_backend(self.path)
+        #finished tasks older than archive_after seconds move here on load; None keeps them
+        self.archive = Archive(self.path)
+        self.archive_after = archive_after
+        #repeating tasks: rules stored once, occurrences generated on demand
+        self.recurring = Recurring(self.path, self.backend.lock())
+        self.meta_path = self.path.with_name(self.path.name + META_SUFFIX)
+        self._meta_written = None
+        #guards `tasks` against the writer thread copying it mid-change
+        self._lock = threading.RLock()
+        #serializes everything that touches the backend
+        self._io_lock = threading.Lock()
+        self._pending = []
+        #why the last write failed, until one succeeds; the unwritten records stay queued
+        self.write_error = None
+        #open batch() blocks; while > 0 records queue up but aren't written
+        self._batch_depth = 0
+        self._next_id = 1
+        #ordered active/done ids, so filters never rescan the list
+        self.status = StatusIndex()
+        #pending tasks with a due time, soonest first
+        self.due = DueIndex()
+        #everything kept in step with `tasks`: add/remove/changed/rebuild
+        self._indexes = [self.status, self.due]
+        self._listeners = []
+        #inverse operations for undo()/redo(); changes merged by sync() aren't in it
+        self.history = UndoLog()
+        #bumped on every notification so shared views compute row changes once
+        self.change_seq = 0
+        #built on the first search, then kept up to date
+        self.search = None
+        #normalized-text hashes, built on the first duplicate check
+        self.dupes = None
+        self._loader = None
+        self.writer = None
+        if write_behind:
+            self.writer = BackgroundWriter(self._write_pending, debounce=debounce,
+                                           depth_fn=lambda: len(self._pending))
+            self.writer.start()
+            atexit.register(self.flush)
+
+    @stats.timed("load_tasks")
+    def load(self):
+        with self._io_lock, self._lock:
+            self._pending.clear()
+            loaded, migrated = decode_tasks(self.backend.load())
+            #replace in place so module-level aliases of `tasks` stay valid
+            self.tasks[:] = loaded
+            self._next_id = loaded[-1].id + 1 if loaded else 1
+            for ix in self._indexes:
+                ix.rebuild(loaded)
+            self.history.clear()
+        if migrated:
+            #one-time upgrade from "[x] text" strings to records
+            self.save()
+        self._notify("reset")
+        self.archive_done()
+        #another process may have changed the file without counting it
+        with self._io_lock, self.backend.lock():
+            self._write_meta()
+
+    def begin_load(self, batch_size: int = BATCH_SIZE) -> Loader:
+        """Start loading in the background and return the Loader to drive.
+
+        The store starts out empty; the GUI installs tasks batch by batch
+        with loader.step() while its window is already up.
+        """
+        with self._io_lock, self._lock:
+            self._pending.clear()
+            self.tasks[:] = []
+            self._next_id = 1
+            for ix in self._indexes:
+                ix.rebuild([])
+            self.history.clear()
+            self._loader = Loader(self, batch_size)
+        self._notify("reset")
+        return self._loader
+
+    @property
+    def loading(self) -> bool:
+        return self._loader is not None
+
+    def _reserve_ids(self, max_id: int):
+        #parsing finished: new tasks must sort after everything being loaded
+        with self._lock:
+            self._next_id = max(self._next_id, max_id + 1)
+
+    def _install(self, batch: list):
+        #loaded tasks all have smaller ids than anything added meanwhile,
+        #so a batch goes in as one run right before those
+        if not batch:
+            return
+        with self._lock:
+            offset = bisect_left(self.tasks, batch[0].id, key=_task_id)
+            at_end = offset == len(self.tasks)
+            self.tasks[offset:offset] = batch
+            for task in batch:
+                self._index_add(task)
+        if at_end:
+            self._notify("extend", offset, batch)
+        else:
+            #something was added while loading; one redraw beats a row per task
+            self._notify("reset")
+
+    def _load_finished(self, loader: Loader):
+        self._loader = None
+        if loader.migrated:
+            self.save()
+        self.archive_done()
+        with self._io_lock, self.backend.lock():
+            self._write_meta()
+
+    @stats.timed("save_tasks")
+    def save(self):
+        """Write a full snapshot of the current list"""
+        if self._loader is not None:
+            #a snapshot of a half-installed list would lose tasks
+            self._loader.finish()
+        with self._io_lock, self.backend.lock():
+            #fold in what other processes saved, or the snapshot would drop it
+            self._write_ops()
+            change = self.backend.poll()
+            if change:
+                self._merge(change)
+            token, copy = self._begin_snapshot()
+            self.backend.write_snapshot(copy, token)
+
+    @stats.timed("archive_done")
+    def archive_done(self, older_than: float = None) -> int:
+        """Move tasks finished more than `older_than` seconds ago (default
+        archive_after) into the archive; returns how many moved.
+
+        The tasks are written to the archive first and only then dropped
+        from the schedule, both under the schedule's lock, so a crash in
+        between leaves them in both places rather than in neither. Moving
+        them is not an undo step.
+        """
+        age = self.archive_after if older_than is None else older_than
+        if age is None or not len(self.status.done):
+            return 0
+        if self._loader is not None:
+            self._loader.finish()
+        cutoff = time.time() - age
+        with self._io_lock, self.backend.lock():
+            #see other processes' edits first; one of them may have reopened a task
+            self._write_ops()
+            change = self.backend.poll()
+            if change:
+                self._merge(change)
+            with self._lock:
+                positions = [i for i, t in enumerate(self.tasks)
+                             if t.done and t.done_at is not None and t.done_at <= cutoff]
+                if not positions:
+                    return 0
+                self.archive.append([self.tasks[p] for p in positions])
+                removed = self._compact(positions)
+                self._record("dels", ids=[t.id for t in removed])
+            self._write_ops()
+        self._notify("reset")
+        return len(removed)
+
+    @stats.timed("sync")
+    def sync(self) -> int:
+        """Merge in changes other processes saved to the same schedule.
+
+        GUIs call this from a timer. Only tasks that changed are touched and
+        announced, so list views redraw just those rows. Returns the number
+        of changes merged; 0 as well when the files are busy right now.
+        """
+        if self._loader is not None:
+            return 0
+        if not self._io_lock.acquire(blocking=False):
+            return 0
+        try:
+            lock = self.backend.lock()
+            if not lock.acquire(blocking=False):
+                return 0
+            try:
+                if not self._write_ops():
+                    #an open batch() still has unwritten changes
+                    return 0
+                change = self.backend.poll()
+            finally:
+                lock.release()
+            return self._merge(change) if change else 0
+        finally:
+            self._io_lock.release()
+
+    def flush(self) -> bool:
+        """Block until every queued change is written; False if the write failed
+        (see write_error) and changes are still waiting"""
+        if self.writer is not None:
+            self.writer.flush()
+        elif self._pending:
+            self._write_pending()
+        return self.write_error is None
+
+    def close(self):
+        if self._loader is not None:
+            #its thread may still be reading the backend
+            self._loader.wait()
+        if self.writer is not None:
+            self.writer.stop()
+            #or atexit would keep every closed store alive
+            atexit.unregister(self.flush)
+        elif self._pending:
+            #a failed write left these behind; one last try
+            self._write_pending()
+        self.backend.close()
+
+    def meta(self) -> dict:
+        """Counts a cross-schedule summary shows; what schedule.json.meta holds"""
+        with self._lock:
+            entry = self.due.next_due()
+            return {"tasks": len(self.tasks), "active": len(self.status.active),
+                    "done": len(self.status.done), "next_due": entry[0] if entry else None}
+
+    def write_stats(self) -> dict:
+        """Write latency and queue depth of the background writer"""
+        if self.writer is None:
+            data = {"queue_depth": len(self._pending), "writes": 0}
+        else:
+            data = self.writer.stats()
+        data["last_error"] = None if self.write_error is None else str(self.write_error)
+        return data
+
+    #lookups
+    def find(self, id: int) -> int:
+        """Position of the task with this id, or -1"""
+        i = bisect_left(self.tasks, id, key=_task_id)
+        if i < len(self.tasks) and self.tasks[i].id == id:
+            return i
+        return -1
+
+    def subscribe(self, fn):
+        """Call fn(kind, pos, task, before) after every change.
+
+        kind is "insert", "extend", "update", "remove" or "reset". pos is the
+        task's position in `tasks` (its old position for "remove"). For
+        "extend", pos is where the appended run starts and task is the list
+        of new tasks. `before` holds the previous values of the fields an
+        "update" changed.
+        """
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, kind, pos=None, task=None, before=None):
+        self.change_seq += 1
+        for fn in list(self._listeners):
+            fn(kind, pos, task, before)
+
+    @stats.timed("compute_visible")
+    def visible(self, mode: str = "All", query: str = "", sort: str = "Added", group: str = "None"):
+        """Lazy row -> position mapping for one of FILTERS or DUE_FILTERS, optionally
+        searched, and ordered by one of SORTS / grouped by one of GROUPS"""
+        if mode in DUE_FILTERS:
+            view = DueView(self, mode, query)
+        else:
+            view = FilterView(self, mode, query)
+        if sort == "Added" and group == "None":
+            return view
+        return SortedView(self, view, sort, group)
+
+    def search_index(self) -> SearchIndex:
+        if self.search is None:
+            with self._lock:
+                self.search = SearchIndex()
+                self.search.rebuild(self.tasks)
+                self._indexes.append(self.search)
+        return self.search
+
+    def duplicate_index(self) -> DuplicateIndex:
+        if self.dupes is None:
+            with self._lock:
+                self.dupes = DuplicateIndex()
+                self.dupes.rebuild(self.tasks)
+                self._indexes.append(self.dupes)
+        return self.dupes
+
+    def duplicates(self, text: str, exclude: int = None) -> list:
+        """Tasks whose text is the same as `text` once normalized, oldest first.
+
+        `exclude` leaves out one id (the task being edited).
+        """
+        key = normalize(text)
+        found = []
+        with self._lock:
+            for id in self.duplicate_index().candidates(key):
+                pos = self.find(id)
+                if id != exclude and pos >= 0 and normalize(self.tasks[pos].text) == key:
+                    found.append(self.tasks[pos])
+        return sorted(found, key=_task_id)
+
+    def count(self, mode: str = "All") -> int:
+        """Rows in one of FILTERS or DUE_FILTERS; see page()"""
+        if self._queryable():
+            if mode not in DUE_FILTERS:
+                return self.backend.count(mode)
+            start, end, cap = due_window(mode)
+            found = self.backend.count_due(start, end)
+            return found if cap is None else min(found, cap)
+        return len(self.visible(mode))
+
+    def page(self, mode: str = "All", offset: int = 0, limit: int = 50) -> list:
+        """Tasks for rows offset..offset+limit of a filter.
+
+        A backend that can query (SQLite) answers from its status and due
+        indexes, so only the page is read from disk; the tasks it returns
+        are copies, to show rather than change. Otherwise the rows come off
+        the in-memory views.
+        """
+        if self._queryable():
+            if mode not in DUE_FILTERS:
+                rows = self.backend.page(mode, offset, limit)
+            else:
+                start, end, cap = due_window(mode)
+                if cap is not None:
+                    limit = max(0, min(limit, cap - offset))
+                rows = self.backend.due_page(start, end, offset, limit) if limit else []
+            return [Task.from_dict(d) for d in rows]
+        view = self.visible(mode)
+        return [self.tasks[pos] for pos in islice(view.iter_from(offset), limit)]
+
+    def _queryable(self) -> bool:
+        #the backend can page, and holds every change made here so far
+        if not hasattr(self.backend, "page"):
+            return False
+        #the writer thread holds _io_lock while its records are on their way in
+        with self._io_lock, self.backend.lock():
+            self._write_ops()
+        return not self._pending
+
+    def next_due(self):
+        """The pending task due soonest, or None"""
+        with self._lock:
+            entry = self.due.next_due()
+            return self.tasks[self.find(entry[1])] if entry else None
+
+    #mutations
+    @stats.timed("store.add")
+    def add(self, text: str, done: bool = False, due=None) -> Task:
+        """Add a task; `due` defaults to a time found in the text ("3pm")"""
+        if self._loader is not None:
+            self._loader.wait()
+        if due is None:
+            due = parse_due(text)
+        task = Task(self._alloc_ids(1), text, done, due, time.time() if done else None)
+        with self._lock:
+            #normally the end, unless another process's tasks got bigger ids first
+            pos = bisect_left(self.tasks, task.id, key=_task_id)
+            self.tasks.insert(pos, task)
+            self._next_id = max(self._next_id, task.id + 1)
+            self._index_add(task)
+            self._record("add", t=task.to_dict())
+            self.history.record(("del", task.id))
+        self._changed()
+        self._notify("insert", pos, task)
+        return task
+
+    def add_many(self, texts) -> list:
+        """Add several tasks as one journal record"""
+        return self.add_records({"text": text} for text in texts)
+
+    def add_text(self, text: str, repeat: bool = False):
+        """add() for what a user typed. With `repeat` the text ("gym daily 7am")
+        becomes a rule in `recurring` and a Rule is returned (ValueError if it
+        doesn't say how often); otherwise it is a Task, whatever it says.
+        Front ends ask first when parse_rule() finds a rule in the text."""
+        if repeat:
+            return self.recurring.add(text)
+        return self.add(text)
+
+    def add_texts(self, texts, repeat: bool = False) -> tuple:
+        """add_text() for several texts, one write; returns (tasks, rules)"""
+        texts = list(texts)
+        if repeat:
+            return [], self.recurring.add_many(texts) if texts else []
+        return self.add_many(texts), []
+
+    @stats.timed("store.add_records")
+    def add_records(self, rows, dedupe: bool = False) -> list:
+        """Add tasks from dicts with "text" and optional "done"/"due", as one journal record.
+
+        `rows` can be any iterable (a csv.DictReader, a generator over
+        stdin); a missing due time is read from the text like add() does.
+        With `dedupe`, rows whose text is already on the schedule (or
+        earlier in `rows`) are skipped.
+        """
+        if self._loader is not None:
+            self._loader.wait()
+        new = []
+        now = time.time()
+        seen = set()
+        for row in rows:
+            text = row["text"]
+            if dedupe:
+                key = normalize(text)
+                if key in seen or self.duplicates(text):
+                    continue
+                seen.add(key)
+            due = row.get("due")
+            done = bool(row.get("done"))
+            done_at = row.get("done_at", now) if done else None
+            new.append(Task(0, text, done, parse_due(text) if due is None else due, done_at))
+        if not new:
+            return new
+        first = self._alloc_ids(len(new))
+        for i, task in enumerate(new):
+            task.id = first + i
+        with self._lock:
+            start = bisect_left(self.tasks, first, key=_task_id)
+            at_end = start == len(self.tasks)
+            self.tasks[start:start] = new
+            self._next_id = max(self._next_id, new[-1].id + 1)
+            for task in new:
+                self._index_add(task)
+            self._record("ext", t=encode_tasks(new))
+            self.history.record(("delrange", first, len(new)))
+        self._changed()
+        if at_end:
+            self._notify("extend", start, new)
+        else:
+            self._notify("reset")
+        return new
+
+    @stats.timed("store.update")
+    def update(self, i: int, **fields) -> Task:
+        """Change text/done/due of the task at position i in place.
+
+        Editing the text re-reads its due time unless `due` is given too,
+        and finishing a task stamps done_at.
+        """
+        if i < 0:
+            i += len(self.tasks)
+        if "text" in fields and "due" not in fields:
+            fields["due"] = parse_due(fields["text"])
+        with self._lock:
+            task = self.tasks[i]
+            fields = _stamp(task, fields)
+            before = {name: getattr(task, name) for name in fields}
+            for name, value in fields.items():
+                setattr(task, name, value)
+            for ix in self._indexes:
+                ix.changed(task, before)
+            self._record("upd", id=task.id, f=fields)
+            self.history.record(("upd", task.id, before))
+        self._changed()
+        self._notify("update", i, task, before)
+        return task
+
+    def toggle(self, i: int) -> Task:
+        return self.update(i, done=not self.tasks[i].done)
+
+    @stats.timed("store.remove")
+    def remove(self, i: int) -> Task:
+        if i < 0:
+            i += len(self.tasks)
+        with self._lock:
+            task = self.tasks.pop(i)
+            for ix in self._indexes:
+                ix.remove(task)
+            self._record("del", id=task.id)
+            self.history.record(("add", task.to_dict()))
+        self._changed()
+        self._notify("remove", i, task)
+        return task
+
+    def restore(self, task: Task) -> Task:
+        """Put a removed task back under its own id, which is also its old place"""
+        with self._lock:
+            pos = bisect_left(self.tasks, task.id, key=_task_id)
+            if pos < len(self.tasks) and self.tasks[pos].id == task.id:
+                return self.tasks[pos]
+            self.tasks.insert(pos, task)
+            self._next_id = max(self._next_id, task.id + 1)
+            self._index_add(task)
+            self._record("add", t=task.to_dict())
+            self.history.record(("del", task.id))
+        self._changed()
+        self._notify("insert", pos, task)
+        return task
+
+    #bulk changes: one pass over the list, one batch, one "reset" for the views
+    @stats.timed("store.remove_many")
+    def remove_many(self, positions) -> list:
+        """Remove the tasks at these positions; returns them in list order.
+
+        The list is compacted with one copy instead of a pop per task, so
+        clearing k of n tasks costs O(n) rather than O(k*n).
+        """
+        positions = self._positions(positions)
+        if len(positions) < 2:
+            return [self.remove(p) for p in positions]
+        with self.batch():
+            with self._lock:
+                removed = self._compact(positions)
+                self._record("dels", ids=[t.id for t in removed])
+                self.history.record(("addmany", [t.to_dict() for t in removed]))
+        self._notify("reset")
+        return removed
+
+    @stats.timed("store.update_many")
+    def update_many(self, positions, **fields) -> list:
+        """update() with the same fields for every position given"""
+        positions = self._positions(positions)
+        if len(positions) < 2:
+            return [self.update(p, **fields) for p in positions]
+        return self._update_each([(p, fields) for p in positions])
+
+    def toggle_many(self, positions) -> list:
+        """Mark the tasks done, or undone when they all are already"""
+        positions = self._positions(positions)
+        done = not all(self.tasks[p].done for p in positions)
+        return self.update_many(positions, done=done)
+
+    def clear_done(self) -> list:
+        """Remove every finished task"""
+        if self._loader is not None:
+            self._loader.wait()
+        with self._lock:
+            positions = [i for i, t in enumerate(self.tasks) if t.done]
+        return self.remove_many(positions)
+
+    @stats.timed("store.merge_duplicates")
+    def merge_duplicates(self) -> int:
+        """Fold tasks with the same normalized text into the oldest of them.
+
+        The kept task stays open if any copy was, and takes the earliest
+        due time among the copies that count. Everything goes out as one
+        batch: one write, one undo step. Returns how many tasks were removed.
+        """
+        if self._loader is not None:
+            self._loader.wait()
+        ix = self.duplicate_index()
+        changes = []
+        drop = []
+        with self._lock:
+            tasks = self.tasks
+            for ids in ix.crowded():
+                #a bucket can mix texts whose hashes collide; group by the text itself
+                groups = {}
+                for id in sorted(ids):
+                    pos = self.find(id)
+                    groups.setdefault(normalize(tasks[pos].text), []).append(pos)
+                for positions in groups.values():
+                    if len(positions) < 2:
+                        continue
+                    copies = [tasks[p] for p in positions]
+                    done = all(t.done for t in copies)
+                    dues = [t.due for t in copies if t.due is not None and (done or not t.done)]
+                    fields = {"done": done}
+                    if dues:
+                        fields["due"] = min(dues)
+                    changes.append((positions[0], fields))
+                    drop += positions[1:]
+        if not drop:
+            return 0
+        with self.batch():
+            #positions are still good: nothing is removed until the updates are in
+            self._update_each(changes)
+            self.remove_many(drop)
+        return len(drop)
+
+    def restore_many(self, tasks) -> list:
+        """restore() for a list of tasks, merged back in one pass"""
+        tasks = sorted(tasks, key=_task_id)
+        with self.batch():
+            with self._lock:
+                new = [t for t in tasks if self.find(t.id) < 0]
+                if not new:
+                    return []
+                self.tasks[:] = merge(self.tasks, new, key=_task_id)
+                self._next_id = max(self._next_id, new[-1].id + 1)
+                for ix in self._indexes:
+                    ix.add_many(new)
+                for task in new:
+                    self._record("add", t=task.to_dict())
+                self.history.record(("delmany", [t.id for t in new]))
+        self._notify("reset")
+        return new
+
+    def _update_each(self, changes) -> list:
+        #changes: [(position, fields)]; tasks whose fields already match are skipped
+        with self.batch():
+            with self._lock:
+                done = []
+                for pos, fields in changes:
+                    task = self.tasks[pos]
+                    if "text" in fields and "due" not in fields:
+                        fields = dict(fields, due=parse_due(fields["text"]))
+                    fields = _stamp(task, fields)
+                    before = {name: getattr(task, name) for name in fields}
+                    if before == fields:
+                        continue
+                    for name, value in fields.items():
+                        setattr(task, name, value)
+                    done.append((task, before))
+                    self._record("upd", id=task.id, f=fields)
+                if not done:
+                    return []
+                for ix in self._indexes:
+                    ix.changed_many(done)
+                self.history.record(("updmany", [(task.id, before) for task, before in done]))
+        self._notify("reset")
+        return [task for task, _ in done]
+
+    def _compact(self, positions: list) -> list:
+        #caller holds self._lock; positions sorted and unique
+        tasks = self.tasks
+        removed = [tasks[p] for p in positions]
+        kept = []
+        start = 0
+        for p in positions:
+            kept += tasks[start:p]
+            start = p + 1
+        kept += tasks[start:]
+        tasks[:] = kept
+        for ix in self._indexes:
+            ix.remove_many(removed)
+        return removed
+
+    def _positions(self, positions) -> list:
+        #sorted, deduplicated, negatives counted from the end like list indexing
+        n = len(self.tasks)
+        return sorted({p + n if p < 0 else p for p in positions})
+
+    #undo / redo
+    def undo(self) -> bool:
+        """Take back the last change (or batch); False if there's nothing to undo"""
+        return self._replay("undo")
+
+    def redo(self) -> bool:
+        return self._replay("redo")
+
+    def _replay(self, which: str) -> bool:
+        entry = self.history.pop(which)
+        if entry is None:
+            return False
+        #the inverse gets recorded on the other stack; one write for the whole step
+        with self.history.replaying(which), self.batch():
+            self._revert(entry)
+        return True
+
+    def _revert(self, entry):
+        kind = entry[0]
+        if kind == "grp":
+            for e in reversed(entry[1]):
+                self._revert(e)
+        elif kind == "add":
+            self.restore(Task.from_dict(entry[1]))
+        elif kind == "del":
+            pos = self.find(entry[1])
+            if pos >= 0:
+                self.remove(pos)
+        elif kind == "addmany":
+            self.restore_many([Task.from_dict(d) for d in entry[1]])
+        elif kind in ("delrange", "delmany"):
+            ids = range(entry[1], entry[1] + entry[2]) if kind == "delrange" else entry[1]
+            self.remove_many([pos for pos in map(self.find, ids) if pos >= 0])
+        elif kind == "upd":
+            pos = self.find(entry[1])
+            if pos >= 0:
+                self.update(pos, **entry[2])
+        elif kind == "updmany":
+            found = [(self.find(id), before) for id, before in entry[1]]
+            self._update_each([(pos, before) for pos, before in found if pos >= 0])
+
+    @contextmanager
+    def batch(self):
+        """Write every change made inside the block as one backend commit.
+
+        The records still go out in order, but as one journal append or
+        one SQLite transaction when the outermost batch() exits, and the
+        whole block is one undo step.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            self.history.begin()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                self.history.end()
+                outermost = self._batch_depth == 0
+            if outermost:
+                self._changed()
+
+    def _alloc_ids(self, n: int) -> int:
+        #first of n fresh ids from the counter every process on this file shares
+        return self.backend.reserve_ids(n, self._next_id)
+
+    def _index_add(self, task):
+        for ix in self._indexes:
+            ix.add(task)
+
+    def _record(self, op, **fields):
+        #caller holds self._lock
+        rec = {"op": op}
+        rec.update(fields)
+        self._pending.append(rec)
+
+    def _changed(self):
+        if self._batch_depth:
+            return
+        if self.writer is None:
+            self._write_pending()
+        else:
+            self.writer.mark_dirty()
+
+    #writing (writer thread, or inline without write-behind)
+    @stats.timed("write_pending")
+    def _write_pending(self):
+        with self._io_lock, self.backend.lock():
+            if not self._write_ops():
+                return
+            #only fold the journal while we've seen everything other
+            #processes wrote; otherwise the snapshot would drop their changes
+            if (self.backend.needs_compaction() and self._loader is None
+                    and self.backend.caught_up()):
+                token, copy = self._begin_snapshot()
+                self.backend.write_snapshot(copy, token)
+
+    def _write_ops(self) -> bool:
+        #caller holds self._io_lock and the backend lock; False while a batch is open
+        with self._lock:
+            if self._batch_depth:
+                #the batch writes everything when it closes
+                return False
+            ops, self._pending = self._pending, []
+        try:
+            self.backend.apply(ops)
+        except Exception as e:
+            with self._lock:
+                #back in front of anything queued since, so the next write retries them in order
+                self._pending[:0] = ops
+            if self.write_error is None:
+                log.error("Error saving tasks (will retry): %s", e)
+            self.write_error = e
+            if self.writer is not None:
+                self.writer.mark_dirty()
+            return False
+        if ops:
+            if self.write_error is not None:
+                log.info("Saved tasks again after an error")
+                self.write_error = None
+            self._write_meta()
+        return True
+
+    def _write_meta(self):
+        #caller holds self._io_lock and the backend lock; skipped while loading (the counts would be short) or when nothing it holds changed
+        if self._loader is not None:
+            return
+        meta = self.meta()
+        if meta == self._meta_written:
+            return
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp, self.meta_path)
+            self._meta_written = meta
+        except OSError as e:
+            log.warning("Error saving %s: %s", self.meta_path.name, e)
+
+    #merging changes from other processes (caller holds self._io_lock)
+    def _merge(self, change) -> int:
+        kind, payload = change
+        if kind == "reload":
+            ops = self._diff(decode_tasks(payload)[0])
+        else:
+            ops = [op for rec in payload for op in _split(rec)]
+        if len(ops) > MERGE_RESET:
+            for op in ops:
+                self._apply_external(op)
+            self._notify("reset")
+        else:
+            for op in ops:
+                event = self._apply_external(op)
+                if event is not None:
+                    self._notify(*event)
+        return len(ops)
+
+    def _diff(self, loaded: list) -> list:
+        #records that turn `tasks` into `loaded`; both are sorted by id
+        ops = []
+        with self._lock:
+            old = self.tasks
+            i = j = 0
+            while i < len(old) or j < len(loaded):
+                if j == len(loaded) or (i < len(old) and old[i].id < loaded[j].id):
+                    ops.append({"op": "del", "id": old[i].id})
+                    i += 1
+                elif i == len(old) or loaded[j].id < old[i].id:
+                    ops.append({"op": "add", "t": loaded[j].to_dict()})
+                    j += 1
+                else:
+                    a, b = old[i], loaded[j]
+                    fields = {name: getattr(b, name) for name in FIELDS
+                              if getattr(a, name) != getattr(b, name)}
+                    if fields:
+                        ops.append({"op": "upd", "id": a.id, "f": fields})
+                    i += 1
+                    j += 1
+        return ops
+
+    def _apply_external(self, rec):
+        #one add/upd/del(s) another process saved; returns the notification for it
+        op = rec.get("op")
+        with self._lock:
+            if op == "add":
+                task = Task.from_dict(rec["t"])
+                pos = self.find(task.id)
+                if pos >= 0:
+                    #already here (a reload raced a tail read): take their version
+                    rec = {"op": "upd", "id": task.id,
+                           "f": {name: getattr(task, name) for name in FIELDS}}
+                    op = "upd"
+                else:
+                    pos = bisect_left(self.tasks, task.id, key=_task_id)
+                    self.tasks.insert(pos, task)
+                    self._next_id = max(self._next_id, task.id + 1)
+                    self._index_add(task)
+                    return "insert", pos, task, None
+            if op == "upd":
+                pos = self.find(rec["id"])
+                if pos < 0:
+                    return None
+                task = self.tasks[pos]
+                fields = {k: v for k, v in rec["f"].items()
+                          if k in FIELDS and getattr(task, k) != v}
+                if not fields:
+                    return None
+                before = {name: getattr(task, name) for name in fields}
+                for name, value in fields.items():
+                    setattr(task, name, value)
+                for ix in self._indexes:
+                    ix.changed(task, before)
+                return "update", pos, task, before
+            if op == "del":
+                pos = self.find(rec["id"])
+                if pos < 0:
+                    return None
+                task = self.tasks.pop(pos)
+                for ix in self._indexes:
+                    ix.remove(task)
+                return "remove", pos, task, None
+            if op == "dels":
+                positions = sorted({pos for pos in map(self.find, rec["ids"]) if pos >= 0})
+                if not positions:
+                    return None
+                self._compact(positions)
+                return "reset", None, None, None
+        return None
+
+    def _begin_snapshot(self):
+        #caller holds self._io_lock. Queued records are already reflected in
+        #`tasks`, so they are dropped rather than written after the snapshot.
+        with self._lock:
+            self._pending.clear()
+            token = self.backend.begin_snapshot()
+            return token, encode_tasks(self.tasks)
+
+
+def read_meta(path) -> dict:
+    """The counts TaskStore.meta() last saved for the schedule at `path`, or None"""
+    path = Path(path)
+    try:
+        return json.loads(path.with_name(path.name + META_SUFFIX).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _task_id(t: Task) -> int:
+    return t.id
+
+
+def _stamp(task: Task, fields: dict) -> dict:
+    #a change of `done` also sets done_at, unless the caller (undo) gives it
+    if "done" in fields and "done_at" not in fields and fields["done"] != task.done:
+        return dict(fields, done_at=time.time() if fields["done"] else None)
+    return fields
+
+
+def _split(rec: dict) -> list:
+    #an "ext" record is merged as one "add" per task
+    if rec.get("op") == "ext":
+        return [{"op": "add", "t": t} for t in rec["t"]]
+    if "v" in rec or "i" in rec:
+        #index-based records from before ids; nothing new writes these
+        return []
+    return [rec]
@@ -0,0 +1,125 @@
+from collections import deque
+from contextlib import contextmanager
+
+#bytes of undo history kept before the oldest steps are dropped
+BUDGET = 4 * 1024 * 1024
+
+
+class UndoLog:
+    """Undo/redo stacks of small inverse operations.
+
+    TaskStore records, for every change it makes, the operation that takes
+    it back: ("del", id) for an add, ("add", task_dict) for a remove,
+    ("upd", id, old_fields) for an edit or toggle, and ("grp", [...]) for
+    everything done inside one batch(). Bulk actions record one entry for
+    the lot ("addmany", "delmany", "updmany") so undoing them is also a
+    single pass over the list. Nothing holds a copy of the list,
+    so a step costs about the size of the text it touched. Once the stacks
+    pass `budget` bytes the oldest steps are dropped; a single step bigger
+    than that empties its stack, since what came before it can't be taken
+    back without it.
+    """
+
+    def __init__(self, budget: int = BUDGET):
+        self.budget = budget
+        self._undo = deque()
+        self._redo = deque()
+        self._size = 0
+        self._group = None
+        self._depth = 0
+        #"undo" / "redo" while one is being replayed, so its inverse lands on the other stack
+        self._replaying = None
+
+    def __len__(self):
+        return len(self._undo)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+
+    def record(self, entry: tuple):
+        if self._group is not None:
+            self._group.append(entry)
+        else:
+            self._push(entry)
+
+    def begin(self):
+        """Start collecting entries into one step (nests)"""
+        if self._depth == 0:
+            self._group = []
+        self._depth += 1
+
+    def end(self):
+        self._depth -= 1
+        if self._depth == 0:
+            group, self._group = self._group, None
+            if len(group) == 1:
+                self._push(group[0])
+            elif group:
+                self._push(("grp", group))
+
+    def pop(self, which: str):
+        """Take the newest step off the "undo" or "redo" stack, or None"""
+        stack = self._undo if which == "undo" else self._redo
+        if not stack:
+            return None
+        entry, cost = stack.pop()
+        self._size -= cost
+        return entry
+
+    @contextmanager
+    def replaying(self, which: str):
+        self._replaying = which
+        try:
+            yield
+        finally:
+            self._replaying = None
+
+    def _push(self, entry):
+        cost = _cost(entry)
+        if self._replaying is None:
+            #a fresh change makes the redo history meaningless
+            while self._redo:
+                self._size -= self._redo.pop()[1]
+        stack = self._redo if self._replaying == "undo" else self._undo
+        if cost > self.budget:
+            #too big to keep (a huge import), so it can't be undone, and nothing
+            #older can either: those steps would be replayed on top of it
+            while stack:
+                self._size -= stack.pop()[1]
+            return
+        stack.append((entry, cost))
+        self._size += cost
+        #oldest undo steps go first, then old redo steps
+        while self._size > self.budget and (self._undo or self._redo):
+            stack = self._undo if self._undo else self._redo
+            self._size -= stack.popleft()[1]
+
+
+def _cost(entry) -> int:
+    #rough bytes held by one entry
+    kind = entry[0]
+    if kind == "grp":
+        return 64 + sum(_cost(e) for e in entry[1])
+    if kind == "add":
+        return 200 + len(entry[1].get("text", ""))
+    if kind == "addmany":
+        return 64 + sum(200 + len(d.get("text", "")) for d in entry[1])
+    if kind == "upd":
+        return 150 + _fields_cost(entry[2])
+    if kind == "updmany":
+        return 64 + sum(150 + _fields_cost(before) for _, before in entry[1])
+    if kind == "delmany":
+        return 64 + 36 * len(entry[1])
+    return 72
+
+
+def _fields_cost(fields: dict) -> int:
+    return sum(len(v) for v in fields.values() if isinstance(v, str))
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+#default quiet period before a burst of changes is written out
+DEBOUNCE = 0.25
+#upper bound on how long a steady stream of changes can hold off a write
+MAX_DELAY = 2.0
+
+
+class BackgroundWriter:
+    """Write-behind worker that collapses bursts of changes into one write.
+
+    Callers mark the store dirty after each mutation and return straight
+    away. The worker waits until no new change has arrived for `debounce`
+    seconds (or `max_delay` has passed since the first unwritten change)
+    and then calls `write_fn` once for the whole burst.
+    """
+
+    def __init__(self, write_fn, debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY,
+                 depth_fn=None):
+        self.write_fn = write_fn
+        self.debounce = debounce
+        self.max_delay = max_delay
+        #how many changes are waiting; the store knows, the writer just asks
+        self.depth_fn = depth_fn or (lambda: 0)
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._first = 0.0
+        self._last = 0.0
+        self._writing = False
+        self._stopped = False
+        self._thread = None
+        #stats
+        self.writes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+            self._thread.start()
+
+    def mark_dirty(self):
+        now = time.monotonic()
+        with self._cond:
+            if not self._dirty:
+                self._dirty = True
+                self._first = now
+            self._last = now
+            self._cond.notify()
+
+    def flush(self):
+        """Write anything pending now and wait for it to reach disk"""
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._writing = True
+        try:
+            self._write()
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth_fn(),
+            "writes": self.writes,
+            "last_latency_ms": round(self.last_latency * 1000, 3),
+            "avg_latency_ms": round(self._total_latency / self.writes * 1000, 3) if self.writes else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 3),
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (not self._dirty or self._writing) and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                #wait out the burst
+                while self._dirty and not self._stopped:
+                    now = time.monotonic()
+                    due = min(self._last + self.debounce, self._first + self.max_delay)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                if self._stopped or not self._dirty or self._writing:
+                    continue
+                self._dirty = False
+                self._writing = True
+            try:
+                self._write()
+            except Exception:
+                log.exception("Error saving tasks")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self):
+        start = time.perf_counter()
+        self.write_fn()
+        elapsed = time.perf_counter() - start
+        self.writes += 1
+        self.last_latency = elapsed
+        self._total_latency += elapsed
+        self.max_latency = max(self.max_latency, elapsed)
@@ -0,0 +1,955 @@
+import json
+import sys
+from itertools import islice
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QListView, QStyledItemDelegate, QInputDialog, QMessageBox,
+    QLabel, QComboBox, QFrame, QProgressBar, QLineEdit, QDialog, QPlainTextEdit,
+    QCheckBox, QAbstractItemView
+)
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QTimer, QItemSelection, QItemSelectionModel
+)
+from PySide6.QtGui import QFont, QIcon, QColor, QPalette, QKeySequence, QShortcut
+
+from core import DUE_FILTERS, FILTERS, GROUPS, SORTS, SortedView, format_due, stats
+from core.archive import PAGE_SIZE
+from core.recurring import PAGE_SIZE as OCCURRENCE_PAGE, describe_rule, parse_rule
+from core.reminders import Reminders
+from core.schedules import format_counts
+
+SEARCH_DEBOUNCE_MS = 150  #quiet time after typing before the search runs
+SYNC_INTERVAL_MS = 1000  #how often to look for edits made by other windows
+
+DONE_ROLE = Qt.UserRole + 1
+DUE_COLOR = QColor("#fff3b0")  #background of tasks whose reminder went off
+
+class TaskListModel(QAbstractListModel):
+    """Serves the rows of one filter straight from the store, on demand.
+
+    Nothing is built per task up front; the view asks for the rows it is
+    painting. Store changes are turned into targeted rowsInserted /
+    rowsRemoved / dataChanged signals so only the affected rows repaint.
+    The store has already changed by the time it tells us, so the model
+    keeps its own row count and only moves it between begin* and end*,
+    the way Qt expects.
+    """
+
+    def __init__(self, store, mode="All", parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.view = store.visible(mode)
+        #the row count Qt was last told about
+        self._rows = len(self.view)
+        #ids of tasks whose reminder went off; highlighted until they're done
+        self.due_now = set()
+        store.subscribe(self.on_store_change)
+
+    def set_view(self, view):
+        self.beginResetModel()
+        self.view = view
+        self._rows = len(view)
+        self.endResetModel()
+
+    def set_store(self, store, view):
+        """Serve another schedule, starting from `view` of it"""
+        self.store.unsubscribe(self.on_store_change)
+        self.store = store
+        self.due_now = set()
+        store.subscribe(self.on_store_change)
+        self.set_view(view)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        if not index.isValid() or row >= min(self._rows, len(self.view)):
+            return None
+        if role == Qt.DisplayRole:
+            stats.count("qt.rows_painted")
+            text = f"{row + 1}. {self.store.tasks[self.view[row]]}"
+            if self.view.grouped:
+                return f"{self.view.group_label(row)}  │  {text}"
+            return text
+        if role == DONE_ROLE:
+            return self.store.tasks[self.view[row]].done
+        if role == Qt.BackgroundRole and self.due_now:
+            task = self.store.tasks[self.view[row]]
+            if task.id in self.due_now and not task.done:
+                return DUE_COLOR
+        return None
+
+    def highlight(self, tasks):
+        """Mark tasks whose reminder just went off and repaint their rows"""
+        self.due_now.update(t.id for t in tasks)
+        for task in tasks:
+            row = self.view.row_of(self.store.find(task.id))
+            if row is not None:
+                self.dataChanged.emit(self.index(row), self.index(row), [Qt.BackgroundRole])
+
+    def on_store_change(self, kind, pos, task, before):
+        for op, row, count in self.view.row_changes(kind, pos, task, before):
+            if op == "reset":
+                self.beginResetModel()
+                self._rows = len(self.view)
+                self.endResetModel()
+            elif op == "insert":
+                self.beginInsertRows(QModelIndex(), row, row + count - 1)
+                self._rows += count
+                self.endInsertRows()
+                self._renumber(row + count)
+            elif op == "remove":
+                self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+                self._rows -= count
+                self.endRemoveRows()
+                self._renumber(row)
+            elif op == "update":
+                self.dataChanged.emit(self.index(row), self.index(row + count - 1))
+            elif op == "move":
+                #a sorted view moved one task from `row` to `count`; Qt counts the
+                #destination before the row is taken out
+                self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), count + 1 if count > row else count)
+                self.endMoveRows()
+                first, last = min(row, count), max(row, count)
+                self.dataChanged.emit(self.index(first), self.index(last), [Qt.DisplayRole])
+
+    def _renumber(self, row):
+        #the "N." prefix of every later row shifted; the view only repaints what's on screen
+        last = self._rows - 1
+        if row <= last:
+            self.dataChanged.emit(self.index(row), self.index(last), [Qt.DisplayRole])
+
+class ArchiveModel(QAbstractListModel):
+    """Archived tasks matching a search, fetched a page at a time as the view scrolls"""
+
+    def __init__(self, archive, query="", parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.source = archive.iter_tasks(query)
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(self.tasks[index.row()])
+        if role == DONE_ROLE:
+            return True
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent):
+        with stats.timer("action.archive_page"):
+            page = list(islice(self.source, PAGE_SIZE))
+        if len(page) < PAGE_SIZE:
+            self.exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.tasks), len(self.tasks) + len(page) - 1)
+            self.tasks.extend(page)
+            self.endInsertRows()
+
+class OccurrenceModel(QAbstractListModel):
+    """Upcoming occurrences of the repeating tasks, generated a page at a time as the view scrolls"""
+
+    def __init__(self, recurring, parent=None):
+        super().__init__(parent)
+        self.recurring = recurring
+        self.restart()
+
+    def restart(self):
+        """Start again from today, e.g. after a rule was removed"""
+        self.beginResetModel()
+        self.occurrences = []
+        self.source = self.recurring.upcoming()
+        self.exhausted = False
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.occurrences)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        o = self.occurrences[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{format_due(o.due)}   {o}   ({o.rule.describe()})"
+        if role == DONE_ROLE:
+            return o.done
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent):
+        #the series never end; only as many as have been scrolled to are made
+        page = list(islice(self.source, OCCURRENCE_PAGE))
+        if len(page) < OCCURRENCE_PAGE:
+            self.exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.occurrences), len(self.occurrences) + len(page) - 1)
+            self.occurrences.extend(page)
+            self.endInsertRows()
+
+    def toggle(self, row):
+        if self.recurring.toggle(self.occurrences[row]):
+            self.dataChanged.emit(self.index(row), self.index(row), [Qt.DisplayRole, DONE_ROLE])
+        else:
+            self.restart()
+
+class DoneDelegate(QStyledItemDelegate):
+    """Greys out and strikes through done tasks at paint time"""
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if index.data(DONE_ROLE):
+            option.font.setStrikeOut(True)
+            option.palette.setColor(QPalette.Text, QColor(Qt.gray))
+
+class StatsDialog(QDialog):
+    """Hidden debug panel (Ctrl+Shift+D) with the core.stats timers and counters"""
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("Performance stats")
+        self.resize(560, 420)
+        layout = QVBoxLayout(self)
+
+        self.enabled_box = QCheckBox("Collect stats")
+        self.enabled_box.setChecked(stats.enabled)
+        self.enabled_box.toggled.connect(stats.enable)
+        layout.addWidget(self.enabled_box)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("monospace"))
+        layout.addWidget(self.text)
+
+        buttons = QHBoxLayout()
+        for label, slot in (("Refresh", self.refresh), ("Reset", self.reset),
+                            ("Copy JSON", self.copy_json), ("Close", self.close)):
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+        #live while open
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        writer = self.store.write_stats()
+        lines = [stats.format_table(), "", f"tasks: {len(self.store.tasks)}"]
+        lines += [f"writer {name}: {value}" for name, value in writer.items()]
+        self.text.setPlainText("\n".join(lines))
+
+    def reset(self):
+        stats.reset()
+        self.refresh()
+
+    def copy_json(self):
+        data = stats.snapshot()
+        data["writer"] = self.store.write_stats()
+        QApplication.clipboard().setText(json.dumps(data, indent=2))
+
+class ArchiveDialog(QDialog):
+    """Read-only list of archived tasks; pages are read from disk as you scroll"""
+
+    def __init__(self, store, query="", parent=None):
+        super().__init__(parent)
+        title = f"Archive: {query}" if query.strip() else "Archive"
+        self.setWindowTitle(f"{title} ({store.archive.count()} tasks archived)")
+        self.resize(560, 480)
+        layout = QVBoxLayout(self)
+
+        self.model = ArchiveModel(store.archive, query, self)
+        view = QListView()
+        view.setUniformItemSizes(True)
+        view.setModel(self.model)
+        view.setItemDelegate(DoneDelegate(view))
+        layout.addWidget(view)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+class RepeatingDialog(QDialog):
+    """Upcoming occurrences of the repeating tasks, to tick off or stop repeating"""
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle(f"Repeating ({len(store.recurring)} tasks)")
+        self.resize(560, 480)
+        layout = QVBoxLayout(self)
+
+        self.model = OccurrenceModel(store.recurring, self)
+        self.view = QListView()
+        self.view.setUniformItemSizes(True)
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(DoneDelegate(self.view))
+        self.view.doubleClicked.connect(lambda index: self.model.toggle(index.row()))
+        layout.addWidget(self.view)
+
+        buttons = QHBoxLayout()
+        for label, slot in (("✓ Done/Undone", self.toggle_done), ("Stop Repeating", self.stop_repeating),
+                            ("Close", self.close)):
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+    def toggle_done(self):
+        row = self.view.currentIndex().row()
+        if row >= 0:
+            self.model.toggle(row)
+
+    def stop_repeating(self):
+        row = self.view.currentIndex().row()
+        if row < 0:
+            return
+        rule = self.model.occurrences[row].rule
+        reply = QMessageBox.question(self, "Stop Repeating", f"Stop repeating '{rule.text}'?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.store.recurring.remove(rule.id)
+            self.setWindowTitle(f"Repeating ({len(self.store.recurring)} tasks)")
+            self.model.restart()
+
+class TaskManagerWindow(QMainWindow):
+    def __init__(self, schedules, name=None):
+        super().__init__()
+        self.schedules = schedules
+        self.name = name or schedules.main
+        #opened empty; start_loading() fills it in the background
+        self.store = schedules.open(self.name, load=False)
+        #name -> Loader of every schedule opened in this window
+        self.loaders = {}
+        self.visible_indices = self.store.visible()
+        self.init_ui()
+        self.refresh_list()
+        self.start_reminders()
+        self.start_loading()
+
+    def init_ui(self):
+        self.setWindowTitle(f"Task Manager - {self.name}")
+        self.setMinimumSize(600, 500)
+        
+        self.setStyleSheet("""
+            QMainWindow {
+                background-color: #a2e8b8;
+            }
+            QListView {
+                background-color: #e8d4f5;
+                border: 1px solid #c8a8e0;
+                border-radius: 8px;
+                padding: 8px;
+                font-size: 13px;
+                color: #4a4a4a;
+            }
+            QListView::item {
+                padding: 8px;
+                border-bottom: 1px solid #dcc8ed;
+            }
+            QListView::item:selected {
+                background-color: #d4b5f0;
+                color: #5d3a7a;
+            }
+            QListView::item:hover {
+                background-color: #f2e8fa;
+            }
+            QPushButton {
+                background-color: #1976d2;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 6px;
+                font-weight: bold;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #1565c0;
+            }
+            QPushButton:pressed {
+                background-color: #0d47a1;
+            }
+            QPushButton#removeBtn {
+                background-color: #d32f2f;
+            }
+            QPushButton#removeBtn:hover {
+                background-color: #c62828;
+            }
+            QPushButton#quitBtn {
+                background-color: #757575;
+            }
+            QPushButton#quitBtn:hover {
+                background-color: #616161;
+            }
+            QComboBox {
+                padding: 6px 12px;
+                border: 1px solid #c8a8e0;
+                border-radius: 6px;
+                background-color: #e8d4f5;
+                min-width: 100px;
+                color: #4a4a4a;
+            }
+            QLineEdit {
+                padding: 6px 12px;
+                border: 1px solid #c8a8e0;
+                border-radius: 6px;
+                background-color: #e8d4f5;
+                min-width: 180px;
+                color: #4a4a4a;
+            }
+            QComboBox:hover {
+                border: 1px solid #b491d1;
+            }
+            QComboBox::drop-down {
+                border: none;
+            }
+            QLabel {
+                color: #424242;
+                font-weight: bold;
+            }
+        """)
+
+        #Central widget
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+
+        #Title
+        title_label = QLabel("📋 Task Manager")
+        title_font = QFont()
+        title_font.setPointSize(18)
+        title_font.setBold(True)
+        title_label.setFont(title_font)
+        title_label.setStyleSheet("color: #1976d2; margin-bottom: 10px;")
+        main_layout.addWidget(title_label)
+
+        #Schedule switcher; each schedule loads the first time it's picked
+        schedule_layout = QHBoxLayout()
+        schedule_label = QLabel("Schedule:")
+        schedule_label.setStyleSheet("font-weight: bold; color: #616161;")
+        schedule_layout.addWidget(schedule_label)
+
+        self.schedule_combo = QComboBox()
+        self.schedule_combo.addItems(self.schedules.names())
+        self.schedule_combo.setCurrentText(self.name)
+        self.schedule_combo.textActivated.connect(self.switch_schedule)
+        schedule_layout.addWidget(self.schedule_combo)
+
+        new_schedule_btn = QPushButton("➕ New")
+        new_schedule_btn.clicked.connect(self.new_schedule)
+        schedule_layout.addWidget(new_schedule_btn)
+
+        overview_btn = QPushButton("📚 All Schedules")
+        overview_btn.clicked.connect(self.show_schedules)
+        schedule_layout.addWidget(overview_btn)
+        schedule_layout.addStretch()
+        main_layout.addLayout(schedule_layout)
+
+        #Filter bar
+        filter_layout = QHBoxLayout()
+        filter_label = QLabel("Filter:")
+        filter_label.setStyleSheet("font-weight: bold; color: #616161;")
+        filter_layout.addWidget(filter_label)
+        
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems([*FILTERS, *DUE_FILTERS])
+        self.filter_combo.currentTextChanged.connect(self.refresh_list)
+        filter_layout.addWidget(self.filter_combo)
+
+        #Order and grouping; a sorted list repositions single changes itself
+        sort_label = QLabel("Sort:")
+        sort_label.setStyleSheet("font-weight: bold; color: #616161;")
+        filter_layout.addWidget(sort_label)
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems(SORTS)
+        self.sort_combo.currentTextChanged.connect(self.refresh_list)
+        filter_layout.addWidget(self.sort_combo)
+
+        group_label = QLabel("Group:")
+        group_label.setStyleSheet("font-weight: bold; color: #616161;")
+        filter_layout.addWidget(group_label)
+        self.group_combo = QComboBox()
+        self.group_combo.addItems(GROUPS)
+        self.group_combo.currentTextChanged.connect(self.refresh_list)
+        filter_layout.addWidget(self.group_combo)
+
+        #Search box; runs once typing pauses
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 Search tasks")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.refresh_list)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        filter_layout.addWidget(self.search_edit)
+        filter_layout.addStretch()
+
+        #Shown while the schedule loads; starts as a busy indicator
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumWidth(200)
+        filter_layout.addWidget(self.progress_bar)
+        
+        main_layout.addLayout(filter_layout)
+
+        #Task list: model/view so rows are only built when painted
+        self.model = TaskListModel(self.store, self.filter_combo.currentText(), self)
+        self.task_list = QListView()
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setModel(self.model)
+        self.task_list.setItemDelegate(DoneDelegate(self.task_list))
+        #Ctrl/Shift-click to pick several; toggle and remove act on all of them
+        self.task_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.task_list.doubleClicked.connect(self.edit_task)
+        main_layout.addWidget(self.task_list)
+
+        #Button bar
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(10)
+
+        add_btn = QPushButton("➕ Add Task")
+        add_btn.clicked.connect(self.add_task)
+        button_layout.addWidget(add_btn)
+
+        edit_btn = QPushButton("✏️ Edit Task")
+        edit_btn.clicked.connect(self.edit_task)
+        button_layout.addWidget(edit_btn)
+
+        toggle_btn = QPushButton("✓ Toggle Done")
+        toggle_btn.clicked.connect(self.toggle_done)
+        button_layout.addWidget(toggle_btn)
+
+        remove_btn = QPushButton("🗑️ Remove")
+        remove_btn.setObjectName("removeBtn")
+        remove_btn.clicked.connect(self.remove_task)
+        button_layout.addWidget(remove_btn)
+
+        clear_btn = QPushButton("🧹 Clear Done")
+        clear_btn.setObjectName("removeBtn")
+        clear_btn.clicked.connect(self.clear_done)
+        button_layout.addWidget(clear_btn)
+
+        merge_btn = QPushButton("🧬 Merge Duplicates")
+        merge_btn.clicked.connect(self.merge_duplicates)
+        button_layout.addWidget(merge_btn)
+
+        archive_btn = QPushButton("🗄️ Archive")
+        archive_btn.clicked.connect(self.show_archive)
+        button_layout.addWidget(archive_btn)
+
+        repeating_btn = QPushButton("🔁 Repeating")
+        repeating_btn.clicked.connect(self.show_repeating)
+        button_layout.addWidget(repeating_btn)
+
+        button_layout.addStretch()
+
+        quit_btn = QPushButton("Exit")
+        quit_btn.setObjectName("quitBtn")
+        quit_btn.clicked.connect(self.close)
+        button_layout.addWidget(quit_btn)
+
+        main_layout.addLayout(button_layout)
+
+        #Keyboard shortcuts
+        self.task_list.keyPressEvent = self.handle_key_press
+        self.stats_dialog = None
+        stats_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        stats_shortcut.activated.connect(self.show_stats)
+        #the search box keeps its own Ctrl+Z while it has focus
+        undo_shortcut = QShortcut(QKeySequence.StandardKey.Undo, self)
+        undo_shortcut.activated.connect(self.undo)
+        redo_shortcut = QShortcut(QKeySequence.StandardKey.Redo, self)
+        redo_shortcut.activated.connect(self.redo)
+        #the standard Redo is only Ctrl+Shift+Z on Linux; Ctrl+Y works everywhere, as in the Tk window.
+        #Windows already has it, and a second shortcut on the same keys would make both ambiguous
+        ctrl_y = QKeySequence("Ctrl+Y")
+        if ctrl_y not in QKeySequence.keyBindings(QKeySequence.StandardKey.Redo):
+            QShortcut(ctrl_y, self).activated.connect(self.redo)
+
+    def start_loading(self):
+        """Parse the schedule in the background and feed it to the list in batches"""
+        self.loader = self.loaders[self.name] = self.store.begin_load()
+        self.resume_loading()
+        #other windows may share the file; merge what they save
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(SYNC_INTERVAL_MS)
+        self.sync_timer.timeout.connect(self.sync_external)
+        self.sync_timer.start()
+
+    def sync_external(self):
+        self.store.sync()
+        #a failed write stays queued and is retried; say so until one gets through
+        error = self.store.write_error
+        if error is not None:
+            self.statusBar().showMessage(f"Couldn't save {self.store.path.name}: {error} (retrying)")
+        elif self.statusBar().currentMessage().startswith("Couldn't save"):
+            self.statusBar().clearMessage()
+
+    def resume_loading(self):
+        """Show the progress bar and pump the current schedule's loader, if it's still going"""
+        if self.loader is None or self.loader.finished:
+            self.progress_bar.hide()
+            return
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        loader = self.loader
+        QTimer.singleShot(0, lambda: self.pump_loader(loader))
+
+    def start_reminders(self):
+        """One single-shot timer, always set for the next task to come due"""
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.setSingleShot(True)
+        self.reminder_timer.timeout.connect(self.fire_reminders)
+        self.watch_reminders()
+
+    def watch_reminders(self):
+        self.reminders = Reminders(self.store, self.arm_reminder)
+        self.reminders.start()
+
+    def arm_reminder(self, delay):
+        if delay is None:
+            self.reminder_timer.stop()
+        else:
+            self.reminder_timer.start(int(delay * 1000))
+
+    def fire_reminders(self):
+        """Highlight what came due and say so without blocking the window"""
+        due = self.reminders.fire()
+        if not due:
+            return
+        self.model.highlight(due)
+        lines = [f"{format_due(t.due)}  {t.text}" for t in due]
+        box = QMessageBox(QMessageBox.Information, "Reminder", "\n".join(lines), QMessageBox.Ok, self)
+        box.setAttribute(Qt.WA_DeleteOnClose)
+        box.setModal(False)
+        box.show()
+        QApplication.alert(self)
+
+    def pump_loader(self, loader):
+        """Install one batch per event-loop turn so the window stays responsive"""
+        if loader is not self.loader:
+            #switched to another schedule; resume_loading() picks this one up on the way back
+            return
+        if loader.step():
+            self.progress_bar.hide()
+            if isinstance(self.model.view, SortedView):
+                #sorted views skip the loader's batches; sort the whole schedule once now
+                self.refresh_list()
+            return
+        done, total = loader.progress()
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        QTimer.singleShot(0 if loader.ready() else 30, lambda: self.pump_loader(loader))
+
+    def switch_schedule(self, name):
+        """Show another schedule; one not open yet loads in the background"""
+        if name == self.name:
+            return
+        fresh = name not in self.schedules
+        try:
+            store = self.schedules.open(name, load=False)
+        except ValueError as e:
+            QMessageBox.warning(self, "Schedule", str(e))
+            self.schedule_combo.setCurrentText(self.name)
+            return
+        self.reminders.stop()
+        self.name, self.store = name, store
+        #loaders of schedules the LRU has closed are no use any more
+        self.loaders = {n: ld for n, ld in self.loaders.items() if n in self.schedules}
+        if self.stats_dialog is not None:
+            self.stats_dialog.close()
+            self.stats_dialog = None
+        self.model.set_store(store, self.compute_visible())
+        self.visible_indices = self.model.view
+        self.watch_reminders()
+        self.setWindowTitle(f"Task Manager - {name}")
+        if fresh:
+            self.loader = self.loaders[name] = store.begin_load()
+        else:
+            self.loader = self.loaders.get(name)
+        self.resume_loading()
+
+    def new_schedule(self):
+        """Start a schedule under a new name; its file appears with the first task"""
+        name, ok = QInputDialog.getText(self, "New Schedule", "Name (letters, digits, _ and -):")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if self.schedule_combo.findText(name) < 0:
+            try:
+                self.schedules.path(name)
+            except ValueError as e:
+                QMessageBox.warning(self, "New Schedule", str(e))
+                return
+            self.schedule_combo.addItem(name)
+        self.schedule_combo.setCurrentText(name)
+        self.switch_schedule(name)
+
+    def show_schedules(self):
+        """Counts for every schedule, from their .meta files; none of them is loaded"""
+        rows = self.schedules.summary()
+        for name, _ in rows:
+            if self.schedule_combo.findText(name) < 0:
+                self.schedule_combo.addItem(name)
+        text = "\n".join(f"{'▶ ' if name == self.name else ''}{name}: {format_counts(counts)}"
+                         for name, counts in rows)
+        QMessageBox.information(self, "All Schedules", text)
+
+    def show_stats(self):
+        """Open the hidden performance stats panel"""
+        if self.stats_dialog is None:
+            self.stats_dialog = StatsDialog(self.store, self)
+        self.stats_dialog.show()
+        self.stats_dialog.raise_()
+
+    def show_archive(self):
+        """Browse archived tasks matching the search box"""
+        ArchiveDialog(self.store, self.search_edit.text(), self).exec()
+
+    def show_repeating(self):
+        """Upcoming occurrences of the repeating tasks"""
+        RepeatingDialog(self.store, self).exec()
+
+    def closeEvent(self, event):
+        """Make sure queued writes hit the disk before the window goes away"""
+        self.schedules.flush()
+        super().closeEvent(event)
+
+    def handle_key_press(self, event):
+        """Handle keyboard shortcuts"""
+        if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
+            self.edit_task()
+        elif event.key() == Qt.Key_Space:
+            self.toggle_done()
+            event.accept()
+        elif event.key() == Qt.Key_Delete:
+            self.remove_task()
+        else:
+            QListView.keyPressEvent(self.task_list, event)
+
+    def compute_visible(self):
+        """Lazy row -> task index view for the current filter and search"""
+        return self.store.visible(self.filter_combo.currentText(), self.search_edit.text(),
+                                  self.sort_combo.currentText(), self.group_combo.currentText())
+
+    @stats.timed("refresh_list")
+    def refresh_list(self):
+        """Point the model at the current filter; edits update it by themselves"""
+        self.model.set_view(self.compute_visible())
+        self.visible_indices = self.model.view
+
+    def get_selected_index(self):
+        """Get the actual task index from the selected list item"""
+        current_row = self.task_list.currentIndex().row()
+        if current_row >= 0 and current_row < len(self.visible_indices):
+            return self.visible_indices[current_row]
+        return None
+
+    def get_selected_indices(self):
+        """Task indices of every selected row, in list order"""
+        view = self.visible_indices
+        indices = []
+        #selections are row ranges; walk each run instead of looking up row by row
+        for r in self.task_list.selectionModel().selection():
+            indices.extend(islice(view.iter_from(r.top()), r.bottom() - r.top() + 1))
+        return sorted(indices)
+
+    def select_tasks(self, ids):
+        """Select the rows showing these tasks, e.g. after a bulk change reset the model"""
+        view = self.visible_indices
+        rows = sorted(row for row in (view.row_of(pos) for pos in map(self.store.find, ids) if pos >= 0)
+                      if row is not None)
+        selection = QItemSelection()
+        for first, last in _runs(rows):
+            selection.select(self.model.index(first), self.model.index(last))
+        self.task_list.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+    def add_task(self):
+        """Add a new task, or a repeating one if the user says so"""
+        text, ok = QInputDialog.getText(
+            self, "Add Task", "Enter your task and time:"
+        )
+        text = text.strip()
+        if not ok or not text:
+            return
+        repeat = self.ask_repeat(text)
+        if repeat or self.confirm_new_text(text):
+            with stats.timer("action.add"):
+                added = self.store.add_text(text, repeat=repeat)
+            if repeat:
+                QMessageBox.information(self, "Repeating Task",
+                                        f"'{added.text}' repeats {added.describe()}; see Repeating.")
+
+    def ask_repeat(self, text):
+        """Offer to make text that says how often it repeats a repeating task"""
+        how = parse_rule(text)
+        if how is None:
+            return False
+        reply = QMessageBox.question(
+            self, "Repeating Task",
+            f"'{text}' reads like it repeats {describe_rule(how)}. Make it a repeating task?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
+    def edit_task(self):
+        """Edit the selected task"""
+        idx = self.get_selected_index()
+        if idx is None:
+            QMessageBox.warning(self, "No Selection", "Please select a task to edit.")
+            return
+        
+        #the sync timer keeps firing inside the dialogs and may move the task
+        task_id = self.store.tasks[idx].id
+        text, ok = QInputDialog.getText(
+            self, "Edit Task", "Update the task:",
+            text=self.store.tasks[idx].text
+        )
+        if ok and text.strip() and self.confirm_new_text(text.strip(), exclude=task_id):
+            idx = self.store.find(task_id)
+            if idx < 0:
+                QMessageBox.warning(self, "Task Gone", "That task was removed in another window.")
+                return
+            with stats.timer("action.edit"):
+                self.store.update(idx, text=text.strip())
+
+    def confirm_new_text(self, text, exclude=None):
+        """Ask before adding (or editing a task into) a copy of one already on the schedule"""
+        dupes = self.store.duplicates(text, exclude=exclude)
+        if not dupes:
+            return True
+        state = "finished" if dupes[0].done else "on the schedule"
+        reply = QMessageBox.question(
+            self, "Duplicate Task", f"'{dupes[0].text}' is already {state}. Save this anyway?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
+    def toggle_done(self):
+        """Toggle the selected task, or mark all selected done (undone if they all are)"""
+        indices = self.get_selected_indices()
+        if not indices:
+            QMessageBox.warning(self, "No Selection", "Please select a task to toggle.")
+            return
+        
+        ids = [self.store.tasks[idx].id for idx in indices]
+        with stats.timer("action.toggle"):
+            self.store.toggle_many(indices)
+        if len(ids) > 1:
+            self.select_tasks(ids)
+
+    def undo(self):
+        """Take back the last change (Ctrl+Z)"""
+        with stats.timer("action.undo"):
+            if not self.store.undo():
+                QApplication.beep()
+
+    def redo(self):
+        """Apply the last undone change again (Ctrl+Y / Ctrl+Shift+Z)"""
+        with stats.timer("action.redo"):
+            if not self.store.redo():
+                QApplication.beep()
+
+    def remove_task(self):
+        """Remove the selected tasks"""
+        indices = self.get_selected_indices()
+        if not indices:
+            QMessageBox.warning(self, "No Selection", "Please select a task to remove.")
+            return
+        
+        if len(indices) == 1:
+            question = f"Remove task: {self.store.tasks[indices[0]].text}?"
+        else:
+            question = f"Remove {len(indices)} tasks?"
+        #positions can shift while the question is up (the sync timer keeps running)
+        ids = [self.store.tasks[idx].id for idx in indices]
+        reply = QMessageBox.question(
+            self, "Confirm Removal", question,
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        
+        if reply == QMessageBox.Yes:
+            indices = [self.store.find(id) for id in ids]
+            if min(indices) < 0:
+                QMessageBox.warning(self, "Task Gone",
+                                    "A selected task was removed in another window; nothing was removed.")
+                return
+            with stats.timer("action.remove"):
+                self.store.remove_many(indices)
+
+    def clear_done(self):
+        """Remove every finished task in one go"""
+        count = len(self.store.status.done)
+        if not count:
+            QMessageBox.information(self, "Clear Done", "There are no finished tasks.")
+            return
+        reply = QMessageBox.question(
+            self, "Clear Done", f"Remove all {count} finished tasks?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            with stats.timer("action.clear_done"):
+                self.store.clear_done()
+
+    def merge_duplicates(self):
+        """Fold tasks with the same text into one, in a single change"""
+        with stats.timer("action.merge_duplicates"):
+            removed = self.store.merge_duplicates()
+        if removed:
+            QMessageBox.information(self, "Merge Duplicates", f"Merged away {removed} duplicate tasks.")
+        else:
+            QMessageBox.information(self, "Merge Duplicates", "There are no duplicate tasks.")
+
+def _runs(rows):
+    """(first, last) for each run of consecutive numbers in sorted rows"""
+    start = prev = None
+    for row in rows:
+        if prev is not None and row == prev + 1:
+            prev = row
+            continue
+        if start is not None:
+            yield start, prev
+        start = prev = row
+    if start is not None:
+        yield start, prev
+
+def main_gui(schedules, name=None):
+    """Launch the Qt GUI"""
+    app = QApplication(sys.argv)
+    window = TaskManagerWindow(schedules, name)
+    window.show()
+    sys.exit(app.exec())
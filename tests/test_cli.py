@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from core import cli
+from core.store import TaskStore
+
+
+def open_store(path):
+    store = TaskStore(path, write_behind=False, archive_after=None)
+    store.load()
+    return store
+
+
+def tasks_in(path):
+    store = open_store(path)
+    try:
+        return [(t.text, t.done, t.due, t.done_at) for t in store.tasks]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("ext", ["csv", "jsonl"])
+def test_export_import_round_trip(tmp_path, ext):
+    #whole minutes, so the CSV's ISO times come back exactly
+    hour = (int(time.time()) // 3600) * 3600
+    src = tmp_path / "schedule.json"
+    store = open_store(src)
+    store.add_many(["buy milk", "dentist", "pay rent, \"urgent\""])
+    store.update(1, due=hour + 86400 + 1800)
+    store.update(2, done=True, done_at=hour - 3600)
+    store.close()
+
+    dump = tmp_path / f"backup.{ext}"
+    assert cli.main(["--file", str(src), "export", str(dump)]) == 0
+    dest = tmp_path / "restored.json"
+    assert cli.main(["--file", str(dest), "import", str(dump)]) == 0
+    assert tasks_in(dest) == tasks_in(src)
+    assert tasks_in(dest)[2] == ("pay rent, \"urgent\"", True, None, hour - 3600)
+
+
+@pytest.mark.parametrize("ext, content, error", [
+    ("jsonl", '{"text": "a"}\n\n{"text": "b", "due": "soonish"}\n',
+     "line 3: due 'soonish' is neither a timestamp nor an ISO date"),
+    ("jsonl", '{"text": "a"}\n{"done": true}\n', 'line 2: missing "text"'),
+    ("jsonl", '{"text": "a"}\n[1, 2]\n', 'line 2: expected an object with "text", got [1, 2]'),
+    ("jsonl", '{"text": "a", "done": true, "done_at": true}\n',
+     "line 1: done_at true is neither a timestamp nor an ISO date"),
+    ("csv", "text,done,due\na,0,\nb,1,2025-13-40\n",
+     "line 3: due '2025-13-40' is neither a timestamp nor an ISO date"),
+])
+def test_import_reports_bad_row(tmp_path, ext, content, error):
+    source = tmp_path / f"tasks.{ext}"
+    source.write_text(content, encoding="utf-8")
+    path = tmp_path / "schedule.json"
+    with pytest.raises(SystemExit) as e:
+        cli.main(["--file", str(path), "import", str(source)])
+    assert str(e.value) == error
+    #nothing from the file is added
+    assert tasks_in(path) == []
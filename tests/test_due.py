@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from core.due import parse_due
+
+#Wednesday 12 March 2025, mid-morning
+NOW = datetime(2025, 3, 12, 10, 0).timestamp()
+
+
+def at(month, day, hour, minute=0):
+    return datetime(2025, month, day, hour, minute).timestamp()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("gym 3pm", at(3, 12, 15)),
+    ("call 3:30 pm", at(3, 12, 15, 30)),
+    ("standup 15:30", at(3, 12, 15, 30)),
+    ("lunch at noon", at(3, 12, 12)),
+    ("deploy by midnight", at(3, 12, 23, 59)),
+    ("finish report today", at(3, 12, 23, 59)),
+    ("movie tonight", at(3, 12, 20)),
+    ("dentist tomorrow 9:30", at(3, 13, 9, 30)),
+    ("pay rent tmrw", at(3, 13, 23, 59)),
+    ("review friday", at(3, 14, 23, 59)),
+    ("drinks friday 5pm", at(3, 14, 17)),
+    ("meeting wednesday", at(3, 12, 23, 59)),
+    ("call bank on fri", at(3, 14, 23, 59)),
+    ("haircut next mon", at(3, 17, 23, 59)),
+    ("gym sat 9am", at(3, 15, 9)),
+    ("brunch 11am sun", at(3, 16, 11)),
+    ("taxes 2025-03-14", at(3, 14, 23, 59)),
+    ("party on 3/14", at(3, 14, 23, 59)),
+    ("report due 3/20", at(3, 20, 23, 59)),
+    ("flight 3/14 9am", at(3, 14, 9)),
+])
+def test_parses(text, expected):
+    assert parse_due(text, NOW) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "buy sun cream",
+    "I sat the exam",
+    "wed anniversary gift",
+    "add 1/2 cup sugar",
+    "monitor the build",
+    "fix the thumbnail cache",
+    "water the plants",
+])
+def test_ignores_plain_text(text):
+    assert parse_due(text, NOW) is None
+
+
+def test_word_away_from_the_time_stays_text():
+    #"sun" isn't beside the time, so this is today at 3pm, not Sunday
+    assert parse_due("buy sun cream 3pm", NOW) == at(3, 12, 15)
@@ -0,0 +1,172 @@
+import random
+
+import pytest
+
+from core.index import FILTERS, FilterView
+from core.search import matches, tokenize
+from core.store import TaskStore
+
+
+def open_store(path):
+    store = TaskStore(path, write_behind=False, archive_after=None)
+    store.load()
+    return store
+
+
+class Mirror:
+    """What a list widget would show: a view's rows, kept only from its row_changes"""
+
+    def __init__(self, store, view):
+        self.store = store
+        self.view = view
+        self.ids = self._scan_view()
+        store.subscribe(self._changed)
+
+    def _scan_view(self, start=0, stop=None):
+        tasks = self.store.tasks
+        rows = range(len(self.view))[start:stop]
+        return [tasks[self.view[row]].id for row in rows]
+
+    def _changed(self, kind, pos, task, before):
+        for op, row, count in self.view.row_changes(kind, pos, task, before):
+            if op == "reset":
+                self.ids = self._scan_view()
+            elif op == "insert":
+                self.ids[row:row] = self._scan_view(row, row + count)
+            elif op == "remove":
+                del self.ids[row:row + count]
+
+
+def want(store, mode, query=""):
+    """The ids a full scan puts in a filter"""
+    words = tokenize(query)
+    return [t.id for t in store.tasks
+            if (mode == "All" or (mode == "Done") == t.done) and matches(words, t.text)]
+
+
+def assert_consistent(store, mirrors):
+    active = [t.id for t in store.tasks if not t.done]
+    done = [t.id for t in store.tasks if t.done]
+    assert store.status.check(store.tasks)
+    assert (len(store.status.active), len(store.status.done)) == (len(active), len(done))
+    for ids, members in ((active, store.status.active), (done, store.status.done)):
+        for k, id in enumerate(ids):
+            assert members.rank(id) == k
+            assert members.select(k) == id
+    for (mode, query), mirror in mirrors.items():
+        expected = want(store, mode, query)
+        fresh = FilterView(store, mode, query)
+        assert [store.tasks[p].id for p in fresh] == expected
+        assert [store.tasks[p].id for p in mirror.view] == expected
+        assert mirror.ids == expected, (mode, query)
+        for row, id in enumerate(expected):
+            assert mirror.view.row_of(store.find(id)) == row
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = open_store(tmp_path / "schedule.json")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def mirrors(store):
+    return {(mode, query): Mirror(store, FilterView(store, mode, query))
+            for mode in FILTERS for query in ("", "milk")}
+
+
+def test_single_changes(store, mirrors):
+    for text in ("buy milk", "call mom", "milk the cow", "write report", "pay rent"):
+        store.add(text)
+        assert_consistent(store, mirrors)
+    store.toggle(0)
+    assert_consistent(store, mirrors)
+    store.toggle(2)
+    assert_consistent(store, mirrors)
+    store.update(1, text="call mom about milk")
+    assert_consistent(store, mirrors)
+    store.update(2, done=False)
+    assert_consistent(store, mirrors)
+    store.remove(3)
+    assert_consistent(store, mirrors)
+    store.remove(0)
+    assert_consistent(store, mirrors)
+
+
+def test_bulk_changes(store, mirrors):
+    store.add_many([f"task {i}" + (" milk" if i % 3 == 0 else "") for i in range(40)])
+    assert_consistent(store, mirrors)
+    store.toggle_many(range(0, 40, 2))
+    assert_consistent(store, mirrors)
+    store.toggle_many([0, 2, 4])
+    assert_consistent(store, mirrors)
+    store.remove_many(range(5, 15))
+    assert_consistent(store, mirrors)
+    store.clear_done()
+    assert_consistent(store, mirrors)
+    assert not store.status.done
+
+
+def test_undo_redo(store, mirrors):
+    store.add_many(["a milk", "b", "c milk", "d"])
+    steps = [
+        lambda: store.toggle(1),
+        lambda: store.update(0, text="a"),
+        lambda: store.remove(2),
+        lambda: store.toggle_many([0, 1, 2]),
+        lambda: store.remove_many([0, 2]),
+        lambda: store.clear_done(),
+    ]
+    for step in steps:
+        step()
+        assert_consistent(store, mirrors)
+    for step in steps:
+        assert store.undo()
+        assert_consistent(store, mirrors)
+    assert [t.text for t in store.tasks] == ["a milk", "b", "c milk", "d"]
+    while store.redo():
+        assert_consistent(store, mirrors)
+
+
+def test_sync(tmp_path, store, mirrors):
+    store.add_many(["one milk", "two", "three"])
+    other = open_store(tmp_path / "schedule.json")
+    try:
+        other.toggle(0)
+        other.add("four milk")
+        other.remove(1)
+        other.update(1, text="three milk", done=True)
+        assert store.sync()
+        assert_consistent(store, mirrors)
+        assert [(t.text, t.done) for t in store.tasks] == [(t.text, t.done) for t in other.tasks]
+        other.clear_done()
+        store.sync()
+        assert_consistent(store, mirrors)
+    finally:
+        other.close()
+
+
+def test_random_walk(store, mirrors):
+    rng = random.Random(4)
+    words = ["milk", "bread", "eggs", "rent", "gym"]
+    for step in range(300):
+        n = len(store.tasks)
+        roll = rng.random()
+        if n < 5 or roll < 0.3:
+            store.add(" ".join(rng.sample(words, 2)))
+        elif roll < 0.5:
+            store.toggle(rng.randrange(n))
+        elif roll < 0.6:
+            store.update(rng.randrange(n), text=" ".join(rng.sample(words, 2)))
+        elif roll < 0.7:
+            store.remove(rng.randrange(n))
+        elif roll < 0.8:
+            store.toggle_many(rng.sample(range(n), min(n, 4)))
+        elif roll < 0.85:
+            store.remove_many(rng.sample(range(n), min(n, 3)))
+        elif roll < 0.88:
+            store.clear_done()
+        else:
+            store.undo()
+        assert_consistent(store, mirrors)
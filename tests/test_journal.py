@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from core.journal import SNAPSHOT_VERSION, Journal
+from core.store import TaskStore
+
+
+def task(id, text, done=False):
+    return {"id": id, "text": text, "done": done}
+
+
+def texts(items):
+    return [d["text"] for d in items]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "schedule.json"
+
+
+def reopen(path):
+    journal = Journal(path)
+    try:
+        return journal.load()
+    finally:
+        journal.close()
+
+
+def test_replays_journal_over_snapshot(path):
+    journal = Journal(path)
+    journal.snapshot([task(1, "a"), task(2, "b")])
+    journal.apply([{"op": "add", "t": task(3, "c")},
+                   {"op": "ext", "t": [task(4, "d"), task(5, "e")]},
+                   {"op": "upd", "id": 1, "f": {"done": True}},
+                   {"op": "del", "id": 2},
+                   {"op": "dels", "ids": [4]}])
+    journal.close()
+    items = reopen(path)
+    assert texts(items) == ["a", "c", "e"]
+    assert items[0]["done"] is True
+
+
+def test_truncated_last_line_is_skipped(path):
+    journal = Journal(path)
+    journal.snapshot([task(1, "a")])
+    journal.append("add", t=task(2, "b"))
+    journal.close()
+    with journal.log_path.open("a", encoding="utf-8") as f:
+        #a write cut short by a crash
+        f.write('{"op":"add","t":{"id":3,"te')
+    assert texts(reopen(path)) == ["a", "b"]
+
+    #what gets appended after it still replays
+    journal = Journal(path)
+    journal.load()
+    journal.append("add", t=task(4, "d"))
+    journal.close()
+    assert texts(reopen(path)) == ["a", "b", "d"]
+
+
+def test_compaction_folds_journal_into_snapshot(path):
+    journal = Journal(path)
+    journal.snapshot([task(1, "a")])
+    journal.append("add", t=task(2, "b"))
+    items = journal.load()
+    gen = journal.rotate()
+    assert journal.old_path.exists()
+    #a change made while the snapshot is being written lands in the new journal
+    journal.append("upd", id=1, f={"text": "A"})
+    journal.write_snapshot(items, gen)
+    journal.close()
+
+    assert not journal.old_path.exists()
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert (data["version"], data["gen"]) == (SNAPSHOT_VERSION, gen)
+    assert texts(data["tasks"]) == ["a", "b"]
+    assert texts(reopen(path)) == ["A", "b"]
+
+
+def test_interrupted_compaction_is_recovered(path):
+    journal = Journal(path)
+    journal.snapshot([task(1, "a")])
+    journal.append("add", t=task(2, "b"))
+    journal.rotate()
+    journal.append("add", t=task(3, "c"))
+    #stopped before write_snapshot: the snapshot is still the old generation
+    journal.close()
+    assert journal.old_path.exists()
+
+    journal = Journal(path)
+    assert texts(journal.load()) == ["a", "b", "c"]
+    assert not journal.old_path.exists()
+    journal.close()
+    assert texts(json.loads(path.read_text(encoding="utf-8"))["tasks"]) == ["a", "b", "c"]
+    assert texts(reopen(path)) == ["a", "b", "c"]
+
+
+def test_skips_journal_older_than_snapshot(path):
+    journal = Journal(path)
+    journal.snapshot([task(1, "a")])
+    journal.append("add", t=task(2, "b"))
+    items = journal.load()
+    gen = journal.rotate()
+    old = journal.old_path.read_bytes()
+    journal.write_snapshot(items, gen)
+    journal.close()
+    #stopped after the snapshot but before the .old journal was deleted
+    journal.old_path.write_bytes(old)
+    assert texts(reopen(path)) == ["a", "b"]
+
+
+def test_loads_pre_journal_list_format(path):
+    path.write_text(json.dumps(["[ ] buy milk", "[x] call mom", "pay rent"]), encoding="utf-8")
+    store = TaskStore(path, write_behind=False, archive_after=None)
+    try:
+        store.load()
+        assert [(t.id, t.text, t.done) for t in store.tasks] == [
+            (1, "buy milk", False), (2, "call mom", True), (3, "pay rent", False)]
+        assert store.tasks[1].done_at is not None
+    finally:
+        store.close()
+    #migrated to the snapshot format on first load
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["version"] == SNAPSHOT_VERSION
+    assert texts(data["tasks"]) == ["buy milk", "call mom", "pay rent"]
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from core.due import DUE_FILTERS, UPCOMING_LIMIT
+from core.index import FILTERS
+from core.store import TaskStore
+
+TEXTS = ("buy milk", "gym 3pm", "dentist tomorrow 9am", "call mom", "pay rent friday 5pm",
+         "report 9:30", "plan trip", "clean car noon")
+
+
+def in_memory(store, mode, offset, limit):
+    #what the store's own views show for the same rows
+    view = store.visible(mode)
+    return [store.tasks[view[row]].id for row in range(offset, min(len(view), offset + limit))]
+
+
+@pytest.fixture(params=[False, True], ids=["inline", "write_behind"])
+def store(tmp_path, request):
+    store = TaskStore(tmp_path / "schedule.db", write_behind=request.param, archive_after=None)
+    store.load()
+    yield store
+    store.close()
+
+
+def test_sql_pages_match_views(store):
+    store.add_many(TEXTS[i % len(TEXTS)] + f" #{i}" for i in range(300))
+    store.toggle_many(range(0, 300, 3))
+    #yesterday's and tomorrow's tasks around now, plus more upcoming than the view shows
+    now = time.time()
+    store.add_records([{"text": f"late {i}", "due": now - 3600 * (i + 1)} for i in range(20)])
+    store.add_records([{"text": f"soon {i}", "due": now + 60 * (i + 1)} for i in range(UPCOMING_LIMIT + 10)])
+    store.remove(5)
+    assert hasattr(store.backend, "page")
+    for mode in FILTERS + DUE_FILTERS:
+        assert store.count(mode) == len(store.visible(mode)), mode
+        for offset in (0, 40, store.count(mode) - 3):
+            got = [t.id for t in store.page(mode, max(0, offset), 25)]
+            assert got == in_memory(store, mode, max(0, offset), 25), (mode, offset)
+    assert store.count("Upcoming") == UPCOMING_LIMIT
+
+
+def test_page_sees_latest_change(store):
+    store.add_many(["a", "b", "c"])
+    store.toggle(1)
+    assert [t.text for t in store.page("Done")] == ["b"]
+    store.remove(1)
+    assert store.count("Done") == 0
+    assert [t.text for t in store.page("Active")] == ["a", "c"]
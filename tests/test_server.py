@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.server import TaskServer
+from core.store import TaskStore
+
+
+@pytest.fixture
+def api(tmp_path):
+    """Base URL of a server on a free port, run on its own event loop thread"""
+    store = TaskStore(tmp_path / "schedule.json", write_behind=False, archive_after=None)
+    store.load()
+    store.add_many(["buy milk", "call mom"])
+    loop = asyncio.new_event_loop()
+    server = TaskServer(store, port=0)
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait(5)
+    yield f"http://127.0.0.1:{server.port}", store
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    store.close()
+
+
+def call(url, method="GET", body=None, headers=None):
+    """(status, decoded body or None, headers)"""
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            raw = resp.read()
+            return resp.status, json.loads(raw) if raw else None, resp.headers
+    except urllib.error.HTTPError as e:
+        raw = e.read()
+        return e.code, json.loads(raw) if raw else None, e.headers
+
+
+@pytest.mark.parametrize("body", [{"done": "false"}, {"done": 1}, {"due": True}, {"due": "3pm"}])
+def test_patch_rejects_wrong_types(api, body):
+    base, store = api
+    status, payload, _ = call(f"{base}/tasks/1", "PATCH", body)
+    assert status == 400, payload
+    assert not store.tasks[0].done and store.tasks[0].due is None
+
+
+def test_patch_accepts_real_types(api):
+    base, store = api
+    status, payload, _ = call(f"{base}/tasks/1", "PATCH", {"done": True, "due": 1800000000})
+    assert status == 200
+    assert payload["done"] is True and payload["due"] == 1800000000
+
+
+def test_etag_is_per_path_and_query(api):
+    base, _ = api
+    status, _, headers = call(f"{base}/tasks?filter=Active")
+    assert status == 200
+    etag = {"If-None-Match": headers["ETag"]}
+    assert call(f"{base}/tasks?filter=Active", headers=etag)[0] == 304
+    assert call(f"{base}/tasks?filter=Done", headers=etag)[0] == 200
+    assert call(f"{base}/tasks/1", headers=etag)[0] == 200
+    #routes are checked before the tag
+    assert call(f"{base}/nowhere", headers=etag)[0] == 404
+    assert call(f"{base}/tasks/99", headers=etag)[0] == 404
+    assert call(f"{base}/tasks?filter=Bogus", headers=etag)[0] == 400
+    #a change makes the old tag stale
+    assert call(f"{base}/tasks/2/toggle", "POST")[0] == 200
+    assert call(f"{base}/tasks?filter=Active", headers=etag)[0] == 200
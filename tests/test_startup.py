@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+from bench.startup import GUI_MODULES, ROOT
+
+
+def test_headless_imports_skip_gui_toolkits(tmp_path):
+    #a fresh interpreter in an empty directory, as the console and core.cli start
+    code = ("import sys, task, taskmanager, core.cli\n"
+            f"print(','.join(m for m in {GUI_MODULES!r} if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
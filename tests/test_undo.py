@@ -0,0 +1,52 @@
+import pytest
+
+from core.store import TaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(tmp_path / "schedule.json", write_behind=False, archive_after=None)
+    store.load()
+    yield store
+    store.close()
+
+
+def texts(store):
+    return [t.text for t in store.tasks]
+
+
+def test_undo_redo_round_trip(store):
+    store.add_many(["a", "b", "c"])
+    store.toggle(1)
+    store.update(0, text="a2")
+    store.remove_many([1, 2])
+    assert texts(store) == ["a2"]
+    assert store.undo() and texts(store) == ["a2", "b", "c"]
+    assert store.undo() and texts(store) == ["a", "b", "c"]
+    assert store.undo() and not store.tasks[1].done
+    assert store.redo() and store.tasks[1].done
+    store.add("d")
+    #a fresh change drops what could have been redone
+    assert not store.redo()
+
+
+def test_oversized_step_drops_older_history(store):
+    store.history.budget = 3000
+    store.add_many([f"task {i}" for i in range(50)])
+    store.add("last one")
+    #too big to keep: undo must not reach past it
+    store.remove_many(range(50))
+    assert texts(store) == ["last one"]
+    assert not store.undo()
+    assert texts(store) == ["last one"]
+
+
+def test_oversized_undo_drops_redo(store):
+    store.history.budget = 3000
+    store.add_many([f"task {i}" for i in range(50)])
+    store.toggle(0)
+    assert store.undo() and not store.tasks[0].done
+    #undoing the import records an inverse too big for the redo stack
+    assert store.undo() and not store.tasks
+    assert not store.redo()
+    assert not store.tasks
@@ -0,0 +1,457 @@
+import tkinter as tk
+from itertools import islice
+from tkinter import messagebox, simpledialog
+
+from core import DUE_FILTERS, FILTERS, GROUPS, SORTS, SortedView, format_due, stats
+from core.archive import PAGE_SIZE
+from core.recurring import PAGE_SIZE as OCCURRENCE_PAGE, describe_rule, parse_rule
+from core.reminders import Reminders
+from core.schedules import format_counts
+from tklist import TaskListbox
+
+SEARCH_DEBOUNCE_MS = 150  #quiet time after typing before the search runs
+SYNC_INTERVAL_MS = 1000  #how often to look for edits made by other windows
+
+def main_gui(schedules, name=None):
+    name = name or schedules.main
+    #opened empty; the loader below fills it in batches
+    store = schedules.open(name, load=False)
+    tasks = store.tasks
+    root = tk.Tk()
+    root.title(f"Task Manager - {name}")
+
+    #layout
+    #top bar for filter controls
+    topbar = tk.Frame(root)
+    topbar.pack(fill="x", padx=12, pady=(12, 0))
+
+    frame = tk.Frame(root)
+    frame.pack(fill="both", expand=True, padx=12, pady=12)
+
+    scrollbar = tk.Scrollbar(frame)
+    scrollbar.pack(side="right", fill="y")
+
+    #extended: Ctrl/Shift-click picks several tasks for toggle/remove
+    listbox = tk.Listbox(frame, height=12, yscrollcommand=scrollbar.set,
+                         selectmode=tk.EXTENDED, exportselection=False)
+    listbox.pack(side="left", fill="both", expand=True)
+    scrollbar.config(command=listbox.yview)
+
+    #filtering state + mapping from visible rows -> real indices
+    filter_var = tk.StringVar(value="All")  #All / Active / Done / Overdue / Today / Upcoming
+    search_var = tk.StringVar(value="")     #words to match, prefixes ok
+    sort_var = tk.StringVar(value="Added")  #Added / Status / Text / Due
+    group_var = tk.StringVar(value="None")  #None / Day
+    visible_indices = store.visible()  #row -> index into 'tasks' for the listbox
+
+    def compute_visible():
+        #lazy view over the store's status index, no rescan of 'tasks'
+        return store.visible(filter_var.get(), search_var.get(), sort_var.get(), group_var.get())
+
+    #applies store changes row by row; windowed once the list gets long
+    task_listbox = TaskListbox(listbox, scrollbar, store, visible_indices)
+
+    @stats.timed("refresh_list")
+    def refresh_list():
+        #full redraw, only needed when the filter changes
+        nonlocal visible_indices
+        visible_indices = compute_visible()
+        task_listbox.set_view(visible_indices)
+
+    def get_selected_index():
+        #translate selected row in the listbox -> index in 'tasks'
+        try:
+            return visible_indices[task_listbox.selected_row()]
+        except (IndexError, TypeError):
+            return None
+
+    def get_selected_indices():
+        #every selected row -> index in 'tasks', in list order
+        return sorted(visible_indices[row] for row in task_listbox.selected_rows())
+
+    #starts empty; the loader below fills it in batches
+    refresh_list()
+
+    #actions
+    def add_task():
+        task = simpledialog.askstring("Add Task", "Enter your task and time:")
+        if not task:
+            return
+        repeat = ask_repeat(task)
+        if repeat or confirm_new_text(task):
+            with stats.timer("action.add"):
+                added = store.add_text(task, repeat=repeat)  #new tasks start as not done
+            if repeat:
+                messagebox.showinfo("Repeating Task", f"'{added.text}' repeats {added.describe()}; see Repeating...")
+
+    def ask_repeat(text):
+        #repeating is the user's call; only offered when the text says how often
+        how = parse_rule(text)
+        return how is not None and messagebox.askyesno(
+            "Repeating Task", f"'{text}' reads like it repeats {describe_rule(how)}. Make it a repeating task?")
+
+    def edit_task():
+        idx = get_selected_index()
+        if idx is None:
+            messagebox.showwarning("No selection", "Please select a task to edit.")
+            return
+        #sync() keeps running while the dialogs are open and may move the task
+        task_id = tasks[idx].id
+        new_text = simpledialog.askstring(
+            "Edit Task", "Update the task:", initialvalue=tasks[idx].text
+        )
+        if (new_text is not None and new_text.strip() != ""
+                and confirm_new_text(new_text.strip(), exclude=task_id)):
+            idx = store.find(task_id)
+            if idx < 0:
+                messagebox.showwarning("Task gone", "That task was removed in another window.")
+                return
+            with stats.timer("action.edit"):
+                store.update(idx, text=new_text.strip())
+
+    def confirm_new_text(text, exclude=None):
+        #ask before adding (or editing a task into) a copy of one already there
+        dupes = store.duplicates(text, exclude=exclude)
+        if not dupes:
+            return True
+        state = "finished" if dupes[0].done else "on the schedule"
+        return messagebox.askyesno("Duplicate Task", f"'{dupes[0].text}' is already {state}. Save this anyway?")
+
+    def toggle_done():
+        #one task flips; several are all marked done (or undone if they all were)
+        indices = get_selected_indices()
+        if not indices:
+            messagebox.showwarning("No selection", "Please select a task to toggle.")
+            return
+        ids = [tasks[i].id for i in indices]
+        with stats.timer("action.toggle"):
+            store.toggle_many(indices)
+        if len(ids) > 1:
+            #the bulk change redrew the list; keep the same tasks picked
+            task_listbox.select_ids(ids)
+
+    def remove_task():
+        indices = get_selected_indices()
+        if not indices:
+            messagebox.showwarning("No selection", "Please select a task to remove.")
+            return
+        with stats.timer("action.remove"):
+            removed = store.remove_many(indices)
+        if len(removed) == 1:
+            messagebox.showinfo("Removed", f"Removed: {removed[0]}")
+        else:
+            messagebox.showinfo("Removed", f"Removed {len(removed)} tasks")
+
+    def clear_done():
+        count = len(store.status.done)
+        if not count:
+            messagebox.showinfo("Clear Done", "There are no finished tasks.")
+            return
+        if not messagebox.askyesno("Clear Done", f"Remove all {count} finished tasks?"):
+            return
+        with stats.timer("action.clear_done"):
+            store.clear_done()
+
+    def merge_duplicates():
+        with stats.timer("action.merge_duplicates"):
+            removed = store.merge_duplicates()
+        if removed:
+            messagebox.showinfo("Merge Duplicates", f"Merged away {removed} duplicate tasks.")
+        else:
+            messagebox.showinfo("Merge Duplicates", "There are no duplicate tasks.")
+
+    def show_archive():
+        #finished tasks moved out of the schedule, newest first, a page at a time
+        query = search_var.get()
+        win = tk.Toplevel(root)
+        title = f"Archive: {query}" if query.strip() else "Archive"
+        win.title(f"{title} ({store.archive.count()} tasks archived)")
+        sb = tk.Scrollbar(win)
+        sb.pack(side="right", fill="y")
+        box = tk.Listbox(win, width=60, height=20, yscrollcommand=sb.set)
+        box.pack(side="top", fill="both", expand=True)
+        sb.config(command=box.yview)
+        source = store.archive.iter_tasks(query)
+
+        def more():
+            with stats.timer("action.archive_page"):
+                page = list(islice(source, PAGE_SIZE))
+            if page:
+                box.insert(tk.END, *(str(task) for task in page))
+            if len(page) < PAGE_SIZE:
+                more_btn.config(state="disabled")
+
+        more_btn = tk.Button(win, text="Load more", command=more)
+        more_btn.pack(side="left", padx=8, pady=8)
+        tk.Button(win, text="Close", command=win.destroy).pack(side="right", padx=8, pady=8)
+        more()
+
+    def show_repeating():
+        #upcoming occurrences of the repeating tasks; the series are generated a page at a time
+        #this schedule's, even if the main window switches while it's open
+        recurring = store.recurring
+        win = tk.Toplevel(root)
+        win.title(f"Repeating ({len(recurring)} tasks)")
+        sb = tk.Scrollbar(win)
+        sb.pack(side="right", fill="y")
+        box = tk.Listbox(win, width=70, height=20, yscrollcommand=sb.set)
+        box.pack(side="top", fill="both", expand=True)
+        sb.config(command=box.yview)
+        shown = []
+        source = None
+
+        def line(o):
+            return f"{format_due(o.due)}   {o}   ({o.rule.describe()})"
+
+        def restart():
+            nonlocal source
+            source = recurring.upcoming()
+            shown.clear()
+            box.delete(0, tk.END)
+            more_btn.config(state="normal")
+            more()
+
+        def more():
+            page = list(islice(source, OCCURRENCE_PAGE))
+            shown.extend(page)
+            if page:
+                box.insert(tk.END, *(line(o) for o in page))
+            if len(page) < OCCURRENCE_PAGE:
+                more_btn.config(state="disabled")
+
+        def selected():
+            sel = box.curselection()
+            return sel[0] if sel else None
+
+        def toggle():
+            row = selected()
+            if row is None:
+                return
+            if not recurring.toggle(shown[row]):
+                restart()
+                return
+            box.delete(row)
+            box.insert(row, line(shown[row]))
+            box.selection_set(row)
+
+        def stop():
+            row = selected()
+            if row is None:
+                return
+            rule = shown[row].rule
+            if messagebox.askyesno("Stop Repeating", f"Stop repeating '{rule.text}'?", parent=win):
+                recurring.remove(rule.id)
+                win.title(f"Repeating ({len(recurring)} tasks)")
+                restart()
+
+        more_btn = tk.Button(win, text="Load more", command=more)
+        more_btn.pack(side="left", padx=8, pady=8)
+        tk.Button(win, text="Done/Undone", command=toggle).pack(side="left")
+        tk.Button(win, text="Stop Repeating", command=stop).pack(side="left", padx=8)
+        tk.Button(win, text="Close", command=win.destroy).pack(side="right", padx=8, pady=8)
+        box.bind("<Double-Button-1>", lambda e: toggle())
+        box.bind("<space>", lambda e: (toggle(), "break"))
+        restart()
+
+    def undo(redo=False):
+        with stats.timer("action.redo" if redo else "action.undo"):
+            if not (store.redo() if redo else store.undo()):
+                root.bell()
+
+    def on_close():
+        #the writer threads may still hold the last few changes
+        schedules.flush()
+        root.destroy()
+
+    def switch_schedule(new_name):
+        #show another schedule; one that isn't open yet loads in the background
+        nonlocal name, store, tasks, visible_indices, loader, reminders
+        if new_name == name:
+            return
+        fresh = new_name not in schedules
+        try:
+            new_store = schedules.open(new_name, load=False)
+        except ValueError as e:
+            messagebox.showwarning("Schedule", str(e))
+            schedule_var.set(name)
+            return
+        reminders.stop()
+        name, store, tasks = new_name, new_store, new_store.tasks
+        schedule_var.set(name)
+        root.title(f"Task Manager - {name}")
+        #loaders of schedules the LRU has closed are no use any more
+        for n in [n for n in loaders if n not in schedules]:
+            del loaders[n]
+        visible_indices = compute_visible()
+        task_listbox.set_store(store, visible_indices)
+        reminders = Reminders(store, arm_reminder)
+        reminders.start()
+        if fresh:
+            loaders[name] = store.begin_load()
+        loader = loaders.get(name)
+        resume_loading()
+
+    def add_schedule_item(n):
+        schedule_menu["menu"].add_command(label=n, command=lambda: switch_schedule(n))
+        known.add(n)
+
+    def new_schedule():
+        new_name = (simpledialog.askstring("New Schedule", "Name (letters, digits, _ and -):") or "").strip()
+        if not new_name:
+            return
+        if new_name not in known:
+            try:
+                schedules.path(new_name)
+            except ValueError as e:
+                messagebox.showwarning("New Schedule", str(e))
+                return
+            add_schedule_item(new_name)
+        switch_schedule(new_name)
+
+    def show_schedules():
+        #counts for every schedule from their .meta files; none of them is loaded
+        rows = schedules.summary()
+        for n, _ in rows:
+            if n not in known:
+                add_schedule_item(n)
+        messagebox.showinfo("All Schedules", "\n".join(
+            f"{'> ' if n == name else ''}{n}: {format_counts(counts)}" for n, counts in rows))
+
+    #UI controls
+    #schedule picker; each schedule loads the first time it's picked
+    schedule_var = tk.StringVar(value=name)
+    tk.Label(topbar, text="Schedule:").pack(side="left")
+    schedule_menu = tk.OptionMenu(topbar, schedule_var, name)
+    schedule_menu["menu"].delete(0, tk.END)
+    schedule_menu.pack(side="left")
+    known = set()
+    for n in schedules.names():
+        add_schedule_item(n)
+    tk.Button(topbar, text="New...", command=new_schedule).pack(side="left", padx=(4, 0))
+    tk.Button(topbar, text="All...", command=show_schedules).pack(side="left", padx=(4, 12))
+
+    #filter dropdown on the top bar
+    tk.Label(topbar, text="Filter:").pack(side="left")
+    tk.OptionMenu(topbar, filter_var, *FILTERS, *DUE_FILTERS,
+                  command=lambda _=None: refresh_list()).pack(side="left")
+
+    #order and grouping; a sorted list repositions single changes itself
+    tk.Label(topbar, text="Sort:").pack(side="left", padx=(12, 0))
+    tk.OptionMenu(topbar, sort_var, *SORTS, command=lambda _=None: refresh_list()).pack(side="left")
+    tk.Label(topbar, text="Group:").pack(side="left")
+    tk.OptionMenu(topbar, group_var, *GROUPS, command=lambda _=None: refresh_list()).pack(side="left")
+
+    #search box next to the filter, refreshed as you type (debounced)
+    tk.Label(topbar, text="Search:").pack(side="left", padx=(12, 0))
+    tk.Entry(topbar, textvariable=search_var, width=24).pack(side="left")
+    search_after = None
+
+    def on_search_change(*_):
+        nonlocal search_after
+        if search_after is not None:
+            root.after_cancel(search_after)
+        search_after = root.after(SEARCH_DEBOUNCE_MS, refresh_list)
+
+    search_var.trace_add("write", on_search_change)
+
+    btnbar = tk.Frame(root)
+    btnbar.pack(fill="x", padx=12, pady=(0, 12))
+
+    tk.Button(btnbar, text="Add Task", command=add_task).pack(side="left")
+    tk.Button(btnbar, text="Edit Task", command=edit_task).pack(side="left", padx=8)
+    tk.Button(btnbar, text="Mark Done/Undone", command=toggle_done).pack(side="left")
+    tk.Button(btnbar, text="Remove Task", command=remove_task).pack(side="left", padx=8)
+    tk.Button(btnbar, text="Clear Done", command=clear_done).pack(side="left")
+    tk.Button(btnbar, text="Merge Duplicates", command=merge_duplicates).pack(side="left", padx=(8, 0))
+    tk.Button(btnbar, text="Archive...", command=show_archive).pack(side="left", padx=8)
+    tk.Button(btnbar, text="Repeating...", command=show_repeating).pack(side="left")
+    tk.Button(btnbar, text="Quit", command=on_close).pack(side="right")
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    #shortcuts
+    listbox.bind("<Double-Button-1>", lambda e: edit_task())
+    listbox.bind("<Return>",          lambda e: (edit_task(), "break"))   #Enter edits
+    listbox.bind("<space>",           lambda e: (toggle_done(), "break")) #Space toggles
+    listbox.bind("<Delete>",          lambda e: (remove_task(), "break")) #Delete removes
+    listbox.bind("<Control-z>",       lambda e: (undo(), "break"))        #Ctrl+Z undoes
+    listbox.bind("<Control-y>",       lambda e: (undo(True), "break"))    #Ctrl+Y / Ctrl+Shift+Z redo
+    listbox.bind("<Control-Z>",       lambda e: (undo(True), "break"))
+    listbox.bind("<Control-a>",       lambda e: (task_listbox.select_all(), "break"))
+
+    #reminders: one root.after, always set for the next task to come due
+    reminder_after = None
+
+    def arm_reminder(delay):
+        nonlocal reminder_after
+        if reminder_after is not None:
+            root.after_cancel(reminder_after)
+            reminder_after = None
+        if delay is not None:
+            reminder_after = root.after(int(delay * 1000), fire_reminders)
+
+    def fire_reminders():
+        nonlocal reminder_after
+        reminder_after = None
+        due = reminders.fire()
+        if not due:
+            return
+        task_listbox.highlight(t.id for t in due)
+        root.bell()
+        #a plain window rather than a messagebox, so nothing blocks
+        win = tk.Toplevel(root)
+        win.title("Reminder")
+        for t in due:
+            tk.Label(win, text=f"{format_due(t.due)}  {t.text}", anchor="w").pack(fill="x", padx=12, pady=2)
+        tk.Button(win, text="OK", command=win.destroy).pack(pady=8)
+
+    reminders = Reminders(store, arm_reminder)
+    reminders.start()
+
+    #progressive startup: the window shows right away, the file is parsed on a
+    #worker thread and rows are fed in between events so the UI stays usable
+    progress_label = tk.Label(topbar, text="Loading...")
+    #name -> Loader of every schedule opened in this window
+    loaders = {name: store.begin_load()}
+    loader = loaders[name]
+
+    def resume_loading():
+        #pump the current schedule's loader, if it's still going
+        if loader is None or loader.finished:
+            progress_label.pack_forget()
+            return
+        progress_label.config(text="Loading...")
+        progress_label.pack(side="right")
+        root.after_idle(pump_loader, loader)
+
+    def pump_loader(ld):
+        if ld is not loader:
+            #switched to another schedule; resume_loading() picks this one up on the way back
+            return
+        if ld.step():
+            progress_label.pack_forget()
+            if isinstance(visible_indices, SortedView):
+                #sorted views skip the loader's batches; sort the whole schedule once now
+                refresh_list()
+            return
+        done, total = ld.progress()
+        if total:
+            progress_label.config(text=f"Loading {done}/{total}...")
+        root.after(1 if ld.ready() else 30, pump_loader, ld)
+
+    resume_loading()
+
+    #other task.py/taskmanager.py windows may share the file; merge what they save
+    #a failed write stays queued and is retried; say so until one gets through
+    save_label = tk.Label(topbar, fg="red")
+
+    def poll_external():
+        store.sync()
+        if store.write_error is not None:
+            save_label.config(text=f"Couldn't save: {store.write_error} (retrying)")
+            save_label.pack(side="right")
+        else:
+            save_label.pack_forget()
+        root.after(SYNC_INTERVAL_MS, poll_external)
+
+    root.after(SYNC_INTERVAL_MS, poll_external)
+    root.mainloop()
@@ -0,0 +1,318 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from itertools import islice
+
+from core import stats
+
+#above this many rows the listbox only holds what fits on screen
+WINDOW_THRESHOLD = 2000
+#background of tasks whose reminder went off
+DUE_COLOR = "#fff3b0"
+
+
+class TaskListbox:
+    """Renders a FilterView into a Tk Listbox without rebuilding it.
+
+    Store changes are applied as row-level edits: a toggle or edit rewrites
+    one line, an add or remove inserts/deletes one line. Rows only need to
+    be rewritten after that point because of the "N." numbering.
+
+    Past `threshold` rows it switches to a windowed mode where the listbox
+    only contains the rows in the viewport and the Scrollbar, mouse wheel
+    and arrow keys move that window over the view. The selection then
+    can't live in the listbox, so it is kept as a set of task ids.
+    """
+
+    def __init__(self, listbox: tk.Listbox, scrollbar: tk.Scrollbar, store, view,
+                 threshold: int = WINDOW_THRESHOLD):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.store = store
+        self.view = view
+        self.threshold = threshold
+        self.windowed = False
+        self.top = 0          #first view row in the listbox (windowed mode)
+        self.selected = None  #selected view row, tracked ourselves in windowed mode
+        self.marked = set()   #ids of every selected task (windowed mode)
+        self._extend = False  #last click had Ctrl/Shift held
+        self.due_now = set()  #ids highlighted because their reminder went off
+        self.page = int(listbox.cget("height"))
+
+        listbox.bind("<<ListboxSelect>>", self._on_select, add="+")
+        listbox.bind("<Button-1>", self._on_click, add="+")
+        listbox.bind("<Configure>", self._on_resize, add="+")
+        listbox.bind("<MouseWheel>", self._on_wheel, add="+")
+        listbox.bind("<Button-4>", lambda e: self._scroll_by(-3), add="+")
+        listbox.bind("<Button-5>", lambda e: self._scroll_by(3), add="+")
+        listbox.bind("<Up>", lambda e: self._step(-1))
+        listbox.bind("<Down>", lambda e: self._step(1))
+        listbox.bind("<Prior>", lambda e: self._step(-self.page))
+        listbox.bind("<Next>", lambda e: self._step(self.page))
+        store.subscribe(self.on_store_change)
+
+    #public
+    def set_view(self, view):
+        self.view = view
+        self.selected = None
+        self.marked = set()
+        self.top = 0
+        self.render()
+
+    def set_store(self, store, view):
+        """Show another schedule, starting from `view` of it"""
+        self.store.unsubscribe(self.on_store_change)
+        self.store = store
+        self.due_now = set()
+        store.subscribe(self.on_store_change)
+        self.set_view(view)
+
+    def render(self):
+        """Full redraw; only needed when the filter changes"""
+        windowed = len(self.view) > self.threshold
+        if windowed != self.windowed:
+            self.windowed = windowed
+            if windowed:
+                self.listbox.config(yscrollcommand="")
+                self.scrollbar.config(command=self.yview)
+            else:
+                self.listbox.config(yscrollcommand=self.scrollbar.set)
+                self.scrollbar.config(command=self.listbox.yview)
+        if self.windowed:
+            self._render_window()
+        else:
+            self.listbox.delete(0, tk.END)
+            self.listbox.insert(tk.END, *self._lines(0, len(self.view)))
+            self._recolor(0)
+
+    def highlight(self, ids):
+        """Highlight these tasks (their reminder went off) until they are done"""
+        self.due_now.update(ids)
+        self._recolor(0)
+
+    def selected_row(self):
+        """Selected row of the view, or None"""
+        if self.windowed:
+            return self.selected
+        sel = self.listbox.curselection()
+        return sel[0] if sel else None
+
+    def selected_rows(self) -> list:
+        """Every selected row of the view, in order"""
+        if not self.windowed:
+            return list(self.listbox.curselection())
+        rows = (self.view.row_of(pos) for pos in map(self.store.find, self.marked) if pos >= 0)
+        return sorted(row for row in rows if row is not None)
+
+    def select_ids(self, ids):
+        """Select the rows showing these tasks, e.g. after a bulk change redrew the list"""
+        rows = (self.view.row_of(pos) for pos in map(self.store.find, ids) if pos >= 0)
+        rows = sorted(row for row in rows if row is not None)
+        self.selected = rows[0] if rows else None
+        if self.windowed:
+            self.marked = {self.store.tasks[self.view[row]].id for row in rows}
+            self._render_window()
+        else:
+            self.listbox.selection_clear(0, tk.END)
+            for row in rows:
+                self.listbox.selection_set(row)
+
+    def select_all(self):
+        if self.windowed:
+            tasks = self.store.tasks
+            self.marked = {tasks[pos].id for pos in self.view}
+            self._render_window()
+        else:
+            self.listbox.selection_set(0, tk.END)
+
+    def select_row(self, row: int):
+        if not 0 <= row < len(self.view):
+            return
+        self.selected = row
+        if self.windowed:
+            self.marked = {self.store.tasks[self.view[row]].id}
+            self._ensure_visible(row)
+            self._render_window()
+        else:
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(row)
+            self.listbox.activate(row)
+            self.listbox.see(row)
+
+    def on_store_change(self, kind, pos, task, before):
+        for op, row, count in self.view.row_changes(kind, pos, task, before):
+            if op == "reset" or self.windowed != (len(self.view) > self.threshold):
+                self.render()
+                return
+            if self.windowed:
+                self._apply_windowed(op, row, count)
+            else:
+                self._apply(op, row, count)
+
+    #scrolling (windowed mode)
+    def yview(self, *args):
+        """Scrollbar command: moveto / scroll units / scroll pages"""
+        total = len(self.view)
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self.top += n * (self.page if args[2] == "pages" else 1)
+        self._render_window()
+
+    def _scroll_by(self, n):
+        if self.windowed:
+            self.top += n
+            self._render_window()
+            return "break"
+
+    def _on_wheel(self, event):
+        if self.windowed:
+            return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _step(self, n):
+        if not self.windowed:
+            return None
+        row = self.selected if self.selected is not None else self.top
+        self.select_row(max(0, min(len(self.view) - 1, row + n)))
+        return "break"
+
+    def _on_resize(self, event):
+        line = tkfont.nametofont(self.listbox.cget("font")).metrics("linespace") + 1
+        page = max(1, event.height // line)
+        if page != self.page:
+            self.page = page
+            if self.windowed:
+                self._render_window()
+
+    def _on_click(self, event):
+        #Shift (1) or Control (4) extends the selection instead of replacing it
+        self._extend = bool(event.state & 0x5)
+
+    def _on_select(self, event):
+        sel = self.listbox.curselection()
+        if sel:
+            self.selected = sel[0] + (self.top if self.windowed else 0)
+        if self.windowed:
+            shown = self._window_ids()
+            if self._extend:
+                self.marked.difference_update(shown)
+            else:
+                self.marked = set()
+            self.marked.update(shown[i] for i in sel if i < len(shown))
+
+    def _ensure_visible(self, row):
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + self.page:
+            self.top = row - self.page + 1
+
+    def _render_window(self):
+        total = len(self.view)
+        self.top = max(0, min(self.top, total - self.page))
+        end = min(total, self.top + self.page)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *self._lines(self.top, end))
+        self._recolor(0)
+        if self.marked:
+            for i, id in enumerate(self._window_ids()):
+                if id in self.marked:
+                    self.listbox.selection_set(i)
+        if self.selected is not None and self.top <= self.selected < end:
+            self.listbox.activate(self.selected - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, end / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _window_ids(self) -> list:
+        tasks = self.store.tasks
+        return [tasks[pos].id for pos in islice(self.view.iter_from(self.top), self.page)]
+
+    #row edits
+    def _apply(self, op, row, count):
+        lb = self.listbox
+        sel = lb.curselection()
+        if op == "move":
+            #a sorted view moved one task from `row` to `count`; only the rows between change
+            first, last = min(row, count), max(row, count)
+            lb.delete(first, last)
+            lb.insert(first, *self._lines(first, last + 1))
+            self._recolor(first, last + 1)
+            for s in sel:
+                if s == row:
+                    s = count
+                elif row < s <= count:
+                    s -= 1
+                elif count <= s < row:
+                    s += 1
+                lb.selection_set(s)
+            return
+        if op == "update":
+            lb.delete(row, row + count - 1)
+            lb.insert(row, *self._lines(row, row + count))
+            self._recolor(row, row + count)
+            for s in sel:
+                if row <= s < row + count:
+                    lb.selection_set(s)
+            return
+        if op == "insert":
+            lb.insert(row, *self._lines(row, row + count))
+            start = row + count
+        else:
+            lb.delete(row, row + count - 1)
+            start = row
+        #renumber the tail in one delete + one multi-insert
+        if start < len(self.view):
+            lb.delete(start, tk.END)
+            lb.insert(tk.END, *self._lines(start, len(self.view)))
+        self._recolor(row)
+        for s in sel:
+            if op == "insert" and s >= row:
+                s += count
+            elif op == "remove" and s >= row + count:
+                s -= count
+            elif op == "remove" and s >= row:
+                continue
+            lb.selection_set(s)
+
+    def _apply_windowed(self, op, row, count):
+        if self.selected is not None:
+            if op == "move":
+                if self.selected == row:
+                    self.selected = count
+                elif row < self.selected <= count:
+                    self.selected -= 1
+                elif count <= self.selected < row:
+                    self.selected += 1
+            elif op == "insert" and self.selected >= row:
+                self.selected += count
+            elif op == "remove" and self.selected >= row + count:
+                self.selected -= count
+            elif op == "remove" and self.selected >= row:
+                self.selected = None
+        if op == "update" and not self.top <= row < self.top + self.page:
+            return
+        #anything above the window shifts numbering of what's shown, so redraw the window
+        self._render_window()
+
+    def _recolor(self, start, end=None):
+        #freshly inserted lines have no colour; paint the highlighted ones among listbox rows start..end
+        if not self.due_now:
+            return
+        end = self.listbox.size() if end is None else end
+        first = (self.top if self.windowed else 0) + start
+        tasks = self.store.tasks
+        for i, pos in enumerate(islice(self.view.iter_from(first), max(0, end - start)), start=start):
+            task = tasks[pos]
+            if task.id in self.due_now and not task.done:
+                self.listbox.itemconfig(i, background=DUE_COLOR)
+
+    def _lines(self, start, end):
+        tasks = self.store.tasks
+        rows = islice(self.view.iter_from(start), max(0, end - start))
+        lines = [f"{row}. {tasks[pos]}" for row, pos in enumerate(rows, start=start + 1)]
+        if self.view.grouped:
+            label = self.view.group_label
+            lines = [f"{label(row)}  |  {line}" for row, line in enumerate(lines, start=start)]
+        stats.count("tk.rows_drawn", len(lines))
+        return lines